@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class AuthentificationapiConfig(AppConfig):
     name = 'authentificationAPI'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from gestionAPI import admission  # noqa: F401  (vérification check --deploy)
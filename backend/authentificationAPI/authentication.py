@@ -0,0 +1,36 @@
+import copy
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from gestionAPI.lru import LRUCache
+
+# Cache token -> (user, token), propre à chaque processus. Il est vidé après commit par
+# les signaux de authentificationAPI.signals, dans le processus qui écrit seulement : le
+# TTL borne la durée pendant laquelle un autre processus peut encore accepter un token
+# révoqué, un compte désactivé ou servir un profil obsolète.
+token_cache = LRUCache(
+    max_size=getattr(settings, 'TOKEN_CACHE_MAX_SIZE', 10000),
+    ttl=getattr(settings, 'TOKEN_CACHE_TTL', 300),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication qui évite la jointure authtoken_token / User à chaque requête
+    en gardant les tokens récemment vus en mémoire.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached)
+        user, token = cached
+        # Copie : chaque requête peut modifier son request.user sans toucher au cache
+        return copy.copy(user), token
+
+
+def invalidate_user(user_id):
+    """Retire du cache tous les tokens d'un utilisateur"""
+    return token_cache.delete_where(lambda entry: entry[0].pk == user_id)
@@ -0,0 +1,113 @@
+"""
+Traitement des avatars : à l'upload, l'image est recadrée en carré et déclinée en
+plusieurs tailles WebP nommées d'après le hash SHA-256 du fichier d'origine
+(avatars/<hash>_<taille>.webp). Deux uploads identiques partagent donc les mêmes
+fichiers, et ces URLs ne changent jamais de contenu : elles peuvent être servies avec
+un cache HTTP illimité. Le traitement tourne dans un pool de threads pour ne pas
+ralentir la requête d'upload.
+"""
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+SIZES = getattr(settings, 'AVATAR_SIZES', (48, 128, 512))
+QUALITY = 85
+
+_executor = None
+
+
+def variant_name(digest, size):
+    return f'avatars/{digest}_{size}.webp'
+
+
+def variant_urls(user):
+    """Dictionnaire {taille: url relative} des variantes, ou None si l'avatar n'est pas encore traité"""
+    if not user.avatar_hash:
+        return None
+    storage = user.avatar.storage
+    return {str(size): storage.url(variant_name(user.avatar_hash, size)) for size in SIZES}
+
+
+def _render(image, size):
+    thumb = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    thumb.save(buffer, 'WEBP', quality=QUALITY, method=6)
+    return buffer.getvalue()
+
+
+def process_avatar(user_id):
+    """Génère les variantes de l'avatar courant et fait pointer `avatar` sur la plus grande"""
+    user = User.objects.filter(pk=user_id).only('avatar', 'avatar_hash').first()
+    if user is None or not user.avatar:
+        return
+    original = user.avatar.name
+    storage = user.avatar.storage
+    if user.avatar_hash and original == variant_name(user.avatar_hash, SIZES[-1]):
+        return
+
+    with storage.open(original, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+
+    image = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+    image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    for size in SIZES:
+        name = variant_name(digest, size)
+        if storage.exists(name):
+            continue
+        saved = storage.save(name, ContentFile(_render(image, size)))
+        if saved != name:
+            # Un autre worker a écrit le même fichier entre-temps
+            storage.delete(saved)
+
+    # Ne remplace l'avatar que s'il n'a pas changé pendant le traitement.
+    # save() déclenche les signaux (cache des tokens, versions pour les ETags).
+    with transaction.atomic():
+        user = User.objects.select_for_update().filter(pk=user_id, avatar=original).first()
+        if user is None:
+            return
+        user.avatar = variant_name(digest, SIZES[-1])
+        user.avatar_hash = digest
+        user.save(update_fields=['avatar', 'avatar_hash'])
+    if not original.startswith(f'avatars/{digest}_'):
+        storage.delete(original)
+
+
+def _run(user_id):
+    try:
+        process_avatar(user_id)
+    except Exception:
+        logger.exception("Échec du traitement de l'avatar de l'utilisateur %s", user_id)
+
+
+def _run_in_worker(user_id):
+    try:
+        _run(user_id)
+    finally:
+        close_old_connections()
+
+
+def schedule(user):
+    """Lance le traitement de l'avatar après le commit de la transaction en cours"""
+    def submit():
+        global _executor
+        if not getattr(settings, 'AVATAR_PROCESSING_ASYNC', True):
+            _run(user.pk)
+            return
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'AVATAR_WORKERS', 2), thread_name_prefix='avatar',
+            )
+        _executor.submit(_run_in_worker, user.pk)
+
+    transaction.on_commit(submit)
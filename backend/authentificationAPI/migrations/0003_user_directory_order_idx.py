@@ -0,0 +1,28 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_nombre_posts(apps, schema_editor):
+    User = apps.get_model('authentificationAPI', 'User')
+    Topic = apps.get_model('topicsAPI', 'Topic')
+    User.objects.update(nombre_posts=Coalesce(Subquery(
+        Topic.objects.filter(author_id=OuterRef('pk'))
+        .order_by().values('author_id').annotate(n=Count('id')).values('n')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentificationAPI', '0002_user_avatar_hash'),
+        ('topicsAPI', '0003_topic_reply_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-date_inscription', '-id'], name='user_directory_order_idx'),
+        ),
+        migrations.RunPython(backfill_nombre_posts, migrations.RunPython.noop),
+    ]
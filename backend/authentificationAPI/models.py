@@ -7,6 +7,8 @@ class User(AbstractUser):
     email = models.EmailField(unique=True, verbose_name="Email")
     bio = models.TextField(max_length=500, blank=True, null=True, verbose_name="Biographie")
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True, verbose_name="Photo de profil")
+    # Hash SHA-256 de l'avatar, renseigné une fois les variantes générées (voir avatars.py)
+    avatar_hash = models.CharField(max_length=64, blank=True, default='', verbose_name="Empreinte de l'avatar")
     date_inscription = models.DateTimeField(auto_now_add=True, verbose_name="Date d'inscription")
     nombre_posts = models.IntegerField(default=0, verbose_name="Nombre de posts")
 
@@ -18,6 +20,10 @@ class User(AbstractUser):
         verbose_name = "Utilisateur"
         verbose_name_plural = "Utilisateurs"
         ordering = ['-date_inscription']
+        indexes = [
+            # Ordre de la pagination par curseur de la liste des membres (voir pagination.py)
+            models.Index(fields=['-date_inscription', '-id'], name='user_directory_order_idx'),
+        ]
 
     def __str__(self):
         return self.username
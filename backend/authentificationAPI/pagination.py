@@ -0,0 +1,10 @@
+from django.conf import settings
+
+from gestionAPI.pagination import KeysetPagination
+
+
+class UserPagination(KeysetPagination):
+    """Pagination de l'annuaire des membres, du plus récent au plus ancien inscrit"""
+    ordering = ('-date_inscription', '-id')
+    page_size = getattr(settings, 'USERS_PAGE_SIZE', 50)
+    max_page_size = getattr(settings, 'USERS_MAX_PAGE_SIZE', 200)
@@ -1,20 +1,26 @@
 from rest_framework import serializers
 from .models import User
+from . import avatars
 
 
 # Transforme un Objet en JSON
 class UserSerializers(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, style={'input_type': 'password'})
-    nombre_posts = serializers.SerializerMethodField()
+    avatar_urls = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'password', 'first_name', 'last_name', 'bio', 'avatar', 'date_inscription', 'nombre_posts']
+        fields = ['id', 'username', 'email', 'password', 'first_name', 'last_name', 'bio', 'avatar', 'avatar_urls', 'date_inscription', 'nombre_posts']
+        # nombre_posts est tenu à jour à la création / suppression des topics (topicsAPI.counters)
         read_only_fields = ['id', 'date_inscription', 'nombre_posts']
 
-    def get_nombre_posts(self, obj):
-        """Calcule dynamiquement le nombre de topics créés par l'utilisateur"""
-        return obj.topics.count()
+    def get_avatar_urls(self, obj):
+        """URLs des variantes redimensionnées de l'avatar ({"48": ..., "128": ..., "512": ...})"""
+        urls = avatars.variant_urls(obj)
+        request = self.context.get('request')
+        if urls and request is not None:
+            urls = {size: request.build_absolute_uri(url) for size, url in urls.items()}
+        return urls
 
     def create(self, validated_data):
         # Créer un utilisateur avec mot de passe crypté
@@ -29,6 +35,7 @@ class UserSerializers(serializers.ModelSerializer):
         if 'avatar' in validated_data:
             user.avatar = validated_data['avatar']
             user.save()
+            avatars.schedule(user)
         return user
 
     def update(self, instance, validated_data):
@@ -38,9 +45,12 @@ class UserSerializers(serializers.ModelSerializer):
         instance.email = validated_data.get('email', instance.email)
         instance.bio = validated_data.get('bio', instance.bio)
 
-        # Gérer l'avatar si présent
+        # Gérer l'avatar si présent (les variantes sont générées en arrière-plan)
         if 'avatar' in validated_data:
             instance.avatar = validated_data['avatar']
+            instance.avatar_hash = ''
 
         instance.save()
+        if 'avatar' in validated_data and instance.avatar:
+            avatars.schedule(instance)
         return instance
\ No newline at end of file
@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache, invalidate_user
+from .models import User
+
+# Le cache n'est vidé qu'après commit : vidé avant, une requête concurrente pourrait y
+# remettre l'état d'avant l'écriture (un compte encore actif) pour tout le TTL.
+# Seul le cache du processus courant est vidé ; les autres expirent avec TOKEN_CACHE_TTL.
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    # Rotation ou révocation d'un token
+    key = instance.key
+    transaction.on_commit(lambda: token_cache.delete(key))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    # La connexion ne met à jour que last_login : inutile de vider le cache
+    if created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_user(user_id))
@@ -1,3 +1,193 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from gestionAPI.admission import acquire_slot, check_shared_counters, client_key, release_slot
+from gestionAPI.lru import LRUCache
+
+from .authentication import token_cache
+from .models import User
+
+
+class LRUCacheTests(SimpleTestCase):
+
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(max_size=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual(len(lru), 2)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual((lru.get('a'), lru.get('c')), (1, 3))
+        self.assertEqual(lru.stats()['evictions'], 1)
+
+    def test_set_refreshes_recency(self):
+        lru = LRUCache(max_size=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.set('a', 10)
+        lru.set('c', 3)
+        self.assertEqual((lru.get('a'), lru.get('b')), (10, None))
+
+    def test_entries_expire_after_ttl(self):
+        lru = LRUCache(max_size=2, ttl=60)
+        with mock.patch('gestionAPI.lru.time.monotonic', return_value=1000):
+            lru.set('a', 1)
+        with mock.patch('gestionAPI.lru.time.monotonic', return_value=1059):
+            self.assertEqual(lru.get('a'), 1)
+        with mock.patch('gestionAPI.lru.time.monotonic', return_value=1060):
+            self.assertIsNone(lru.get('a'))
+        self.assertEqual(len(lru), 0)
+
+    def test_delete_where_and_stats(self):
+        lru = LRUCache(max_size=10, ttl=60)
+        for key in range(4):
+            lru.set(key, key)
+        self.assertEqual(lru.delete_where(lambda value: value % 2), 2)
+        lru.delete(0)
+        self.assertEqual(lru.get(2, 'absent'), 2)
+        self.assertEqual(lru.get(1, 'absent'), 'absent')
+        stats = lru.stats()
+        self.assertEqual((stats['size'], stats['hits'], stats['misses'], stats['hit_ratio']), (1, 1, 1, 0.5))
+        lru.clear()
+        self.assertEqual(len(lru), 0)
+
+
+class TokenCacheTests(TestCase):
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='secret-password')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_deactivated_user_is_evicted_after_commit(self):
+        self.assertEqual(self.client.get('/authentification/me/').status_code, 200)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.is_active = False
+            self.user.save()
+            # Avant commit, l'entrée reste : une requête concurrente lit encore l'ancien état
+            self.assertIsNotNone(token_cache.get(self.token.key))
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertEqual(self.client.get('/authentification/me/').status_code, 401)
+
+    def test_deleted_token_is_evicted_after_commit(self):
+        self.client.get('/authentification/me/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertEqual(self.client.get('/authentification/me/').status_code, 401)
+
+    def test_rotated_token_is_rejected_at_once(self):
+        self.assertEqual(self.client.get('/authentification/me/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+            new_token = Token.objects.create(user=self.user)
+        self.assertEqual(self.client.get('/authentification/me/').status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {new_token.key}')
+        self.assertEqual(self.client.get('/authentification/me/').status_code, 200)
+
+    def test_deleted_user_tokens_are_rejected(self):
+        self.client.get('/authentification/me/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertEqual(len(token_cache), 0)
+        self.assertEqual(self.client.get('/authentification/me/').status_code, 401)
+
+
+class UserBatchTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.users = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='secret-password')
+            for name in ('alice', 'bob')
+        ]
+
+    def test_returns_found_and_missing_ids(self):
+        alice, bob = self.users
+        response = self.client.get(f'/authentification/user/batch/?ids={bob.pk},999,{alice.pk},{bob.pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data['results']), [str(bob.pk), str(alice.pk)])
+        self.assertEqual(response.data['results'][str(alice.pk)]['username'], 'alice')
+        self.assertEqual(response.data['errors'], {'999': 'Introuvable'})
+
+    def test_rejects_invalid_ids(self):
+        for ids in ('', 'abc', '1,x', '²', str(2 ** 63)):
+            self.assertEqual(self.client.get(f'/authentification/user/batch/?ids={ids}').status_code, 400)
+
+    @override_settings(BATCH_MAX_IDS=2)
+    def test_limits_the_number_of_ids(self):
+        self.assertEqual(self.client.get('/authentification/user/batch/?ids=1,2').status_code, 200)
+        self.assertEqual(self.client.get('/authentification/user/batch/?ids=1,2,3').status_code, 400)
+
+
+@override_settings(ADMISSION_LIMITS={'login': {'rate': 2, 'per': 60, 'burst': 2}})
+class AdmissionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='secret-password')
+
+    def login(self, username='alice', ip='10.0.0.1', **extra):
+        return APIClient().post(
+            '/authentification/login/', {'username': username, 'password': 'wrong'}, REMOTE_ADDR=ip, **extra,
+        )
+
+    def test_login_is_keyed_by_ip_even_with_a_token(self):
+        token = Token.objects.create(user=self.user)
+        self.assertEqual(self.login('bob').status_code, 401)
+        self.assertEqual(self.login('carol').status_code, 401)
+        response = self.login('dave', HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    @override_settings(ADMISSION_LIMITS={
+        'login': {'rate': 100, 'per': 60, 'burst': 100},
+        'login_failures': {'rate': 1, 'per': 180, 'burst': 2},
+    })
+    def test_failures_are_limited_per_ip_and_account(self):
+        self.assertEqual(self.login(ip='10.0.0.1').status_code, 401)
+        self.assertEqual(self.login(username='ALICE', ip='10.0.0.1').status_code, 401)
+        self.assertEqual(self.login(ip='10.0.0.1').status_code, 429)
+        # Les échecs d'une autre adresse ne bloquent pas le titulaire du compte
+        response = APIClient().post(
+            '/authentification/login/', {'username': 'alice', 'password': 'secret-password'}, REMOTE_ADDR='10.0.0.2',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.login(username='bob', ip='10.0.0.1').status_code, 401)
+
+    def test_local_memory_counters_are_flagged(self):
+        self.assertEqual([warning.id for warning in check_shared_counters(None)], ['gestionAPI.W001'])
+
+    def test_client_key_trusts_only_authenticated_users(self):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION='Token forged', REMOTE_ADDR='10.0.0.9')
+        request.user = AnonymousUser()
+        self.assertEqual(client_key(request), 'ip:10.0.0.9')
+        request.user = self.user
+        self.assertEqual(client_key(request), f'user:{self.user.pk}')
+
+    def test_slots_respect_the_cap(self):
+        slots = [acquire_slot('test:slot', 2) for _ in range(2)]
+        self.assertNotIn(None, slots)
+        self.assertIsNone(acquire_slot('test:slot', 2))
+        release_slot(slots[0])
+        self.assertIsNotNone(acquire_slot('test:slot', 2))
+
+    def test_expired_slot_release_keeps_the_new_holder(self):
+        first = acquire_slot('test:slot', 1)
+        cache.delete(first[0])  # expiration de la place
+        second = acquire_slot('test:slot', 1)
+        self.assertIsNotNone(second)
+        release_slot(first)
+        self.assertIsNone(acquire_slot('test:slot', 1))
+        release_slot(second)
+        self.assertIsNotNone(acquire_slot('test:slot', 1))
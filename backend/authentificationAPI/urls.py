@@ -6,6 +6,7 @@ urlpatterns = [
     # ===== AUTHENTIFICATION =====
     path('user/', views.UserListCreateView.as_view(), name='user-list-create'),
     path('user/<int:id>/', views.UserRetrieveUpdateDestroyView.as_view(), name='user-detail'),
+    path('user/batch/', views.user_batch, name='user-batch'),
     path('register/', views.register, name='register'),
     path('login/', views.login, name='login'),
     path('me/', views.get_current_user, name='current-user'),
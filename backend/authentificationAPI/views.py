@@ -1,3 +1,5 @@
+import hashlib
+
 from django.shortcuts import render
 from django.contrib.auth import authenticate
 from rest_framework import generics, status
@@ -5,18 +7,49 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from gestionAPI.admission import admission, failures_exhausted, ip_key, record_failure
+from gestionAPI.batch import batch_response, parse_ids
+from gestionAPI.conditional import make_validators, not_modified, set_validators
+from gestionAPI.streaming import StreamingListMixin
+from searchAPI import versions
 from .models import User
+from .pagination import UserPagination
 from . serializers import UserSerializers
 
-class UserListCreateView(generics.ListCreateAPIView):
+class UserListCreateView(StreamingListMixin, generics.ListCreateAPIView):
+    """
+    GET: Liste paginée des membres, ?cursor= pour la page suivante, ?stream=true pour tous
+    POST: Créer un utilisateur
+    """
     queryset = User.objects.all()
     serializer_class = UserSerializers
+    pagination_class = UserPagination
 
 class UserRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializers
     lookup_field = "id"
 
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = make_validators(versions.read(versions.user(instance.pk)))
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance)
+        return set_validators(Response(serializer.data), etag, last_modified)
+
+@api_view(['GET'])
+def user_batch(request):
+    """
+    Endpoint pour récupérer plusieurs utilisateurs en une requête : /user/batch/?ids=1,2,3
+    Les ids introuvables sont listés dans "errors"
+    """
+    ids, error = parse_ids(request)
+    if error is not None:
+        return error
+    return batch_response(ids, User.objects.all(), UserSerializers, {'request': request})
+
 @api_view(['POST'])
 def register(request):
     """
@@ -36,10 +69,23 @@ def register(request):
         }, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+def _login_keys(request):
+    # Toujours par adresse IP : présenter un token ne change pas de seau
+    return [ip_key(request)]
+
+
+def _failures_key(request, username):
+    # Compte visé et adresse IP ensemble : des échecs venus d'ailleurs ne bloquent pas le titulaire
+    return ip_key(request) + ':' + hashlib.sha256(str(username).lower().encode('utf-8')).hexdigest()
+
+
 @api_view(['POST'])
+@admission('login', keys=_login_keys)
 def login(request):
     """
     Endpoint pour la connexion d'un utilisateur
+    Limité par ADMISSION_LIMITS['login'] et, pour les échecs, ADMISSION_LIMITS['login_failures']
+    (429 / 503 avec Retry-After)
     """
     username = request.data.get('username')
     password = request.data.get('password')
@@ -49,6 +95,11 @@ def login(request):
             'error': 'Veuillez fournir un nom d\'utilisateur et un mot de passe'
         }, status=status.HTTP_400_BAD_REQUEST)
 
+    failures_key = _failures_key(request, username)
+    response = failures_exhausted('login_failures', failures_key)
+    if response is not None:
+        return response
+
     user = authenticate(username=username, password=password)
 
     if user:
@@ -62,6 +113,7 @@ def login(request):
             }
         }, status=status.HTTP_200_OK)
 
+    record_failure('login_failures', failures_key)
     return Response({
         'error': 'Nom d\'utilisateur ou mot de passe incorrect'
     }, status=status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,219 @@
+"""
+Contrôle d'admission des endpoints coûteux (connexion, recherche globale).
+
+Deux protections par endpoint, réglées dans ADMISSION_LIMITS :
+- concurrence : au plus `concurrency` requêtes en cours, tous processus confondus ; au-delà,
+  la requête est rejetée tout de suite (503) au lieu d'occuper un worker en file d'attente ;
+- débit : seau à jetons par client (utilisateur authentifié, sinon adresse IP) qui se
+  remplit de `rate` jetons par `per` secondes, jusqu'à `burst` ; une requête coûte `cost`
+  jetons et est refusée (429) quand le seau est vide ;
+- échecs : seau débité seulement quand la vue le signale (record_failure), consulté avant
+  le traitement (failures_exhausted) ; pour la connexion, par adresse IP et compte visé.
+Toutes répondent avec Retry-After. Les compteurs vivent dans le cache ADMISSION_CACHE_ALIAS :
+avec le LocMemCache par défaut ils sont propres à chaque processus et N workers admettent
+N fois les limites. Le pointer vers un cache commun (Memcached, Redis) ; `manage.py check
+--deploy` le signale (gestionAPI.W001).
+
+Le seau est stocké sous la forme d'une seule date (« GCRA ») : lecture puis écriture sans
+verrou entre processus, donc approximatif sous forte contention, ce qui suffit à délester.
+"""
+import math
+import random
+import time
+import uuid
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Tags, Warning, register
+from django.http import JsonResponse
+
+# Backends dont le contenu n'est pas partagé entre processus
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def _cache():
+    return caches[getattr(settings, 'ADMISSION_CACHE_ALIAS', 'default')]
+
+
+def _limits(name):
+    if not getattr(settings, 'ADMISSION_CONTROL', True):
+        return None
+    return getattr(settings, 'ADMISSION_LIMITS', {}).get(name)
+
+
+def ip_key(request):
+    return 'ip:' + request.META.get('REMOTE_ADDR', '')
+
+
+def client_key(request):
+    """
+    Seau du client : l'utilisateur une fois l'authentification réussie, sinon l'adresse IP
+    (un en-tête Authorization quelconque ne doit pas ouvrir un seau neuf à chaque requête)
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return ip_key(request)
+
+
+def is_process_local(alias):
+    """Vrai si le cache `alias` n'est pas partagé entre processus"""
+    return settings.CACHES.get(alias, {}).get('BACKEND') in LOCAL_CACHE_BACKENDS
+
+
+def _drain(key, cost, rate, per, burst, now):
+    """(secondes à attendre, 0 si les jetons sont disponibles ; nouvelle date de seau plein)"""
+    interval = per / rate  # secondes pour regagner un jeton
+    # Date à laquelle le seau sera de nouveau plein ; passée, le seau est plein
+    full_at = max(_cache().get(key, now), now)
+    new_full_at = full_at + cost * interval
+    return max(new_full_at - now - burst * interval, 0), new_full_at
+
+
+def take_tokens(key, cost, rate, per, burst, now=None):
+    """
+    Retire `cost` jetons du seau `key` ; retourne 0 si la requête passe, sinon le nombre
+    de secondes avant qu'elle puisse passer.
+    """
+    if cost <= 0:
+        return 0
+    now = time.time() if now is None else now
+    wait, new_full_at = _drain(key, cost, rate, per, burst, now)
+    if wait:
+        return wait
+    _cache().set(key, new_full_at, math.ceil(new_full_at - now) + 1)
+    return 0
+
+
+def acquire_slot(prefix, concurrency):
+    """
+    Réserve une des `concurrency` places, une clé de cache chacune prise par add() (atomique) ;
+    retourne la place à passer à release_slot(), ou None si l'endpoint est saturé
+    """
+    cache = _cache()
+    # Une place perdue (processus tué pendant une requête) expire seule avec sa clé
+    timeout = getattr(settings, 'ADMISSION_SLOT_TIMEOUT', 60)
+    holder = uuid.uuid4().hex
+    # Départ au hasard : sous charge, moins de places occupées essayées avant une libre
+    start = random.randrange(concurrency)
+    for offset in range(concurrency):
+        key = f'{prefix}:{(start + offset) % concurrency}'
+        if cache.add(key, holder, timeout):
+            return key, holder
+    return None
+
+
+def release_slot(slot):
+    key, holder = slot
+    cache = _cache()
+    # Place expirée puis reprise par une autre requête : elle n'est pas libérée
+    if cache.get(key) == holder:
+        cache.delete(key)
+
+
+def failures_exhausted(name, key):
+    """Rejet 429 si le seau d'échecs `key` de ADMISSION_LIMITS[name] est vide, sinon None (sans le débiter)"""
+    limits = _limits(name)
+    if limits is None:
+        return None
+    wait, _ = _drain(
+        f'admission:{name}:{key}', 1, limits['rate'], limits.get('per', 60), limits.get('burst', limits['rate']),
+        time.time(),
+    )
+    if wait:
+        return rejected(429, wait, f"Trop d'échecs, réessayez dans {math.ceil(wait)} s")
+    return None
+
+
+def record_failure(name, key):
+    """Débite d'un jeton le seau d'échecs `key` de ADMISSION_LIMITS[name]"""
+    limits = _limits(name)
+    if limits is not None:
+        take_tokens(
+            f'admission:{name}:{key}', 1, limits['rate'], limits.get('per', 60), limits.get('burst', limits['rate']),
+        )
+
+
+def rejected(status, retry_after, message):
+    response = JsonResponse({'error': message}, status=status)
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _admit(name, limits, request, cost, keys):
+    """(réponse de rejet ou None si la requête est admise, place réservée à rendre ou None)"""
+    cost = cost(request) if callable(cost) else cost
+    if 'rate' in limits:
+        for key in keys(request):
+            wait = take_tokens(
+                f'admission:{name}:{key}', cost,
+                limits['rate'], limits.get('per', 60), limits.get('burst', limits['rate']),
+            )
+            if wait:
+                return rejected(429, wait, f"Trop de requêtes, réessayez dans {math.ceil(wait)} s"), None
+    slot = None
+    if 'concurrency' in limits:
+        slot = acquire_slot(f'admission:{name}:slot', limits['concurrency'])
+        if slot is None:
+            return rejected(503, getattr(settings, 'ADMISSION_RETRY_AFTER', 1), "Service surchargé, réessayez plus tard"), None
+    return None, slot
+
+
+def admission(name, cost=1, keys=None):
+    """
+    Décorateur de vue (synchrone ou asynchrone) appliquant ADMISSION_LIMITS[name].
+    `cost` : jetons consommés par requête, ou fonction request -> coût (0 : non limitée).
+    `keys` : fonction request -> seaux à débiter (par défaut [client_key(request)]).
+    Sous @api_view, pour que client_key voie l'utilisateur authentifié par DRF.
+    """
+    keys = keys or (lambda request: [client_key(request)])
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                limits = _limits(name)
+                if limits is None:
+                    return await view(request, *args, **kwargs)
+                response, slot = _admit(name, limits, request, cost, keys)
+                if response is not None:
+                    return response
+                try:
+                    return await view(request, *args, **kwargs)
+                finally:
+                    if slot is not None:
+                        release_slot(slot)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                limits = _limits(name)
+                if limits is None:
+                    return view(request, *args, **kwargs)
+                response, slot = _admit(name, limits, request, cost, keys)
+                if response is not None:
+                    return response
+                try:
+                    return view(request, *args, **kwargs)
+                finally:
+                    if slot is not None:
+                        release_slot(slot)
+        return wrapper
+    return decorator
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_counters(app_configs, **kwargs):
+    alias = getattr(settings, 'ADMISSION_CACHE_ALIAS', 'default')
+    if not getattr(settings, 'ADMISSION_CONTROL', True) or not is_process_local(alias):
+        return []
+    return [Warning(
+        f"ADMISSION_CACHE_ALIAS ('{alias}') est un cache propre à chaque processus : avec N workers, "
+        "les limites de débit et de concurrence sont multipliées par N.",
+        hint="Pointer ADMISSION_CACHE_ALIAS vers un cache partagé (Memcached, Redis).",
+        id='gestionAPI.W001',
+    )]
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gestionAPI.settings')
+# Active les flux SSE et désactive les connexions persistantes (voir settings.SERVE_ASGI)
+os.environ.setdefault('DJANGO_ASGI', '1')
 
 application = get_asgi_application()
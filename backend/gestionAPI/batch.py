@@ -0,0 +1,55 @@
+import re
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+
+# Plus grand id stocké (BigAutoField) : au-delà, SQLite lève OverflowError
+MAX_ID = 2 ** 63 - 1
+_digits = re.compile(r'\d{1,19}', re.ASCII)
+
+
+def to_id(text):
+    """Entier positif tenant dans un BigInteger, ou None (chiffres ASCII uniquement :
+    str.isdigit() accepte aussi « ² » ou « ٣ », que int() refuse ou convertit)"""
+    if not _digits.fullmatch(text):
+        return None
+    value = int(text)
+    return value if value <= MAX_ID else None
+
+
+def parse_ids(request, param='ids'):
+    """
+    Lit ?ids=1,2,3 : retourne (ids uniques dans l'ordre, réponse d'erreur ou None).
+    Le nombre d'ids est borné par BATCH_MAX_IDS.
+    """
+    raw = request.query_params.get(param, '')
+    max_ids = getattr(settings, 'BATCH_MAX_IDS', 100)
+    parts = [part.strip() for part in raw.split(',') if part.strip()]
+    values = [to_id(part) for part in parts]
+    for part, value in zip(parts, values):
+        if value is None:
+            return None, Response({'error': f'Identifiant invalide : {part}'}, status=status.HTTP_400_BAD_REQUEST)
+    ids = list(dict.fromkeys(values))
+    if not ids:
+        return None, Response({'error': f'Paramètre {param} requis (ex: ?{param}=1,2,3)'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(ids) > max_ids:
+        return None, Response({'error': f'{max_ids} identifiants maximum par requête'}, status=status.HTTP_400_BAD_REQUEST)
+    return ids, None
+
+
+def batch_response(ids, queryset, serializer_class, context, fallback=None):
+    """
+    Charge tous les objets avec un seul WHERE id IN (...) et retourne
+    {"results": {id: objet}, "errors": {id: message}}
+    Les ids absents de `queryset` sont cherchés dans `fallback` (ex: les archives), s'il est donné
+    """
+    found = queryset.in_bulk(ids)
+    missing = [pk for pk in ids if pk not in found]
+    if fallback is not None and missing:
+        found.update(fallback.in_bulk(missing))
+    serialized = serializer_class([found[pk] for pk in ids if pk in found], many=True, context=context).data
+    return Response({
+        'results': {str(item['id']): item for item in serialized},
+        'errors': {str(pk): 'Introuvable' for pk in ids if pk not in found},
+    })
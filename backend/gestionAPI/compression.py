@@ -0,0 +1,85 @@
+"""
+Compression des réponses : brotli (module `brotli` optionnel) ou gzip selon Accept-Encoding.
+
+Seules les réponses aux lectures (GET, HEAD) sont compressées : les réponses d'inscription
+et de connexion contiennent un token à côté de données choisies par le client (BREACH).
+Les réponses en streaming sont compressées paquet par paquet, sauf les flux SSE
+(text/event-stream) qui doivent partir sans délai.
+"""
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_accepts_br = re.compile(r'\bbr\b')
+_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+def choose_encoding(accept_encoding):
+    if brotli is not None and _accepts_br.search(accept_encoding):
+        return 'br'
+    if _accepts_gzip.search(accept_encoding):
+        return 'gzip'
+    return None
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4))
+    for item in sequence:
+        # flush() émet tout ce qui a été reçu : chaque paquet part sans attendre le suivant
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Équivalent de GZipMiddleware avec brotli en priorité quand le client l'accepte"""
+
+    def process_response(self, request, response):
+        if request.method not in ('GET', 'HEAD') or response.has_header('Content-Encoding'):
+            return response
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        if not response.streaming and len(response.content) < getattr(settings, 'COMPRESSION_MIN_LENGTH', 200):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                # Corps asynchrone : laissé tel quel plutôt que de le consommer en synchrone
+                return response
+            if encoding == 'br':
+                response.streaming_content = brotli_sequence(response.streaming_content)
+            else:
+                response.streaming_content = compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(
+                    response.content, quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4)
+                )
+            else:
+                compressed = compress_string(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # Le corps compressé n'est plus identique octet par octet : ETag fort -> faible
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
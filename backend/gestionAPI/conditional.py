@@ -0,0 +1,84 @@
+"""
+GET conditionnels (ETag / Last-Modified).
+Les validateurs sont calculés à partir de versions (voir searchAPI.versions) avant toute
+sérialisation : un client à jour reçoit un 304 vide. Les ETags sont faibles car certains
+champs très volatils (nombre de vues) ne font pas changer la version.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .response_cache import response_cache
+from .streaming import is_streaming
+
+
+def make_validators(versions, *extra):
+    """
+    ETag faible et date de dernière modification à partir d'un dict
+    {nom: (version, date)} renvoyé par searchAPI.versions.read().
+    """
+    parts = [f'{name}={value}' for name, (value, _) in sorted(versions.items())]
+    parts += [str(value) for value in extra]
+    etag = 'W/"%s"' % hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+    dates = [updated_at for _, updated_at in versions.values() if updated_at is not None]
+    return etag, max(dates) if dates else None
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def not_modified(request, etag, last_modified=None):
+    """Réponse 304 (ou 412) si les en-têtes conditionnels du client correspondent, sinon None"""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified is not None else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def cached_response(request, etag, last_modified, build):
+    """
+    Réponse construite par `build()` (qui retourne les données à rendre), servie depuis
+    le cache des réponses pour les lectures anonymes (en-tête X-Cache: HIT/MISS)
+    """
+    data, hit = response_cache.fetch(request, etag, build)
+    response = set_validators(Response(data), etag, last_modified)
+    if response_cache.is_cacheable(request):
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Pour les vues génériques de liste : get_validators() retourne (etag, last_modified)
+    et la réponse complète n'est construite que si le client n'est pas à jour.
+    Avec cache_responses = True, les lectures anonymes passent par le cache des réponses
+    (sauf en mode streaming, voir gestionAPI.streaming).
+    """
+    cache_responses = False
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        # Filtres validés avant le 304 (queryset paresseux, sans requête SQL) : des paramètres
+        # invalides reçoivent leur 400 même quand l'ETag du client correspond
+        self.filter_queryset(self.get_queryset())
+        etag, last_modified = self.get_validators()
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        if self.cache_responses and not is_streaming(request):
+            return cached_response(
+                request, etag, last_modified, lambda: super(ConditionalGetMixin, self).get(request, *args, **kwargs).data
+            )
+        return set_validators(super().get(request, *args, **kwargs), etag, last_modified)
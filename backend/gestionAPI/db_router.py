@@ -0,0 +1,116 @@
+"""
+Routage lecture / écriture entre la base principale ('default') et un réplica ('replica').
+
+Seules les requêtes HTTP sûres (GET, HEAD, OPTIONS) lisent sur le réplica ; tout le reste
+(écritures, commandes de gestion, threads d'arrière-plan) reste sur la base principale.
+Après une écriture, le client est « épinglé » sur la base principale pendant
+DATABASE_REPLICA_PIN_SECONDS pour relire ce qu'il vient d'écrire malgré le retard de
+réplication. L'épinglage est gardé dans le cache partagé, par token d'authentification
+et par adresse IP (juste après l'inscription, le client n'a pas encore de token).
+
+Sans alias 'replica' dans DATABASES, le routeur et le middleware ne font rien.
+"""
+import hashlib
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.decorators import sync_and_async_middleware
+
+REPLICA = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Vrai pendant le traitement d'une requête autorisée à lire sur le réplica
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def _pin_keys(request):
+    keys = []
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if authorization:
+        keys.append('db-pin:auth:' + hashlib.sha256(authorization.encode('utf-8')).hexdigest())
+    address = request.META.get('REMOTE_ADDR')
+    if address:
+        keys.append(f'db-pin:ip:{address}')
+    return keys
+
+
+def _cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def is_pinned(request):
+    keys = _pin_keys(request)
+    return bool(keys) and bool(_cache().get_many(keys))
+
+
+def pin(request):
+    """Force les lectures de ce client sur la base principale pendant la fenêtre d'épinglage"""
+    timeout = getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 5)
+    _cache().set_many({key: True for key in _pin_keys(request)}, timeout)
+
+
+class PrimaryReplicaRouter:
+    """Lectures sur le réplica quand la requête en cours l'autorise, écritures sur 'default'"""
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and replica_configured():
+            return REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mêmes données des deux côtés : les relations entre alias sont valides
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Le réplica reçoit le schéma par réplication (ou `manage.py sync_replica` en local)
+        return db != REPLICA
+
+
+def _route(request):
+    """Choisit la base des lectures de la requête ; retourne le jeton pour restaurer l'état"""
+    read_only = request.method in SAFE_METHODS
+    return _use_replica.set(read_only and not is_pinned(request))
+
+
+def _after(request, response):
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        pin(request)
+    return response
+
+
+@sync_and_async_middleware
+def ReplicaRoutingMiddleware(get_response):
+    """Active le réplica pour les lectures sûres et épingle les clients après une écriture"""
+    if not replica_configured():
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = _route(request)
+            try:
+                response = await get_response(request)
+            finally:
+                _use_replica.reset(token)
+            return _after(request, response)
+
+        markcoroutinefunction(middleware)
+    else:
+        def middleware(request):
+            token = _route(request)
+            try:
+                response = get_response(request)
+            finally:
+                _use_replica.reset(token)
+            return _after(request, response)
+
+    return middleware
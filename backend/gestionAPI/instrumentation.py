@@ -0,0 +1,153 @@
+"""
+Instrumentation SQL par requête (activée par SQL_INSTRUMENTATION).
+
+Pour chaque requête HTTP : nombre de requêtes SQL, temps total passé en base et
+empreintes des requêtes répétées. Les mesures sont renvoyées dans l'en-tête
+Server-Timing ; une requête lente est journalisée en JSON, et une même forme de
+requête exécutée plus de SQL_N_PLUS_ONE_THRESHOLD fois déclenche un avertissement
+nommant la vue (motif N+1 typique d'un serializer qui interroge la base par ligne).
+
+Désactivé, le middleware lève MiddlewareNotUsed et sort de la chaîne : aucun coût.
+Les requêtes exécutées pour la vue dans un autre thread sont comptées si ce thread
+travaille sous `instrumented(capture())` (voir searchAPI.views.global_search) ; celles
+du flux SSE ne le sont pas.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?|\d+)\s*,?)+\)', re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """Forme de la requête : littéraux et paramètres remplacés, listes IN (...) réduites"""
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """execute_wrapper qui cumule nombre, durée et empreintes des requêtes"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        # Partagé avec les threads de travail de la vue (voir instrumented)
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            shape = fingerprint(sql)
+            with self._lock:
+                self.duration += elapsed
+                self.count += 1
+                self.shapes[shape] += 1
+
+
+def capture():
+    """
+    Instrumentation active sur les connexions du thread appelant : execute_wrappers
+    (ce middleware) et journal des requêtes (DEBUG, CaptureQueriesContext des tests
+    et de benchmark_api), à réappliquer dans un thread de travail avec instrumented()
+    """
+    state = {}
+    for alias in connections:
+        connection = connections[alias]
+        log = connection.queries_log if connection.queries_logged else None
+        if connection.execute_wrappers or log is not None:
+            state[alias] = (list(connection.execute_wrappers), log)
+    return state
+
+
+@contextmanager
+def instrumented(state):
+    """Exécute le bloc avec l'instrumentation `state` du thread d'origine"""
+    with ExitStack() as stack:
+        for alias, (wrappers, log) in state.items():
+            connection = connections[alias]
+            for wrapper in wrappers:
+                stack.enter_context(connection.execute_wrapper(wrapper))
+            if log is not None:
+                stack.callback(_forward_log, connection, connection.force_debug_cursor, log)
+                connection.queries_log.clear()
+                connection.force_debug_cursor = True
+        yield
+
+
+def _forward_log(connection, force_debug_cursor, log):
+    # Requêtes du bloc recopiées dans le journal du thread d'origine
+    log.extend(connection.queries_log)
+    connection.queries_log.clear()
+    connection.force_debug_cursor = force_debug_cursor
+
+
+class SQLInstrumentationMiddleware:
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'SQL_N_PLUS_ONE_THRESHOLD', 10)
+        self.slow_ms = getattr(settings, 'SQL_SLOW_REQUEST_MS', 500)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        db_ms = recorder.duration * 1000
+        total_ms = total * 1000
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{recorder.count} SQL", app;dur={total_ms - db_ms:.1f}'
+        )
+
+        view = self.view_name(request)
+        repeated = {sql: n for sql, n in recorder.shapes.items() if n > self.threshold}
+        for sql, n in repeated.items():
+            logger.warning("N+1 probable dans %s : %d exécutions de %s", view, n, sql)
+
+        if total_ms >= self.slow_ms:
+            logger.warning("Requête lente %s", json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': view,
+                'status': response.status_code,
+                'duration_ms': round(total_ms, 1),
+                'db_ms': round(db_ms, 1),
+                'queries': recorder.count,
+                'repeated': repeated,
+            }, ensure_ascii=False))
+        return response
+
+    @staticmethod
+    def view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return request.path
+        return match.view_name or match._func_path
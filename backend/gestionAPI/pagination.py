@@ -0,0 +1,131 @@
+import base64
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination par curseur (keyset) sur plusieurs colonnes.
+    Le curseur encode les valeurs de tri de la dernière ligne renvoyée : la page
+    suivante est lue avec un WHERE sur ces valeurs au lieu d'un OFFSET, donc une
+    page profonde coûte autant que la première tant qu'un index couvre `ordering`.
+    `ordering` doit se terminer par une colonne unique (ex: '-id') pour être stable.
+    """
+    ordering = ('-id',)
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Curseur invalide'
+    base_url = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+        position = self.decode_cursor(request, queryset.model)
+        return self.paginate_from(queryset, position)
+
+    def paginate_first_page(self, queryset, request, url):
+        """
+        Première page d'un queryset embarqué dans une autre ressource : le curseur de la
+        requête est ignoré et le lien "next" pointe vers `url` (l'endpoint de la liste).
+        """
+        self.request = request
+        self.base_url = url
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+        return self.paginate_from(queryset, None)
+
+    def paginate_from(self, queryset, position):
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position))
+
+        # Une ligne de plus pour savoir s'il existe une page suivante
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_position_filter(self, position):
+        """
+        Construit la comparaison lexicographique (a, b, c) > (x, y, z) en OR de AND,
+        chaque colonne étant comparée selon son sens de tri.
+        """
+        clauses = []
+        for index, (name, descending) in enumerate(self.fields):
+            lookup = f'{name}__lt' if descending else f'{name}__gt'
+            equal = {field: position[i] for i, (field, _) in enumerate(self.fields[:index])}
+            clauses.append(Q(**equal, **{lookup: position[index]}))
+        return reduce(or_, clauses)
+
+    def encode_cursor(self, instance):
+        values = []
+        for name, _ in self.fields:
+            value = getattr(instance, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padding = '=' * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(encoded + padding))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError
+            return [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.request is None:
+            url = self.base_url
+        else:
+            url = self.request.build_absolute_uri(self.base_url)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
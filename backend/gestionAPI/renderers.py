@@ -0,0 +1,49 @@
+"""
+Rendu JSON rapide des réponses de l'API.
+
+orjson (optionnel) encode sans passer par des chaînes Python intermédiaires ; sans lui,
+ou quand une indentation est demandée (API navigable), le JSONRenderer de DRF est utilisé.
+Les deux produisent le même JSON compact en UTF-8.
+"""
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+# Échappés par DRF : ces séparateurs de ligne cassent le JSON inclus dans du JavaScript
+_LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+def _default(obj):
+    # Types inconnus d'orjson (Decimal, chaînes traduisibles, QuerySet...) : encodeur de DRF
+    return _encoder.default(obj)
+
+
+def dumps(data):
+    """Encode `data` en JSON compact (bytes UTF-8), avec orjson si disponible"""
+    if orjson is not None:
+        content = orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+    else:
+        content = json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    for separator, escaped in _LINE_SEPARATORS:
+        if separator in content:
+            content = content.replace(separator, escaped)
+    return content
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer de DRF encodé par orjson quand c'est possible"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
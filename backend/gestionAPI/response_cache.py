@@ -0,0 +1,117 @@
+"""
+Cache des réponses de lecture pour les visiteurs anonymes.
+
+Les clés contiennent l'URL complète et l'ETag calculé à partir des versions des
+ressources (voir searchAPI.versions) : une écriture change la version, donc la clé,
+et une réponse périmée n'est jamais resservie. Les anciennes entrées expirent
+simplement avec RESPONSE_CACHE_TIMEOUT.
+
+Une seule régénération par clé à la fois (single-flight) : dans le processus via des
+verrous, entre processus via un verrou posé dans le cache partagé ; les autres requêtes
+attendent brièvement le résultat au lieu de relancer les mêmes requêtes SQL.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+_MISSING = object()
+
+
+class ResponseCache:
+
+    def __init__(self, alias='default', timeout=300, lock_timeout=10, wait=2.0, stripes=64):
+        self.alias = alias
+        self.timeout = timeout
+        self.lock_timeout = lock_timeout
+        self.wait = wait
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, request, etag):
+        digest = hashlib.md5(request.build_absolute_uri().encode('utf-8')).hexdigest()
+        return f'response:{digest}:{etag}'
+
+    def is_cacheable(self, request):
+        # Uniquement les lectures anonymes : ni en-tête Authorization ni session authentifiée
+        user = getattr(request, 'user', None)
+        return (
+            getattr(settings, 'RESPONSE_CACHE_ENABLED', True)
+            and request.method in ('GET', 'HEAD')
+            and 'HTTP_AUTHORIZATION' not in request.META
+            and not (user is not None and user.is_authenticated)
+        )
+
+    def fetch(self, request, etag, build):
+        """
+        Retourne (données, trouvé_en_cache) pour cette requête et cette version.
+        `build` n'est appelé qu'en cas d'absence dans le cache.
+        """
+        if not self.is_cacheable(request):
+            return build(), False
+        key = self.make_key(request, etag)
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            self._count('hits')
+            return value, True
+
+        with self._locks[hash(key) % len(self._locks)]:
+            # Un autre thread a pu remplir l'entrée pendant l'attente du verrou
+            value = self.cache.get(key, _MISSING)
+            if value is not _MISSING:
+                self._count('coalesced')
+                return value, True
+
+            lock_key = key + ':lock'
+            if not self.cache.add(lock_key, 1, self.lock_timeout):
+                value = self._wait_for(key)
+                if value is not _MISSING:
+                    self._count('coalesced')
+                    return value, True
+            try:
+                value = build()
+                self.cache.set(key, value, self.timeout)
+            finally:
+                self.cache.delete(lock_key)
+        self._count('misses')
+        return value, False
+
+    def _wait_for(self, key):
+        """Attend qu'un autre processus remplisse l'entrée (au plus `wait` secondes)"""
+        deadline = time.monotonic() + self.wait
+        while time.monotonic() < deadline:
+            time.sleep(0.02)
+            value = self.cache.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+        return _MISSING
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self):
+        with self._stats_lock:
+            served = self.hits + self.coalesced
+            total = served + self.misses
+            return {
+                'hits': self.hits,
+                'coalesced': self.coalesced,
+                'misses': self.misses,
+                'hit_ratio': served / total if total else 0.0,
+            }
+
+
+response_cache = ResponseCache(
+    alias=getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default'),
+    timeout=getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300),
+)
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -33,6 +34,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'gestionAPI.instrumentation.SQLInstrumentationMiddleware',
+    'gestionAPI.db_router.ReplicaRoutingMiddleware',
+    'gestionAPI.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,13 +74,48 @@ WSGI_APPLICATION = 'gestionAPI.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# SQLite en mode WAL : les lecteurs ne bloquent plus l'écrivain (et inversement) ; les
+# transactions prennent le verrou d'écriture dès le début (IMMEDIATE) et attendent jusqu'à
+# `timeout` secondes un verrou occupé au lieu d'échouer avec "database is locked".
+# Servi en ASGI (uvicorn, daphne : gestionAPI/asgi.py pose DJANGO_ASGI=1), requis par les flux
+# de réponses en direct. Sous ASGI une connexion persistante n'est pas réutilisée d'une
+# requête asynchrone à l'autre et chaque flux ouvert en garderait une : CONN_MAX_AGE = 0
+SERVE_ASGI = os.environ.get('DJANGO_ASGI') == '1'
+DB_CONN_MAX_AGE = 0 if SERVE_ASGI else 60
+
+SQLITE_OPTIONS = {
+    'timeout': 20,
+    'transaction_mode': 'IMMEDIATE',
+    'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+        # Connexions persistantes sous WSGI, vérifiées avant réutilisation
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Réplica en lecture (voir gestionAPI.db_router) : chemin d'un second fichier SQLite, tenu à
+# jour en local par `manage.py sync_replica`. Pour PostgreSQL, déclarer un alias 'replica'
+# avec les paramètres du serveur secondaire.
+if os.environ.get('DJANGO_DB_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['DJANGO_DB_REPLICA'],
+        'OPTIONS': SQLITE_OPTIONS,
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['gestionAPI.db_router.PrimaryReplicaRouter']
+DATABASE_REPLICA_PIN_SECONDS = 5  # lectures sur la base principale après une écriture du client
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -118,6 +157,11 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Avatars : variantes WebP générées en arrière-plan (False pour traiter pendant la requête)
+AVATAR_SIZES = (48, 128, 512)
+AVATAR_PROCESSING_ASYNC = True
+AVATAR_WORKERS = 2
+
 # Custom User Model
 AUTH_USER_MODEL = 'authentificationAPI.User'
 
@@ -127,6 +171,116 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'authentificationAPI.authentication.CachedTokenAuthentication',
+    ],
+    # orjson si installé, sinon l'encodeur de DRF (voir gestionAPI.renderers)
+    'DEFAULT_RENDERER_CLASSES': [
+        'gestionAPI.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 }
+
+# Listes en streaming (?stream=true) : lignes lues, sérialisées et encodées par paquets
+STREAM_CHUNK_SIZE = 500
+
+# Compression des réponses aux lectures (brotli si le module est installé, sinon gzip)
+COMPRESSION_MIN_LENGTH = 200  # octets en dessous desquels une réponse part telle quelle
+COMPRESSION_BROTLI_QUALITY = 4  # 0-11 : au-delà de 5, le gain ne vaut plus le temps CPU
+
+# Recherche globale : délai maximum (secondes) de chaque source (topics, utilisateurs)
+# avant de renvoyer des résultats partiels
+SEARCH_SOURCE_TIMEOUT = 2.0
+SEARCH_WORKERS = 8  # threads partagés par les recherches en cours
+
+# Cache des résultats de recherche par requête normalisée (voir searchAPI.result_cache),
+# en mémoire de chaque processus ; les versions qui l'invalident sont dans SEARCH_CACHE_ALIAS,
+# à partager entre workers (Memcached, Redis) : le LocMemCache ne l'est pas
+SEARCH_CACHE_ENABLED = True
+SEARCH_CACHE_MAX_SIZE = 1000  # requêtes distinctes gardées par processus
+SEARCH_CACHE_TTL = 300  # secondes
+SEARCH_CACHE_ALIAS = 'default'
+
+# Autocomplétion (/search/suggest/) : index en mémoire des titres et pseudos
+SUGGEST_MAX_ITEMS = 100000  # topics et utilisateurs conservés par index (les plus récents)
+SUGGEST_TITLE_WORDS = 6  # un titre est trouvé par un préfixe de chacun de ses premiers mots
+SUGGEST_MAX_AGE = 300  # secondes avant reconstruction en arrière-plan
+SUGGEST_MAX_LIMIT = 20
+
+# Nombre maximum d'identifiants pour les endpoints batch (?ids=1,2,3)
+BATCH_MAX_IDS = 100
+
+# Cache en mémoire des tokens d'authentification (voir authentificationAPI.authentication)
+TOKEN_CACHE_MAX_SIZE = 10000
+TOKEN_CACHE_TTL = 300  # secondes
+
+# Pagination de la liste des topics (?page_size= borné par le maximum)
+TOPICS_PAGE_SIZE = 20
+TOPICS_MAX_PAGE_SIZE = 100
+# Pagination de la liste des membres
+USERS_PAGE_SIZE = 50
+USERS_MAX_PAGE_SIZE = 200
+# Pagination des réponses (la première page est incluse dans le détail d'un topic)
+REPLIES_PAGE_SIZE = 50
+REPLIES_MAX_PAGE_SIZE = 200
+
+# Compteur de vues des topics : cumulé en mémoire puis écrit par lots
+# (False pour revenir à une écriture à chaque lecture)
+TOPIC_VIEWS_BUFFERED = True
+TOPIC_VIEWS_FLUSH_INTERVAL = 5.0  # secondes entre deux écritures au maximum
+TOPIC_VIEWS_MAX_PENDING = 1000  # écriture anticipée au-delà de ce nombre de vues en attente
+
+# Flux de synchronisation /topics/changes/?since= (voir topicsAPI.changes)
+CHANGES_PAGE_SIZE = 500  # lignes du journal lues au plus par appel
+CHANGES_RETENTION_DAYS = 30  # purgées ensuite par manage.py prune_changes (jetons plus anciens : 410)
+
+# Archivage (manage.py archive_topics) : topics fermés sans activité depuis ce nombre de jours
+ARCHIVE_AFTER_DAYS = 180
+
+# Flux SSE /topics/<id>/stream/ : sous WSGI chaque flux ouvert bloquerait un thread de worker
+# pour toute sa durée ; servi seulement en ASGI (404 sinon, le frontend ne l'ouvre pas)
+REPLY_STREAM_ENABLED = SERVE_ASGI
+REPLY_STREAM_BROKER = 'topicsAPI.pubsub.InMemoryBroker'  # un seul processus ; à remplacer pour plusieurs workers
+REPLY_STREAM_QUEUE_SIZE = 100  # messages en attente par abonné avant déconnexion
+REPLY_STREAM_HEARTBEAT = 15  # secondes entre deux commentaires keep-alive
+REPLY_STREAM_BACKLOG = 500  # réponses manquées relues par requête lors d'une reprise
+
+# Cache partagé (réponses anonymes, statistiques). Pour plusieurs processus, utiliser
+# un backend commun, ex: 'django.core.cache.backends.redis.RedisCache' ou FileBasedCache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Cache des réponses de lecture anonymes (liste et détail des topics), indexé par version
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 300  # secondes
+
+# Contrôle d'admission de la connexion et de la recherche (voir gestionAPI.admission) :
+# requêtes simultanées au plus (503 au-delà) et seau à jetons par client (429 une fois vide).
+# Avec LocMemCache les compteurs sont propres à chaque processus (N workers : N fois les
+# limites) : en production, pointer ADMISSION_CACHE_ALIAS vers un cache partagé
+# (signalé par check --deploy)
+ADMISSION_CONTROL = True
+ADMISSION_CACHE_ALIAS = 'default'
+ADMISSION_LIMITS = {
+    # Un hachage de mot de passe occupe un worker environ 0,3 s
+    'login': {'concurrency': 4, 'rate': 10, 'per': 60, 'burst': 5},
+    # Échecs de connexion par adresse IP et compte visé : 5, puis un essai toutes les 3 minutes
+    'login_failures': {'rate': 1, 'per': 180, 'burst': 5},
+    # Chaque recherche occupe deux threads de SEARCH_WORKERS
+    'search': {'concurrency': 4, 'rate': 60, 'per': 60, 'burst': 20},
+}
+ADMISSION_SLOT_TIMEOUT = 60  # secondes avant qu'une place perdue (worker tué) soit rendue ; > requête la plus lente
+ADMISSION_RETRY_AFTER = 1  # Retry-After (secondes) d'un endpoint saturé
+
+# Instrumentation SQL par requête (en-tête Server-Timing, journal des requêtes lentes et
+# des motifs N+1) ; désactivée, le middleware est retiré de la chaîne au démarrage
+SQL_INSTRUMENTATION = False
+SQL_N_PLUS_ONE_THRESHOLD = 10  # exécutions d'une même forme de requête avant avertissement
+SQL_SLOW_REQUEST_MS = 500
+
+# Durée de cache (secondes) des statistiques du forum, vidé à chaque écriture dans ce processus
+FORUM_STATS_CACHE_TIMEOUT = 60
@@ -0,0 +1,52 @@
+"""
+Mode streaming des listes (?stream=true) : toute la liste filtrée, dans l'ordre de la
+pagination, en une seule réponse {"next": null, "results": [...]}.
+
+Les lignes sont lues par un itérateur côté serveur, sérialisées et encodées par paquets
+de STREAM_CHUNK_SIZE : la mémoire reste bornée quelle que soit la taille de la liste et
+le premier paquet part avant la fin de la lecture.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from .renderers import dumps
+
+TRUE_VALUES = ('1', 'true')
+
+
+def is_streaming(request):
+    return request.method == 'GET' and request.GET.get('stream', '').lower() in TRUE_VALUES
+
+
+def encode_rows(queryset, serializer_class, context, chunk_size):
+    """Corps JSON produit paquet par paquet à partir de `queryset`"""
+    yield b'{"next":null,"results":['
+    rows = queryset.iterator(chunk_size=chunk_size)
+    separator = b''
+    while chunk := list(islice(rows, chunk_size)):
+        # Liste encodée d'un bloc puis débarrassée de ses crochets pour être concaténée
+        yield separator + dumps(serializer_class(chunk, many=True, context=context).data)[1:-1]
+        separator = b','
+    yield b']}'
+
+
+class StreamingListMixin:
+    """
+    Pour les vues génériques de liste paginées par KeysetPagination : ?stream=true renvoie
+    la liste complète en streaming, triée comme les pages.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not is_streaming(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset()).order_by(*self.pagination_class.ordering)
+        # La base est choisie maintenant : le corps est lu après la sortie des middlewares
+        # (voir gestionAPI.db_router)
+        queryset = queryset.using(queryset.db)
+        chunk_size = getattr(settings, 'STREAM_CHUNK_SIZE', 500)
+        return StreamingHttpResponse(
+            encode_rows(queryset, self.get_serializer_class(), self.get_serializer_context(), chunk_size),
+            content_type='application/json',
+        )
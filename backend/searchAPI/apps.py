@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SearchapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'searchAPI'
+
+    def ready(self):
+        from . import signals  # noqa: F401
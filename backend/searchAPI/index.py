@@ -0,0 +1,144 @@
+"""
+Index plein texte du forum, basé sur les tables virtuelles FTS5 de SQLite.
+
+Une table par type de document, dont le rowid est la clé primaire de l'objet indexé :
+    search_topic(title, content)
+    search_reply(content, topic_id non indexé)
+    search_user(username, first_name, last_name, bio)
+Les résultats sont classés par BM25 (colonnes pondérées, le titre compte plus que le corps).
+Les tables sont tenues à jour par les signaux de searchAPI.signals et reconstruites par
+`manage.py rebuild_search_index`. Sur un autre moteur que SQLite, is_available() est faux
+et la recherche retombe sur des filtres icontains.
+"""
+import re
+
+from django.db import connection
+
+# Tokenizer unicode61 : insensible à la casse et aux accents
+TOKENIZE = "tokenize='unicode61 remove_diacritics 2'"
+
+TABLES = {
+    'search_topic': ('title', 'content'),
+    'search_reply': ('content', 'topic_id UNINDEXED'),
+    'search_user': ('username', 'first_name', 'last_name', 'bio'),
+}
+
+# Poids BM25 par colonne, dans l'ordre des colonnes de TABLES
+WEIGHTS = {
+    'search_topic': (10.0, 1.0),
+    'search_reply': (1.0, 0.0),
+    'search_user': (10.0, 5.0, 5.0, 1.0),
+}
+
+# Une correspondance dans une réponse pèse moins qu'une correspondance dans le topic lui-même
+REPLY_RANK_FACTOR = 0.5
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_available(using=None):
+    return (using or connection).vendor == 'sqlite'
+
+
+def create_tables(cursor):
+    for table, columns in TABLES.items():
+        cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({', '.join(columns)}, {TOKENIZE})")
+
+
+def drop_tables(cursor):
+    for table in TABLES:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def build_match_query(query):
+    """
+    Transforme la saisie utilisateur en requête FTS5 : chaque mot est mis entre guillemets
+    (aucun opérateur FTS5 ne passe), tous les mots sont requis, et le dernier est traité
+    comme un préfixe pour la recherche au fil de la frappe.
+    """
+    words = WORD_RE.findall(query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _row(obj, fields):
+    return [obj.pk] + [getattr(obj, field) or '' for field in fields]
+
+
+def _upsert(table, rows):
+    columns = [column.split()[0] for column in TABLES[table]]
+    placeholders = ', '.join(['%s'] * (len(columns) + 1))
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {table} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {table}(rowid, {', '.join(columns)}) VALUES ({placeholders})", rows
+        )
+
+
+def index_topics(topics):
+    _upsert('search_topic', [_row(topic, ('title', 'content')) for topic in topics])
+
+
+def index_replies(replies):
+    _upsert('search_reply', [_row(reply, ('content', 'topic_id')) for reply in replies])
+
+
+def index_users(users):
+    _upsert('search_user', [_row(user, ('username', 'first_name', 'last_name', 'bio')) for user in users])
+
+
+def remove(table, pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [pk])
+
+
+def remove_many(table, pks):
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {table} WHERE rowid = %s", [(pk,) for pk in pks])
+
+
+def clear():
+    with connection.cursor() as cursor:
+        for table in TABLES:
+            cursor.execute(f"DELETE FROM {table}")
+
+
+def _ranked(table, match, limit, select='rowid'):
+    weights = ', '.join(str(weight) for weight in WEIGHTS[table])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {select}, bm25({table}, {weights}) AS score FROM {table} "
+            f"WHERE {table} MATCH %s ORDER BY score LIMIT %s",
+            [match, limit],
+        )
+        return cursor.fetchall()
+
+
+def search_topics(query, limit=20):
+    """
+    Retourne les ids de topics classés par pertinence (meilleur en premier),
+    en combinant les correspondances sur le topic et sur ses réponses.
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+    # bm25() est négatif : plus le score est bas, plus le document est pertinent
+    scores = {}
+    for topic_id, score in _ranked('search_topic', match, limit):
+        scores[topic_id] = score
+    for topic_id, score in _ranked('search_reply', match, limit * 5, select='CAST(topic_id AS INTEGER)'):
+        score *= REPLY_RANK_FACTOR
+        if score < scores.get(topic_id, 0):
+            scores[topic_id] = score
+    return sorted(scores, key=scores.get)[:limit]
+
+
+def search_users(query, limit=20):
+    """Retourne les ids d'utilisateurs classés par pertinence"""
+    match = build_match_query(query)
+    if match is None:
+        return []
+    return [user_id for user_id, _ in _ranked('search_user', match, limit)]
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from authentificationAPI.models import User
+from searchAPI import index
+from topicsAPI.models import Topic, Reply
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index plein texte (topics, réponses, utilisateurs)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help="Nombre d'objets indexés par lot")
+
+    def handle(self, *args, **options):
+        if not index.is_available():
+            raise CommandError("L'index plein texte nécessite SQLite (FTS5)")
+        batch_size = options['batch_size']
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                index.drop_tables(cursor)
+                index.create_tables(cursor)
+            sources = [
+                ('topics', Topic.objects.only('title', 'content'), index.index_topics),
+                ('réponses', Reply.objects.only('content', 'topic_id'), index.index_replies),
+                ('utilisateurs', User.objects.only('username', 'first_name', 'last_name', 'bio'), index.index_users),
+            ]
+            for label, queryset, add in sources:
+                count = 0
+                batch = []
+                for obj in queryset.order_by().iterator(chunk_size=batch_size):
+                    batch.append(obj)
+                    if len(batch) >= batch_size:
+                        add(batch)
+                        count += len(batch)
+                        batch = []
+                if batch:
+                    add(batch)
+                    count += len(batch)
+                self.stdout.write(f"{label} : {count} indexé(s)")
+
+        with connection.cursor() as cursor:
+            for table in index.TABLES:
+                cursor.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+        self.stdout.write(self.style.SUCCESS("Index de recherche reconstruit"))
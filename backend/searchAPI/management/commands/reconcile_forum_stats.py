@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from searchAPI import stats
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de statistiques du forum et corrige les écarts"
+
+    def handle(self, *args, **options):
+        drift = stats.reconcile()
+        for name, (stored, actual) in drift.items():
+            self.stdout.write(f"{name} : {stored} -> {actual}")
+        self.stdout.write(self.style.SUCCESS(f"Compteurs vérifiés, {len(drift)} corrigé(s)"))
@@ -0,0 +1,64 @@
+from django.db import migrations
+
+# Schéma figé à la création de l'index, indépendant des évolutions de searchAPI.index
+# (tokenizer unicode61 : insensible à la casse et aux accents)
+CREATE_TABLES = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_topic USING fts5("
+    "title, content, tokenize='unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_reply USING fts5("
+    "content, topic_id UNINDEXED, tokenize='unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_user USING fts5("
+    "username, first_name, last_name, bio, tokenize='unicode61 remove_diacritics 2')",
+]
+DROP_TABLES = [
+    "DROP TABLE IF EXISTS search_topic",
+    "DROP TABLE IF EXISTS search_reply",
+    "DROP TABLE IF EXISTS search_user",
+]
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 n'existe que sous SQLite : ailleurs la recherche retombe sur icontains
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Topic = apps.get_model('topicsAPI', 'Topic')
+    Reply = apps.get_model('topicsAPI', 'Reply')
+    User = apps.get_model('authentificationAPI', 'User')
+    with schema_editor.connection.cursor() as cursor:
+        for statement in CREATE_TABLES:
+            cursor.execute(statement)
+        # Indexation initiale des données existantes, directement en SQL
+        cursor.execute(
+            f"INSERT INTO search_topic(rowid, title, content) "
+            f"SELECT id, title, content FROM {Topic._meta.db_table}"
+        )
+        cursor.execute(
+            f"INSERT INTO search_reply(rowid, content, topic_id) "
+            f"SELECT id, content, topic_id FROM {Reply._meta.db_table}"
+        )
+        cursor.execute(
+            f"INSERT INTO search_user(rowid, username, first_name, last_name, bio) "
+            f"SELECT id, username, first_name, last_name, COALESCE(bio, '') FROM {User._meta.db_table}"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in DROP_TABLES:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('authentificationAPI', '0001_initial'),
+        ('topicsAPI', '0003_topic_reply_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:23
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    ForumCounter = apps.get_model('searchAPI', 'ForumCounter')
+    counted = {
+        'total_users': apps.get_model('authentificationAPI', 'User'),
+        'total_topics': apps.get_model('topicsAPI', 'Topic'),
+        'total_replies': apps.get_model('topicsAPI', 'Reply'),
+    }
+    ForumCounter.objects.bulk_create([
+        ForumCounter(name=name, value=model.objects.count()) for name, model in counted.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('searchAPI', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForumCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Nom')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Valeur')),
+            ],
+            options={
+                'verbose_name': 'Compteur',
+                'verbose_name_plural': 'Compteurs',
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('searchAPI', '0002_forumcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumcounter',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Date de modification'),
+            preserve_default=False,
+        ),
+    ]
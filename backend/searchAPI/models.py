@@ -1,3 +1,18 @@
 from django.db import models
 
-# Create your models here.
+
+class ForumCounter(models.Model):
+    """
+    Compteur nommé, tenu à jour par signaux : statistiques du forum (total_users, ...)
+    et numéros de version des ressources (version:topics, version:topic:<id>, ...)
+    """
+    name = models.CharField(max_length=50, primary_key=True, verbose_name="Nom")
+    value = models.BigIntegerField(default=0, verbose_name="Valeur")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de modification")
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+    class Meta:
+        verbose_name = "Compteur"
+        verbose_name_plural = "Compteurs"
@@ -0,0 +1,95 @@
+"""
+Cache des résultats de la recherche globale (/search/?q=).
+
+Les résultats sérialisés de chaque source (topics, utilisateurs) sont gardés en mémoire du
+processus (LRU borné avec expiration, voir gestionAPI.lru) sous une clé faite de la requête
+normalisée (casse, accents et espaces, comme l'index plein texte qui les ignore aussi), de
+l'hôte (les URLs d'avatar sont absolues) et de la version de la source. Une écriture
+incrémente après commit la version des seules sources qu'elle modifie : une réponse
+n'invalide que les résultats de topics, les recherches d'utilisateurs restent en cache.
+Les anciennes entrées ne sont plus jamais lues et sortent du LRU par éviction ou expiration.
+
+Les versions vivent dans SEARCH_CACHE_ALIAS. Avec le LocMemCache par défaut elles sont
+propres à chaque processus : derrière plusieurs workers, une écriture n'invalide que le
+cache du worker qui l'a traitée et les autres servent l'ancien résultat jusqu'à
+SEARCH_CACHE_TTL. Pointer l'alias vers un cache partagé (Memcached, Redis) pour que tous
+les processus voient les versions ; `manage.py check --deploy` le signale.
+Une recherche servie depuis le cache ne fait aucune requête SQL.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Tags, Warning, register
+
+from gestionAPI.admission import is_process_local
+from gestionAPI.lru import LRUCache
+from .suggest import normalize
+
+VERSION_KEY = 'search-results:version:{}'
+SOURCES = ('topics', 'users')
+
+
+class SearchResultCache:
+
+    def __init__(self, max_size=1000, ttl=300, alias='default'):
+        self.entries = {source: LRUCache(max_size=max_size, ttl=ttl) for source in SOURCES}
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def version(self, source):
+        key = VERSION_KEY.format(source)
+        version = self.cache.get(key)
+        if version is None:
+            # Version absente (démarrage, éviction) : une valeur neuve, qui ne retrouve
+            # aucune entrée calculée avant sa disparition
+            self.cache.add(key, time.time_ns(), None)
+            version = self.cache.get(key)
+        return version
+
+    def bump(self, *sources):
+        """Invalide les résultats des sources données (toutes par défaut)"""
+        for source in sources or SOURCES:
+            key = VERSION_KEY.format(source)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.add(key, time.time_ns(), None)
+
+    def make_key(self, request, source, query):
+        return (request.scheme, request.get_host(), self.version(source), normalize(query))
+
+    def get(self, source, key):
+        return self.entries[source].get(key)
+
+    def set(self, source, key, results):
+        self.entries[source].set(key, results)
+
+    def stats(self):
+        """Statistiques du LRU de chaque source, dont le taux de succès (hit_ratio)"""
+        return {source: entries.stats() for source, entries in self.entries.items()}
+
+
+search_results = SearchResultCache(
+    max_size=getattr(settings, 'SEARCH_CACHE_MAX_SIZE', 1000),
+    ttl=getattr(settings, 'SEARCH_CACHE_TTL', 300),
+    alias=getattr(settings, 'SEARCH_CACHE_ALIAS', 'default'),
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_versions(app_configs, **kwargs):
+    if not getattr(settings, 'SEARCH_CACHE_ENABLED', True):
+        return []
+    alias = getattr(settings, 'SEARCH_CACHE_ALIAS', 'default')
+    if not is_process_local(alias):
+        return []
+    return [Warning(
+        f"SEARCH_CACHE_ALIAS ('{alias}') est un cache propre à chaque processus : avec plusieurs "
+        "workers, une écriture n'invalide pas les résultats de recherche mis en cache par les autres.",
+        hint="Pointer SEARCH_CACHE_ALIAS vers un cache partagé (Memcached, Redis) ou désactiver SEARCH_CACHE_ENABLED.",
+        id='searchAPI.W001',
+    )]
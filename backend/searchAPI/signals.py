@@ -0,0 +1,104 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from authentificationAPI.models import User
+from topicsAPI import changes
+from topicsAPI.models import Topic, Reply, Change
+from . import index, stats, versions
+from .result_cache import search_results
+from .suggest import suggestions
+
+
+# Les écritures dans l'index, les compteurs et les versions se font dans la même
+# transaction que l'objet : un rollback les annule aussi. L'autocomplétion, en mémoire,
+# et la version du cache des résultats de recherche ne changent qu'après commit
+# (avant, une recherche concurrente remettrait en cache l'état d'avant l'écriture).
+# Le journal /topics/changes/ est écrit ici aussi : les suppressions en cascade et les
+# écritures de l'admin ou de l'ORM y laissent leur ligne.
+
+def invalidate_search_results(*sources):
+    transaction.on_commit(lambda: search_results.bump(*sources))
+
+def update_suggestions(suggest_index, pk, label=None):
+    if suggestions.built_at is None:
+        return  # pas encore construit : la construction lira la base
+    if label is None:
+        transaction.on_commit(lambda: suggest_index.remove(pk))
+    else:
+        transaction.on_commit(lambda: suggest_index.add(pk, label))
+
+
+@receiver(post_save, sender=Topic)
+def topic_saved(sender, instance, created=False, raw=False, **kwargs):
+    if created:
+        stats.increment('total_topics')
+        # nombre_posts de l'auteur change, dans ses résultats de recherche aussi
+        versions.bump(versions.user(instance.author_id))
+        invalidate_search_results('users')
+    invalidate_search_results('topics')
+    versions.bump(versions.TOPICS, versions.topic(instance.pk))
+    changes.record(Change.TOPIC, instance.pk, instance.pk)
+    if index.is_available() and not raw:
+        index.index_topics([instance])
+    update_suggestions(suggestions.topics, instance.pk, instance.title)
+
+
+@receiver(post_save, sender=Reply)
+def reply_saved(sender, instance, created=False, raw=False, **kwargs):
+    if created:
+        stats.increment('total_replies')
+    versions.bump(versions.TOPICS, versions.topic(instance.topic_id))
+    # Les recherches d'utilisateurs ne dépendent pas des réponses et restent en cache
+    invalidate_search_results('topics')
+    changes.record(Change.REPLY, instance.pk, instance.topic_id)
+    if index.is_available() and not raw:
+        index.index_replies([instance])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if created:
+        stats.increment('total_users')
+    # La connexion met seulement last_login à jour : rien à réindexer
+    if update_fields is not None and set(update_fields) <= {'last_login', 'nombre_posts'}:
+        return
+    versions.bump(versions.USERS, versions.user(instance.pk))
+    # Toutes les sources : les résultats de topics affichent le pseudo de l'auteur
+    invalidate_search_results()
+    if index.is_available() and not raw:
+        index.index_users([instance])
+    update_suggestions(suggestions.users, instance.pk, instance.username)
+
+
+@receiver(post_delete, sender=Topic)
+def topic_deleted(sender, instance, **kwargs):
+    stats.increment('total_topics', -1)
+    versions.bump(versions.TOPICS, versions.user(instance.author_id))
+    versions.forget(versions.topic(instance.pk))
+    invalidate_search_results('topics', 'users')
+    changes.record(Change.TOPIC, instance.pk, instance.pk, Change.DELETED)
+    if index.is_available():
+        index.remove('search_topic', instance.pk)
+    update_suggestions(suggestions.topics, instance.pk)
+
+
+@receiver(post_delete, sender=Reply)
+def reply_deleted(sender, instance, **kwargs):
+    stats.increment('total_replies', -1)
+    versions.bump(versions.TOPICS, versions.topic(instance.topic_id))
+    invalidate_search_results('topics')
+    changes.record(Change.REPLY, instance.pk, instance.topic_id, Change.DELETED)
+    if index.is_available():
+        index.remove('search_reply', instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    stats.increment('total_users', -1)
+    versions.bump(versions.USERS)
+    versions.forget(versions.user(instance.pk))
+    invalidate_search_results()
+    if index.is_available():
+        index.remove('search_user', instance.pk)
+    update_suggestions(suggestions.users, instance.pk)
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from authentificationAPI.models import User
+from topicsAPI.models import Topic, Reply, ArchivedTopic, ArchivedReply
+from .models import ForumCounter
+
+CACHE_KEY = 'forum_stats'
+
+# Compteur -> modèles comptés (les archives comptent : voir topicsAPI.archive)
+COUNTERS = {
+    'total_users': (User,),
+    'total_topics': (Topic, ArchivedTopic),
+    'total_replies': (Reply, ArchivedReply),
+}
+
+
+def increment(name, delta=1):
+    """Incrémente un compteur dans la transaction courante ; le cache est vidé au commit"""
+    ForumCounter.objects.filter(name=name).update(value=F('value') + delta)
+    transaction.on_commit(lambda: cache.delete(CACHE_KEY))
+
+
+def get_stats():
+    """Lecture des compteurs : depuis le cache, sinon une requête sur la clé primaire"""
+    stats = cache.get(CACHE_KEY)
+    if stats is None:
+        stats = dict.fromkeys(COUNTERS, 0)
+        stats.update(ForumCounter.objects.filter(name__in=COUNTERS).values_list('name', 'value'))
+        cache.set(CACHE_KEY, stats, getattr(settings, 'FORUM_STATS_CACHE_TIMEOUT', 60))
+    return stats
+
+
+def reconcile():
+    """
+    Recalcule chaque compteur avec un COUNT(*) et corrige les écarts.
+    Retourne {nom: (valeur stockée, valeur réelle)} pour les compteurs corrigés.
+    """
+    drift = {}
+    with transaction.atomic():
+        for name, models in COUNTERS.items():
+            actual = sum(model.objects.count() for model in models)
+            counter, _ = ForumCounter.objects.select_for_update().get_or_create(name=name)
+            if counter.value != actual:
+                drift[name] = (counter.value, actual)
+                counter.value = actual
+                counter.save(update_fields=['value'])
+    cache.delete(CACHE_KEY)
+    return drift
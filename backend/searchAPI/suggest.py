@@ -0,0 +1,153 @@
+"""
+Index de préfixes en mémoire pour l'autocomplétion (titres de topics, pseudos).
+
+Chaque index est un tableau trié de clés normalisées (minuscules, sans accents) parcouru
+par bisect : une suggestion coûte une recherche dichotomique et quelques comparaisons,
+sans requête SQL. Un titre est indexé à partir de chacun de ses premiers mots, pour que
+« dja » propose « Aide Django ». La taille est bornée par SUGGEST_MAX_ITEMS ; au-delà,
+les éléments les plus anciens sont évincés.
+
+Les index sont construits au premier appel (pas de requête SQL pendant le démarrage de
+Django), mis à jour par les signaux de searchAPI.signals après commit, et reconstruits en
+arrière-plan après SUGGEST_MAX_AGE secondes pour rattraper les écritures des autres
+processus.
+"""
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connection
+
+from authentificationAPI.models import User
+from topicsAPI.models import Topic
+
+
+def normalize(text):
+    """Minuscules sans accents ni espaces superflus : « Éléphant  Rose » -> « elephant rose »"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+class PrefixIndex:
+    """
+    Tableau trié de (clé, pk) + libellé et clés de chaque pk.
+    Les ajouts et suppressions sont en O(n) (insertion dans une liste) mais restent rapides
+    pour quelques centaines de milliers de clés ; la lecture est en O(log n + résultats).
+    """
+
+    def __init__(self, max_items, words_per_item=1):
+        self.max_items = max_items
+        self.words_per_item = words_per_item
+        self._keys = []
+        # pk -> (libellé, clés) ; l'ordre d'insertion sert à évincer les plus anciens
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def keys_for(self, label):
+        words = normalize(label).split(' ')
+        return [' '.join(words[i:]) for i in range(min(len(words), self.words_per_item)) if words[i]]
+
+    def load(self, items):
+        """Remplace le contenu par `items` : itérable de (pk, libellé), du plus ancien au plus récent"""
+        entries = {}
+        for pk, label in items:
+            entries.pop(pk, None)
+            entries[pk] = (label, self.keys_for(label))
+            if len(entries) > self.max_items:
+                del entries[next(iter(entries))]
+        keys = sorted((key, pk) for pk, (_, item_keys) in entries.items() for key in item_keys)
+        with self._lock:
+            self._items = entries
+            self._keys = keys
+
+    def add(self, pk, label):
+        with self._lock:
+            self._discard(pk)
+            keys = self.keys_for(label)
+            self._items[pk] = (label, keys)
+            for key in keys:
+                insort(self._keys, (key, pk))
+            while len(self._items) > self.max_items:
+                self._discard(next(iter(self._items)))
+
+    def remove(self, pk):
+        with self._lock:
+            self._discard(pk)
+
+    def _discard(self, pk):
+        entry = self._items.pop(pk, None)
+        if entry is None:
+            return
+        for key in entry[1]:
+            position = bisect_left(self._keys, (key, pk))
+            if position < len(self._keys) and self._keys[position] == (key, pk):
+                del self._keys[position]
+
+    def search(self, prefix, limit=10):
+        """[(pk, libellé)] dont une clé commence par `prefix` normalisé, par ordre alphabétique"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        with self._lock:
+            position = bisect_left(self._keys, (prefix,))
+            while position < len(self._keys) and len(results) < limit:
+                key, pk = self._keys[position]
+                if not key.startswith(prefix):
+                    break
+                if pk not in seen:
+                    seen.add(pk)
+                    results.append((pk, self._items[pk][0]))
+                position += 1
+        return results
+
+    def __len__(self):
+        return len(self._items)
+
+
+class Suggestions:
+    """Les deux index d'autocomplétion et leur (re)construction depuis la base"""
+
+    def __init__(self):
+        max_items = getattr(settings, 'SUGGEST_MAX_ITEMS', 100000)
+        self.max_age = getattr(settings, 'SUGGEST_MAX_AGE', 300)
+        self.topics = PrefixIndex(max_items, words_per_item=getattr(settings, 'SUGGEST_TITLE_WORDS', 6))
+        self.users = PrefixIndex(max_items)
+        self.built_at = None
+        self._build_lock = threading.Lock()
+        self._refreshing = False
+
+    def build(self):
+        max_items = self.topics.max_items
+        # Les plus récents sont conservés ; chargés du plus ancien au plus récent
+        topics = Topic.objects.order_by('-created_at', '-id').values_list('id', 'title')[:max_items]
+        users = User.objects.order_by('-date_inscription', '-id').values_list('id', 'username')[:max_items]
+        self.topics.load(reversed(list(topics)))
+        self.users.load(reversed(list(users)))
+        self.built_at = time.monotonic()
+
+    def ensure_built(self):
+        if self.built_at is None:
+            with self._build_lock:
+                if self.built_at is None:
+                    self.build()
+        elif time.monotonic() - self.built_at > self.max_age and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._refresh, daemon=True, name='suggest-refresh').start()
+
+    def _refresh(self):
+        try:
+            self.build()
+        finally:
+            self._refreshing = False
+            connection.close()
+
+    def reset(self):
+        self.built_at = None
+
+
+suggestions = Suggestions()
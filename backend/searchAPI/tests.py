@@ -1,3 +1,210 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from authentificationAPI.models import User
+from topicsAPI.models import Topic, Reply
+from . import stats
+from .result_cache import check_shared_versions, search_results
+from .suggest import PrefixIndex, normalize, suggestions
+
+
+# Les recherches tournent dans des threads avec leur propre connexion : TransactionTestCase
+# pour que les données soient validées et visibles de ces connexions
+@override_settings(ADMISSION_CONTROL=False, SEARCH_CACHE_ENABLED=False)
+class GlobalSearchTests(TransactionTestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='alice', email='alice@example.com', password='secret-password')
+        self.topic = Topic.objects.create(title='Django et SQLite', content='Index plein texte', author=self.author)
+        self.client = APIClient()
+
+    def test_finds_topics_and_users(self):
+        response = self.client.get('/search/', {'q': 'django'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([topic['id'] for topic in response.data['topics']], [self.topic.pk])
+        self.assertEqual(self.client.get('/search/', {'q': 'alice'}).data['users'][0]['id'], self.author.pk)
+        self.assertFalse(response.data['partial'])
+
+    def test_goes_through_drf_rendering(self):
+        response = self.client.get('/search/', {'q': 'django'}, HTTP_ACCEPT='text/html')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+
+    def test_worker_queries_are_counted(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/search/', {'q': 'django'})
+        self.assertTrue(any('search_topic' in query['sql'] for query in queries.captured_queries))
+
+    @override_settings(SQL_INSTRUMENTATION=True)
+    def test_worker_queries_reach_server_timing(self):
+        response = APIClient().get('/search/', {'q': 'django'})
+        self.assertNotIn('desc="0 SQL"', response['Server-Timing'])
+
+
+@override_settings(ADMISSION_CONTROL=False, SEARCH_CACHE_ENABLED=True)
+class SearchResultCacheTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        for entries in search_results.entries.values():
+            entries.clear()
+        self.author = User.objects.create_user(username='alice', email='alice@example.com', password='secret-password')
+        self.topic = Topic.objects.create(title='Alice et Django', content='x', author=self.author)
+        self.client = APIClient()
+
+    def hits(self):
+        stats = search_results.stats()
+        return stats['users']['hits'], stats['topics']['hits']
+
+    def search(self):
+        response = self.client.get('/search/', {'q': 'alice'})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_repeated_search_is_served_from_cache(self):
+        self.assertEqual(self.search()['X-Cache'], 'MISS')
+        response = self.search()
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual([topic['id'] for topic in response.data['topics']], [self.topic.pk])
+
+    def test_reply_only_invalidates_topic_results(self):
+        self.search()
+        Reply.objects.create(topic=self.topic, author=self.author, content='Réponse')
+        users, topics = self.hits()
+        self.assertEqual(self.search()['X-Cache'], 'MISS')
+        self.assertEqual(self.hits(), (users + 1, topics))
+
+    def test_user_write_invalidates_every_source(self):
+        self.search()
+        self.author.bio = 'Nouvelle bio'
+        self.author.save()
+        hits = self.hits()
+        self.assertEqual(self.search()['X-Cache'], 'MISS')
+        self.assertEqual(self.hits(), hits)
+
+
+class SearchCacheCheckTests(SimpleTestCase):
+
+    def test_warns_when_versions_are_process_local(self):
+        self.assertEqual([error.id for error in check_shared_versions(None)], ['searchAPI.W001'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache'}})
+    def test_shared_backend_passes(self):
+        self.assertEqual(check_shared_versions(None), [])
+
+    @override_settings(SEARCH_CACHE_ENABLED=False)
+    def test_disabled_cache_passes(self):
+        self.assertEqual(check_shared_versions(None), [])
+
+
+class PrefixIndexTests(SimpleTestCase):
+
+    def test_normalize_folds_case_accents_and_spaces(self):
+        self.assertEqual(normalize('  Éléphant   ROSE '), 'elephant rose')
+        self.assertEqual(normalize('Ça ﬁle'), 'ca file')
+        self.assertEqual(normalize('Straße'), 'strasse')
+
+    def test_prefix_on_each_leading_word(self):
+        index = PrefixIndex(max_items=10, words_per_item=2)
+        index.load([(1, 'Aide Django'), (2, 'Django avancé'), (3, 'Python et Django')])
+        # Ordre alphabétique des clés : « django » (Aide Django) avant « django avance »
+        self.assertEqual(index.search('DJA'), [(1, 'Aide Django'), (2, 'Django avancé')])
+        self.assertEqual(index.search('django av'), [(2, 'Django avancé')])
+        self.assertEqual(index.search('avancé'), [(2, 'Django avancé')])
+        # Au-delà de words_per_item mots, le titre n'est plus trouvé par ce mot
+        self.assertEqual(index.search('et'), [(3, 'Python et Django')])
+        self.assertNotIn((3, 'Python et Django'), index.search('django'))
+        self.assertEqual(index.search('   '), [])
+
+    def test_limit_and_deduplication(self):
+        index = PrefixIndex(max_items=10, words_per_item=3)
+        index.load([(pk, f'sujet sujet {pk}') for pk in range(5)])
+        self.assertEqual([pk for pk, _ in index.search('suj', limit=3)], [0, 1, 2])
+        self.assertEqual(len(index.search('suj', limit=50)), 5)
+
+    def test_add_remove_and_eviction(self):
+        index = PrefixIndex(max_items=2)
+        index.load([(1, 'alice'), (2, 'albert')])
+        index.add(1, 'bob')
+        self.assertEqual(index.search('al'), [(2, 'albert')])
+        index.add(3, 'alain')
+        # Le plus ancien (albert) est évincé
+        self.assertEqual((len(index), index.search('al')), (2, [(3, 'alain')]))
+        index.remove(3)
+        self.assertEqual(index.search('al'), [])
+
+
+class SuggestTests(TestCase):
+
+    def setUp(self):
+        suggestions.reset()
+        self.addCleanup(suggestions.reset)
+        self.author = User.objects.create_user(username='Émile', email='emile@example.com', password='secret-password')
+        Topic.objects.create(title='Déployer Django', content='x', author=self.author)
+        self.client = APIClient()
+
+    def test_suggests_topics_and_users_without_sql(self):
+        self.client.get('/search/suggest/', {'q': 'x'})
+        with self.assertNumQueries(0):
+            response = self.client.get('/search/suggest/', {'q': 'DEPL'})
+        self.assertEqual([topic['title'] for topic in response.json()['topics']], ['Déployer Django'])
+        users = self.client.get('/search/suggest/', {'q': 'emi'}).json()['users']
+        self.assertEqual(users, [{'id': self.author.pk, 'username': 'Émile'}])
+
+    def test_limit_is_bounded(self):
+        for i in range(5):
+            Topic.objects.create(title=f'Django {i}', content='x', author=self.author)
+        suggestions.reset()
+        self.assertEqual(len(self.client.get('/search/suggest/', {'q': 'dj', 'limit': 2}).json()['topics']), 2)
+        with override_settings(SUGGEST_MAX_LIMIT=3):
+            self.assertEqual(len(self.client.get('/search/suggest/', {'q': 'dj', 'limit': 50}).json()['topics']), 3)
+        self.assertEqual(len(self.client.get('/search/suggest/', {'q': 'dj', 'limit': 'x'}).json()['topics']), 6)
+
+    def test_index_picks_up_new_and_deleted_topics(self):
+        self.client.get('/search/suggest/', {'q': 'x'})
+        with self.captureOnCommitCallbacks(execute=True):
+            topic = Topic.objects.create(title='Nouveau sujet', content='x', author=self.author)
+        self.assertEqual(self.client.get('/search/suggest/', {'q': 'nouv'}).json()['topics'], [
+            {'id': topic.pk, 'title': 'Nouveau sujet'},
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            topic.delete()
+        self.assertEqual(self.client.get('/search/suggest/', {'q': 'nouv'}).json()['topics'], [])
+
+
+class ForumStatsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='alice', email='alice@example.com', password='secret-password')
+        self.topic = Topic.objects.create(title='Statistiques', content='x', author=self.author)
+        Reply.objects.create(topic=self.topic, author=self.author, content='y')
+        stats.reconcile()
+        self.client = APIClient()
+
+    def test_counters_are_served_from_cache(self):
+        response = self.client.get('/search/stats/')
+        self.assertEqual(response.data, {'total_users': 1, 'total_topics': 1, 'total_replies': 1})
+        with self.assertNumQueries(0):
+            cached = self.client.get('/search/stats/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_write_invalidates_after_commit(self):
+        etag = self.client.get('/search/stats/')['ETag']
+        with self.captureOnCommitCallbacks() as callbacks:
+            Reply.objects.create(topic=self.topic, author=self.author, content='z')
+            # Avant commit, le cache sert encore les anciennes valeurs
+            self.assertEqual(self.client.get('/search/stats/').data['total_replies'], 1)
+        for callback in callbacks:
+            callback()
+        response = self.client.get('/search/stats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_replies'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.topic.delete()
+        self.assertEqual(self.client.get('/search/stats/').data, {'total_users': 1, 'total_topics': 0, 'total_replies': 0})
+        self.assertEqual(stats.reconcile(), {})
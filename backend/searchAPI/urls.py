@@ -4,4 +4,6 @@ from . import views
 urlpatterns = [
     path('', views.global_search, name='global-search'),
     path('stats/', views.get_forum_stats, name='forum-stats'),
+    path('suggest/', views.suggest, name='search-suggest'),
+    path('cache/', views.cache_stats, name='cache-stats'),
 ]
@@ -0,0 +1,57 @@
+"""
+Numéros de version des ressources de l'API, stockés dans la table ForumCounter.
+
+Chaque écriture (voir signals.py) incrémente, dans sa transaction, la version de la
+collection concernée ('topics', 'users') et celle de l'objet ('topic:<id>', 'user:<id>').
+Les vues s'en servent pour produire ETag et Last-Modified sans sérialiser la réponse :
+la lecture des versions est une requête sur clé primaire.
+La version d'un objet supprimé ou archivé est effacée (forget) : les ids ne sont jamais
+réattribués (AUTOINCREMENT, séquences), la table ne grossit pas avec les suppressions.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ForumCounter
+
+PREFIX = 'version:'
+TOPICS = 'topics'
+USERS = 'users'
+
+
+def topic(pk):
+    return f'topic:{pk}'
+
+
+def user(pk):
+    return f'user:{pk}'
+
+
+def bump(*names):
+    """Incrémente les versions `names` (crée les compteurs absents)"""
+    now = timezone.now()
+    for name in names:
+        key = PREFIX + name
+        if ForumCounter.objects.filter(name=key).update(value=F('value') + 1, updated_at=now):
+            continue
+        try:
+            with transaction.atomic():
+                ForumCounter.objects.create(name=key, value=1)
+        except IntegrityError:
+            # Créé entre-temps par une autre écriture
+            ForumCounter.objects.filter(name=key).update(value=F('value') + 1, updated_at=now)
+
+
+def forget(*names):
+    """Supprime les versions `names` (objets supprimés ou archivés)"""
+    ForumCounter.objects.filter(name__in=[PREFIX + name for name in names]).delete()
+
+
+def read(*names):
+    """Retourne {nom: (version, date de modification)} ; (0, None) pour une version jamais écrite"""
+    rows = dict.fromkeys(names, (0, None))
+    for key, value, updated_at in ForumCounter.objects.filter(
+        name__in=[PREFIX + name for name in names]
+    ).values_list('name', 'value', 'updated_at'):
+        rows[key[len(PREFIX):]] = (value, updated_at)
+    return rows
@@ -1,11 +1,27 @@
-from rest_framework.decorators import api_view
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
-from django.db.models import Q, Count
 
+from authentificationAPI.authentication import token_cache
 from authentificationAPI.models import User
 from authentificationAPI.serializers import UserSerializers
-from topicsAPI.models import Topic, Reply
+from topicsAPI.models import Topic
 from topicsAPI.serializers import TopicListSerializer
+from gestionAPI.admission import admission
+from gestionAPI.conditional import make_validators, not_modified, set_validators
+from gestionAPI.instrumentation import capture, instrumented
+from gestionAPI.response_cache import response_cache
+from . import index, stats
+from .result_cache import search_results
+from .suggest import suggestions
 
 
 @api_view(['GET'])
@@ -14,54 +30,165 @@ def get_forum_stats(request):
     Endpoint pour récupérer les statistiques du forum
     Retourne le nombre de membres actifs, discussions et messages
     """
-    # Compter les membres actifs (tous les utilisateurs inscrits)
-    total_users = User.objects.count()
+    # Compteurs maintenus par signaux (voir stats.py) : pas de COUNT(*) sur les tables
+    data = stats.get_stats()
+    # L'ETag est dérivé des valeurs elles-mêmes, qui peuvent venir du cache
+    etag, _ = make_validators({}, *sorted(data.items()))
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    return set_validators(Response(data), etag)
 
-    # Compter le nombre de discussions (topics)
-    total_topics = Topic.objects.count()
 
-    # Compter le nombre de messages (réponses)
-    total_replies = Reply.objects.count()
+def search_topics(query, request):
+    """Topics correspondant à la recherche (titre, contenu et réponses), sérialisés"""
+    if index.is_available():
+        # Recherche dans l'index plein texte, résultats classés par pertinence
+        topic_ids = index.search_topics(query, limit=20)
+        topics_by_id = Topic.objects.select_related('author').in_bulk(topic_ids)
+        topics = [topics_by_id[pk] for pk in topic_ids if pk in topics_by_id]
+    else:
+        topics = Topic.objects.select_related('author').filter(
+            Q(title__icontains=query) | Q(content__icontains=query)
+        ).order_by('-created_at')[:20]
+    return TopicListSerializer(topics, many=True, context={'request': request}).data
 
-    return Response({
-        'total_users': total_users,
-        'total_topics': total_topics,
-        'total_replies': total_replies
-    })
+
+def search_users(query, request):
+    """Utilisateurs correspondant à la recherche, sérialisés"""
+    if index.is_available():
+        user_ids = index.search_users(query, limit=20)
+        users_by_id = User.objects.in_bulk(user_ids)
+        users = [users_by_id[pk] for pk in user_ids if pk in users_by_id]
+    else:
+        users = User.objects.filter(
+            Q(username__icontains=query) |
+            Q(first_name__icontains=query) |
+            Q(last_name__icontains=query) |
+            Q(bio__icontains=query)
+        )[:20]
+    return UserSerializers(users, many=True, context={'request': request}).data
+
+
+# Pool dédié : une source trop lente continue en arrière-plan sans retenir la réponse
+_search_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'SEARCH_WORKERS', 8), thread_name_prefix='search',
+)
+
+
+def _run_source(func, query, request, instrumentation):
+    # Connexions du thread gardées d'une recherche à l'autre, fermées comme celles des
+    # requêtes HTTP quand elles sont inutilisables ou plus vieilles que CONN_MAX_AGE
+    for connection in connections.all(initialized_only=True):
+        connection.close_if_unusable_or_obsolete()
+    with instrumented(instrumentation):
+        return func(query, request)
+
+
+def _search_sources(sources, query, request, timeout):
+    """
+    Lance les sources {nom: fonction} en parallèle ; retourne ({nom: résultats}, noms en retard).
+    Une source qui dépasse `timeout` secondes est renvoyée vide.
+    """
+    instrumentation = capture()
+    futures = {
+        # copy_context : le routage vers le réplica (gestionAPI.db_router) suit la requête
+        name: _search_executor.submit(
+            contextvars.copy_context().run, _run_source, func, query, request, instrumentation
+        )
+        for name, func in sources.items()
+    }
+    wait(futures.values(), timeout=timeout)
+    late = [name for name, future in futures.items() if not future.done()]
+    results = {name: [] if name in late else future.result() for name, future in futures.items()}
+    return results, late
+
+
+def _search_cost(request):
+    # Une recherche vide répond sans requête SQL : elle ne consomme pas de jeton
+    return 1 if request.query_params.get('q', '').strip() else 0
 
 
 @api_view(['GET'])
+@admission('search', cost=_search_cost)
 def global_search(request):
     """
-    Endpoint de recherche globale pour topics et utilisateurs
-    Retourne les résultats des deux en un seul appel API
+    Endpoint de recherche globale pour topics (titre, contenu et réponses) et utilisateurs
+    Les deux recherches tournent en parallèle, chacune limitée à SEARCH_SOURCE_TIMEOUT secondes :
+    une source trop lente est renvoyée vide et listée dans "timed_out", avec "partial": true
+    Limité par ADMISSION_LIMITS['search'] (429 / 503 avec Retry-After)
+    Résultats de chaque source mis en cache par requête normalisée (voir result_cache, en-tête X-Cache)
     """
-    query = request.GET.get('q', '').strip()
+    query = request.query_params.get('q', '').strip()
 
     if not query:
         return Response({
             'topics': [],
-            'users': []
+            'users': [],
+            'partial': False,
+            'timed_out': []
         })
 
-    # Rechercher les topics
-    topics = Topic.objects.filter(
-        Q(title__icontains=query) | Q(content__icontains=query)
-    ).order_by('-created_at')[:20]
+    use_cache = getattr(settings, 'SEARCH_CACHE_ENABLED', True)
+    sources = {'topics': search_topics, 'users': search_users}
+    results, keys = {}, {}
+    if use_cache:
+        # Clés calculées avant la recherche : une écriture pendant celle-ci change la
+        # version et le résultat, peut-être déjà périmé, ne sera plus relu
+        for name in sources:
+            keys[name] = search_results.make_key(request, name, query)
+            cached = search_results.get(name, keys[name])
+            if cached is not None:
+                results[name] = cached
+
+    missing = {name: func for name, func in sources.items() if name not in results}
+    timed_out = []
+    if missing:
+        found, timed_out = _search_sources(missing, query, request, getattr(settings, 'SEARCH_SOURCE_TIMEOUT', 2.0))
+        results.update(found)
+        # Une source en retard, renvoyée vide, n'est pas mise en cache
+        if use_cache:
+            for name in missing.keys() - set(timed_out):
+                search_results.set(name, keys[name], found[name])
 
-    # Rechercher les utilisateurs
-    users = User.objects.filter(
-        Q(username__icontains=query) |
-        Q(first_name__icontains=query) |
-        Q(last_name__icontains=query) |
-        Q(bio__icontains=query)
-    )[:20]
+    response = Response({
+        'topics': results['topics'],
+        'users': results['users'],
+        'partial': bool(timed_out),
+        'timed_out': timed_out
+    })
+    if use_cache:
+        response['X-Cache'] = 'MISS' if missing else 'HIT'
+    return response
 
-    # Sérialiser les résultats
-    topics_serializer = TopicListSerializer(topics, many=True, context={'request': request})
-    users_serializer = UserSerializers(users, many=True, context={'request': request})
 
+@require_GET
+def suggest(request):
+    """
+    Autocomplétion de la barre de recherche : titres de topics et pseudos commençant par ?q=
+    (insensible à la casse et aux accents). Servi depuis un index en mémoire, sans requête SQL
+    """
+    query = request.GET.get('q', '')
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), getattr(settings, 'SUGGEST_MAX_LIMIT', 20))
+    except ValueError:
+        limit = 8
+    suggestions.ensure_built()
+    return JsonResponse({
+        'topics': [{'id': pk, 'title': title} for pk, title in suggestions.topics.search(query, limit)],
+        'users': [{'id': pk, 'username': username} for pk, username in suggestions.users.search(query, limit)],
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """
+    Statistiques des caches du processus qui répond (administrateurs) : résultats de
+    recherche, réponses anonymes et tokens d'authentification (taux de succès, tailles)
+    """
     return Response({
-        'topics': topics_serializer.data,
-        'users': users_serializer.data
+        'search_results': search_results.stats(),
+        'responses': response_cache.stats(),
+        'tokens': token_cache.stats(),
     })
@@ -0,0 +1,104 @@
+"""
+Archivage froid des topics fermés et inactifs.
+
+Les topics fermés, non épinglés, sans modification ni réponse depuis ARCHIVE_AFTER_DAYS
+jours sont déplacés avec leurs réponses vers ArchivedTopic / ArchivedReply (mêmes ids),
+par lots et une transaction par lot. Les tables chaudes, et donc les listes, la
+recherche plein texte et l'autocomplétion, ne contiennent plus que les sujets vivants ;
+le détail d'un topic archivé reste lisible en lecture seule à la même URL.
+Les statistiques du forum et nombre_posts comptent les deux tables.
+"""
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from searchAPI import index, versions
+from searchAPI.result_cache import search_results
+from searchAPI.suggest import suggestions
+from . import changes
+from .models import Topic, Reply, ArchivedTopic, ArchivedReply
+
+TOPIC_FIELDS = [
+    'id', 'title', 'content', 'category', 'author_id', 'created_at', 'updated_at', 'views',
+    'is_pinned', 'is_closed', 'reply_count', 'last_reply_at',
+]
+REPLY_FIELDS = ['id', 'topic_id', 'author_id', 'content', 'created_at', 'updated_at', 'likes']
+
+
+def archivable(days=None, now=None):
+    """Topics fermés et inactifs depuis `days` jours (ARCHIVE_AFTER_DAYS par défaut)"""
+    days = getattr(settings, 'ARCHIVE_AFTER_DAYS', 180) if days is None else days
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    # __in pour que SQLite serve les booléens par l'index (voir TopicListCreateView)
+    return Topic.objects.filter(
+        Q(last_reply_at__isnull=True) | Q(last_reply_at__lt=cutoff),
+        is_closed__in=[True], is_pinned__in=[False], updated_at__lt=cutoff,
+    )
+
+
+def archive_topics(topic_ids, days=None, chunk_size=2000):
+    """
+    Déplace les topics `topic_ids` encore archivables et leurs réponses dans les tables
+    d'archive, en une transaction. Retourne (nombre de topics, nombre de réponses).
+    """
+    with transaction.atomic():
+        # Critères revérifiés dans la transaction : une réponse a pu arriver depuis la sélection
+        return move_to_archive(archivable(days).filter(pk__in=topic_ids), chunk_size)
+
+
+def move_to_archive(topics, chunk_size=2000):
+    """Déplace les topics du queryset `topics` et leurs réponses (à appeler dans une transaction)"""
+    # Topics verrouillés jusqu'au commit : aucune réponse ne peut s'y ajouter pendant la copie
+    # (sous SQLite, la transaction IMMEDIATE bloque déjà toute autre écriture)
+    topics = list(topics.select_for_update().values(*TOPIC_FIELDS))
+    ids = [topic['id'] for topic in topics]
+    if not ids:
+        return 0, 0
+    ArchivedTopic.objects.bulk_create([ArchivedTopic(**topic) for topic in topics])
+
+    reply_ids = []
+    replies = Reply.objects.filter(topic_id__in=ids).order_by().values(*REPLY_FIELDS).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(replies, chunk_size)):
+        ArchivedReply.objects.bulk_create([ArchivedReply(**reply) for reply in chunk])
+        reply_ids += [reply['id'] for reply in chunk]
+
+    # Seules les lignes copiées sont supprimées : une réponse qui n'aurait pas été copiée
+    # garde son topic et la suppression de celui-ci échoue sur la clé étrangère
+    _delete_rows(Reply, reply_ids, chunk_size)
+    _delete_rows(Topic, ids, chunk_size)
+
+    if index.is_available():
+        index.remove_many('search_topic', ids)
+        index.remove_many('search_reply', reply_ids)
+    versions.bump(versions.TOPICS)
+    for start in range(0, len(ids), chunk_size):
+        versions.forget(*(versions.topic(pk) for pk in ids[start:start + chunk_size]))
+    # Les topics archivés quittent les listes : suppression pour le flux /topics/changes/
+    changes.record_deleted_topics(ids)
+    transaction.on_commit(lambda: search_results.bump('topics'))
+    if suggestions.built_at is not None:
+        transaction.on_commit(lambda: _forget_suggestions(ids))
+    return len(ids), len(reply_ids)
+
+
+def _delete_rows(model, pks, chunk_size):
+    """
+    DELETE direct par clé primaire, sans collecte des objets ni signaux post_delete :
+    ceux-ci décrémenteraient les statistiques, qui comptent aussi les archives
+    """
+    connection = connections[router.db_for_write(model)]
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), chunk_size):
+            chunk = pks[start:start + chunk_size]
+            cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({', '.join(['%s'] * len(chunk))})", chunk)
+
+
+def _forget_suggestions(topic_ids):
+    for pk in topic_ids:
+        suggestions.topics.remove(pk)
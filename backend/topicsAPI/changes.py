@@ -0,0 +1,128 @@
+"""
+Journal des modifications (table Change) et flux de synchronisation incrémentale.
+
+Les signaux post_save / post_delete (searchAPI.signals) écrivent une ligne par création,
+modification ou suppression, dans la même transaction que l'objet : une ligne visible
+désigne toujours un état déjà enregistré.
+Le jeton de synchronisation est l'id de la dernière ligne lue ; un client qui le renvoie
+ne relit que les lignes suivantes, par la clé primaire, donc en proportion de ce qui a
+changé. Les topics archivés sont journalisés comme supprimés : ils quittent les listes.
+
+Sous SQLite les écritures sont sérialisées (transactions IMMEDIATE) et les ids suivent
+l'ordre des commits ; avec une base à écritures concurrentes (PostgreSQL), un id peut
+devenir visible après un id supérieur et il faudrait relire une petite marge en arrière.
+
+Les lignes plus anciennes que CHANGES_RETENTION_DAYS sont supprimées par
+`manage.py prune_changes` ; un jeton antérieur à la purge est refusé (le client recharge).
+"""
+from datetime import timedelta
+
+from django.db.models import Max
+from django.utils import timezone
+
+from searchAPI.models import ForumCounter
+from .models import Change
+
+# Plus grand id purgé : un jeton inférieur a pu manquer des modifications
+PRUNED = 'changes:pruned'
+
+
+class ExpiredToken(Exception):
+    pass
+
+
+def record(kind, object_id, topic_id, action=Change.UPDATED):
+    """Journalise une modification (appelé dans la transaction de l'écriture)"""
+    Change.objects.create(kind=kind, object_id=object_id, topic_id=topic_id, action=action)
+
+
+def record_deleted_topics(topic_ids):
+    Change.objects.bulk_create([
+        Change(kind=Change.TOPIC, object_id=pk, topic_id=pk, action=Change.DELETED) for pk in topic_ids
+    ])
+
+
+def current_token():
+    return Change.objects.aggregate(last=Max('id'))['last'] or 0
+
+
+def pruned_up_to():
+    counter = ForumCounter.objects.filter(name=PRUNED).values_list('value', flat=True).first()
+    return counter or 0
+
+
+def expire_tokens():
+    """
+    Invalide les jetons existants, jeton courant compris, après des écritures non
+    journalisées (import en masse) : une ligne témoin est ajoutée et marquée purgée avec
+    tout ce qui la précède. Les nouveaux jetons partent de cette ligne.
+    """
+    marker = Change.objects.create(kind=Change.TOPIC, object_id=0, topic_id=0, action=Change.UPDATED)
+    _set_pruned(marker.pk)
+
+
+def _set_pruned(last_id):
+    ForumCounter.objects.update_or_create(name=PRUNED, defaults={'value': last_id})
+
+
+def prune(days):
+    """Supprime les lignes de plus de `days` jours ; retourne le nombre de lignes supprimées"""
+    cutoff = timezone.now() - timedelta(days=days)
+    # Les ids suivent les dates : première ligne conservée en parcourant la clé primaire
+    first_kept = Change.objects.filter(created_at__gte=cutoff).order_by('id').values_list('id', flat=True).first()
+    # La dernière ligne est toujours gardée : current_token() ne doit pas redescendre
+    last_pruned = current_token() - 1 if first_kept is None else first_kept - 1
+    if last_pruned <= pruned_up_to():
+        return 0
+    deleted, _ = Change.objects.filter(id__lte=last_pruned).delete()
+    _set_pruned(last_pruned)
+    return deleted
+
+
+def collect(since, limit):
+    """
+    Modifications d'id supérieur à `since`, au plus `limit` lignes, réduites au dernier état
+    de chaque objet. Retourne un dict d'ensembles d'ids :
+        topics, replies                    objets créés ou modifiés (à relire)
+        deleted_topics, deleted_replies    objets supprimés (les réponses d'un topic
+                                           supprimé ne sont pas listées une à une)
+    avec 'sync_token' (nouveau jeton) et 'has_more' (appeler de nouveau avec ce jeton).
+    Lève ExpiredToken si des lignes postérieures à `since` ont été purgées ou si le jeton
+    ne correspond à aucune ligne de cette base.
+    """
+    if since < pruned_up_to():
+        raise ExpiredToken
+    rows = list(
+        Change.objects.filter(id__gt=since).order_by('id')
+        .values_list('id', 'kind', 'object_id', 'topic_id', 'action')[:limit + 1]
+    )
+    # Jeton venu d'une autre base (restaurée, réinitialisée) : plus grand que tout id
+    if not rows and since > current_token():
+        raise ExpiredToken
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # Dernière action par objet ; une réponse modifie aussi les compteurs de son topic
+    latest = {}
+    touched_topics = set()
+    for _, kind, object_id, topic_id, action in rows:
+        latest[kind, object_id] = action, topic_id
+        if kind == Change.REPLY:
+            touched_topics.add(topic_id)
+    result = {
+        'topics': set(), 'replies': set(), 'deleted_topics': set(), 'deleted_replies': set(),
+        'sync_token': rows[-1][0] if rows else since, 'has_more': has_more,
+    }
+    for (kind, object_id), (action, _) in latest.items():
+        deleted = action == Change.DELETED
+        if kind == Change.TOPIC:
+            result['deleted_topics' if deleted else 'topics'].add(object_id)
+        else:
+            result['deleted_replies' if deleted else 'replies'].add(object_id)
+    result['topics'] |= touched_topics - result['deleted_topics']
+    # Réponses supprimées en cascade avec leur topic : couvertes par deleted_topics
+    result['deleted_replies'] -= {
+        object_id for (kind, object_id), (_, topic_id) in latest.items()
+        if kind == Change.REPLY and topic_id in result['deleted_topics']
+    }
+    return result
@@ -0,0 +1,104 @@
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from authentificationAPI.authentication import invalidate_user, token_cache
+from authentificationAPI.models import User
+from .models import Topic, Reply, ArchivedTopic
+
+
+def _reply_count_subquery():
+    return Coalesce(Subquery(
+        Reply.objects.filter(topic_id=OuterRef('pk'))
+        .order_by().values('topic_id').annotate(n=Count('id')).values('n')
+    ), 0)
+
+
+def _last_reply_subquery():
+    return Subquery(
+        Reply.objects.filter(topic_id=OuterRef('pk'))
+        .order_by().values('topic_id').annotate(last=Max('created_at')).values('last')
+    )
+
+
+def reply_created(reply):
+    """Incrémente les compteurs du topic après la création d'une réponse (à appeler dans la transaction)"""
+    Topic.objects.filter(pk=reply.topic_id).update(
+        reply_count=F('reply_count') + 1,
+        last_reply_at=reply.created_at,
+    )
+
+
+def reply_deleted(topic_id):
+    """Décrémente les compteurs du topic après la suppression d'une réponse (à appeler dans la transaction)"""
+    Topic.objects.filter(pk=topic_id, reply_count__gt=0).update(
+        reply_count=F('reply_count') - 1,
+        last_reply_at=_last_reply_subquery(),
+    )
+
+
+def topic_created(topic):
+    """Incrémente nombre_posts de l'auteur après la création d'un topic (à appeler dans la transaction)"""
+    User.objects.filter(pk=topic.author_id).update(nombre_posts=F('nombre_posts') + 1)
+    # update() ne passe pas par save() : l'utilisateur en cache d'authentification est périmé
+    transaction.on_commit(lambda: invalidate_user(topic.author_id))
+
+
+def topic_deleted(author_id):
+    """Décrémente nombre_posts de l'auteur après la suppression d'un topic (à appeler dans la transaction)"""
+    User.objects.filter(pk=author_id, nombre_posts__gt=0).update(nombre_posts=F('nombre_posts') - 1)
+    transaction.on_commit(lambda: invalidate_user(author_id))
+
+
+def _count_by_author(model):
+    return Coalesce(Subquery(
+        model.objects.filter(author_id=OuterRef('pk'))
+        .order_by().values('author_id').annotate(n=Count('id')).values('n')
+    ), 0)
+
+
+def _post_count_subquery():
+    # Les topics archivés restent des posts de leur auteur
+    return _count_by_author(Topic) + _count_by_author(ArchivedTopic)
+
+
+def stale_post_counts(queryset=None):
+    """Utilisateurs dont nombre_posts ne correspond plus au nombre de topics créés"""
+    queryset = User.objects.all() if queryset is None else queryset
+    return (
+        queryset.order_by()
+        .annotate(actual_count=_post_count_subquery())
+        .filter(Q(nombre_posts__lt=F('actual_count')) | Q(nombre_posts__gt=F('actual_count')))
+    )
+
+
+def rebuild_post_counts(queryset=None):
+    """Recalcule nombre_posts en une seule requête UPDATE sur le queryset d'utilisateurs"""
+    queryset = User.objects.all() if queryset is None else queryset
+    updated = queryset.order_by().update(nombre_posts=_post_count_subquery())
+    token_cache.clear()
+    return updated
+
+
+def stale_topics(queryset=None):
+    """Topics dont les compteurs stockés ne correspondent plus aux réponses réelles"""
+    queryset = Topic.objects.all() if queryset is None else queryset
+    return (
+        queryset.order_by()
+        .annotate(actual_count=_reply_count_subquery(), actual_last=_last_reply_subquery())
+        .filter(
+            Q(reply_count__lt=F('actual_count')) | Q(reply_count__gt=F('actual_count'))
+            | Q(last_reply_at__lt=F('actual_last')) | Q(last_reply_at__gt=F('actual_last'))
+            | Q(last_reply_at__isnull=True, actual_last__isnull=False)
+            | Q(last_reply_at__isnull=False, actual_last__isnull=True)
+        )
+    )
+
+
+def rebuild_reply_counters(queryset=None):
+    """Recalcule reply_count et last_reply_at en une seule requête UPDATE sur le queryset"""
+    queryset = Topic.objects.all() if queryset is None else queryset
+    return queryset.order_by().update(
+        reply_count=_reply_count_subquery(),
+        last_reply_at=_last_reply_subquery(),
+    )
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from topicsAPI.archive import archivable, archive_topics
+
+
+class Command(BaseCommand):
+    help = (
+        "Déplace les topics fermés et inactifs (et leurs réponses) vers les tables d'archive, "
+        "par lots ; à lancer par cron, ou en continu avec --interval"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help="Inactivité minimale en jours (ARCHIVE_AFTER_DAYS par défaut)")
+        parser.add_argument('--batch-size', type=int, default=500, help="Topics déplacés par transaction")
+        parser.add_argument('--limit', type=int, default=None, help="Nombre maximum de topics par passage")
+        parser.add_argument('--dry-run', action='store_true', help="Compte les topics archivables sans rien déplacer")
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Secondes entre deux passages (0 = un seul passage)")
+
+    def handle(self, *args, **options):
+        while True:
+            self.run(options)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def run(self, options):
+        if options['dry_run']:
+            self.stdout.write(f"{archivable(options['days']).count()} topics archivables")
+            return
+        started = time.monotonic()
+        topics = replies = 0
+        last_id = 0
+        while options['limit'] is None or topics < options['limit']:
+            size = options['batch_size'] if options['limit'] is None else min(options['batch_size'], options['limit'] - topics)
+            ids = list(
+                archivable(options['days']).filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:size]
+            )
+            if not ids:
+                break
+            moved_topics, moved_replies = archive_topics(ids, options['days'])
+            topics += moved_topics
+            replies += moved_replies
+            last_id = ids[-1]
+            self.stdout.write(f"{topics} topics et {replies} réponses archivés")
+        self.stdout.write(self.style.SUCCESS(
+            f"{topics} topics et {replies} réponses archivés en {time.monotonic() - started:.1f} s"
+        ))
@@ -0,0 +1,278 @@
+import json
+import platform
+import statistics
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver
+from rest_framework.authtoken.models import Token
+
+from authentificationAPI.models import User
+from topicsAPI import changes
+from topicsAPI.models import Topic, Reply
+
+# URLconfs couverts : chaque route nommée doit avoir un scénario (ou être explicitement ignorée)
+URLCONFS = ('authentificationAPI.urls', 'topicsAPI.urls', 'searchAPI.urls')
+
+# Routes non mesurées, avec la raison
+SKIPPED = {
+    'reply-stream': "flux SSE (connexion longue)",
+    'cache-stats': "réservé aux administrateurs",
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Exécute le bloc dans une transaction annulée à la sortie"""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure latence (p50/p95/p99), débit et nombre de requêtes SQL de chaque endpoint "
+        "des API topics, search et authentification ; écrit les résultats en JSON et peut "
+        "les comparer à une exécution précédente"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--output', help="Fichier JSON où écrire les résultats")
+        parser.add_argument('--compare', help="Fichier JSON d'une exécution précédente")
+        parser.add_argument('--max-regression', type=float, default=0.2,
+                            help="Hausse relative tolérée du p95 avant échec avec --compare (0.2 = +20 %%)")
+        parser.add_argument('--only', nargs='*', help="Noms de routes à mesurer")
+        parser.add_argument('--host', default=None, help="En-tête Host des requêtes (par défaut le premier ALLOWED_HOSTS)")
+        parser.add_argument('--no-response-cache', action='store_true',
+                            help="Désactive les caches des réponses anonymes et des recherches pour mesurer le chemin complet")
+        parser.add_argument('--admission', action='store_true',
+                            help="Garde le contrôle d'admission (sinon désactivé : un seul client enchaîne les requêtes)")
+
+    def handle(self, *args, **options):
+        topic = Topic.objects.order_by('-reply_count').first()
+        user = User.objects.order_by('id').first()
+        if topic is None or user is None:
+            raise CommandError("Base vide : lancez d'abord generate_forum_data")
+
+        overrides = {}
+        if options['no_response_cache']:
+            overrides.update(RESPONSE_CACHE_ENABLED=False, SEARCH_CACHE_ENABLED=False)
+        if not options['admission']:
+            overrides['ADMISSION_CONTROL'] = False
+        host = options['host'] or (settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+        if host == '*':
+            host = 'localhost'
+        results = {}
+        # Réglages rétablis en sortie, même si une mesure échoue
+        with override_settings(**overrides):
+            scenarios, bench_user = self.build_scenarios(topic, user)
+            try:
+                self.check_coverage(scenarios)
+                for name, scenario in scenarios.items():
+                    if options['only'] and name not in options['only']:
+                        continue
+                    results[name] = self.measure(scenario, host, options['iterations'], options['warmup'])
+                    self.report(name, results[name])
+            finally:
+                bench_user.delete()
+
+        document = {
+            'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'dataset': {
+                'users': User.objects.count(),
+                'topics': Topic.objects.count(),
+                'replies': Reply.objects.count(),
+            },
+            'iterations': options['iterations'],
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(document, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Résultats écrits dans {options['output']}")
+        if options['compare']:
+            self.compare(results, options['compare'], options['max_regression'])
+
+    def build_scenarios(self, topic, user):
+        # Compte dédié, supprimé en fin d'exécution (et nettoyé s'il reste d'une exécution interrompue)
+        User.objects.filter(username='bench_user').delete()
+        bench_user = User.objects.create_user(username='bench_user', email='bench@example.com', password='bench-password')
+        token = Token.objects.create(user=bench_user).key
+        auth = {'HTTP_AUTHORIZATION': f'Token {token}'}
+        reply = Reply.objects.filter(topic=topic).first() or Reply.objects.create(topic=topic, author=bench_user, content='bench')
+        topic_ids = ','.join(str(pk) for pk in Topic.objects.values_list('id', flat=True)[:50])
+        user_ids = ','.join(str(pk) for pk in User.objects.values_list('id', flat=True)[:50])
+        counter = iter(range(10 ** 9))
+
+        # Lignes jetables du compte de benchmark, créées hors mesure avant chaque appel
+        # (et annulées avec le reste du scénario d'écriture)
+        def throwaway_topic():
+            return Topic.objects.create(title=f'bench {next(counter)}', content='bench', author=bench_user)
+
+        def throwaway_reply():
+            return Reply.objects.create(topic=throwaway_topic(), author=bench_user, content='bench')
+        # Les 100 dernières modifications du journal (au plus)
+        since = max(changes.current_token() - 100, changes.pruned_up_to())
+
+        return {
+            'topic-list-create': {'method': 'get', 'path': '/topics/'},
+            'topic-detail': {'method': 'get', 'path': f'/topics/{topic.pk}/'},
+            'topic-batch': {'method': 'get', 'path': f'/topics/batch/?ids={topic_ids}'},
+            'topic-changes': {'method': 'get', 'path': f'/topics/changes/?since={since}'},
+            'reply-list-create': {'method': 'get', 'path': f'/topics/{topic.pk}/replies/'},
+            'reply-detail': {'method': 'get', 'path': f'/topics/replies/{reply.pk}/'},
+            'global-search': {'method': 'get', 'path': '/search/?q=django'},
+            'forum-stats': {'method': 'get', 'path': '/search/stats/'},
+            'search-suggest': {'method': 'get', 'path': '/search/suggest/?q=dja'},
+            'user-list-create': {'method': 'get', 'path': '/authentification/user/'},
+            'user-detail': {'method': 'get', 'path': f'/authentification/user/{user.pk}/'},
+            'user-batch': {'method': 'get', 'path': f'/authentification/user/batch/?ids={user_ids}'},
+            'register': {
+                'method': 'post', 'writes': True, 'path': '/authentification/register/',
+                'data': lambda: {
+                    'username': f'bench{(n := next(counter))}', 'email': f'bench{n}@example.com', 'password': 'bench-password',
+                },
+            },
+            'login': {
+                'method': 'post', 'writes': True, 'path': '/authentification/login/',
+                'data': lambda: {'username': 'bench_user', 'password': 'bench-password'},
+            },
+            'topic-create': {
+                'method': 'post', 'writes': True, 'path': '/topics/', 'headers': auth,
+                'data': lambda: {'title': f'bench {next(counter)}', 'content': 'bench', 'category': 'general'},
+            },
+            'topic-update': {
+                'method': 'patch', 'writes': True, 'path': '/topics/<id>/', 'headers': auth,
+                'target': lambda: f'/topics/{throwaway_topic().pk}/',
+                'data': lambda: {'title': f'bench {next(counter)}'},
+            },
+            'topic-delete': {
+                'method': 'delete', 'writes': True, 'path': '/topics/<id>/', 'headers': auth,
+                'target': lambda: f'/topics/{throwaway_topic().pk}/',
+            },
+            'reply-create': {
+                'method': 'post', 'writes': True, 'path': '/topics/<id>/replies/', 'headers': auth,
+                'target': lambda: f'/topics/{throwaway_topic().pk}/replies/',
+                'data': lambda: {'content': f'bench {next(counter)}'},
+            },
+            'reply-update': {
+                'method': 'patch', 'writes': True, 'path': '/topics/replies/<id>/', 'headers': auth,
+                'target': lambda: f'/topics/replies/{throwaway_reply().pk}/',
+                'data': lambda: {'content': f'bench {next(counter)}'},
+            },
+            'reply-delete': {
+                'method': 'delete', 'writes': True, 'path': '/topics/replies/<id>/', 'headers': auth,
+                'target': lambda: f'/topics/replies/{throwaway_reply().pk}/',
+            },
+            'current-user': {'method': 'get', 'path': '/authentification/me/', 'headers': auth},
+            'update-profile': {
+                'method': 'patch', 'writes': True, 'path': '/authentification/profile/', 'headers': auth,
+                'data': lambda: {'bio': f'bio {next(counter)}'},
+            },
+        }, bench_user
+
+    def check_coverage(self, scenarios):
+        names = set()
+        for urlconf in URLCONFS:
+            names.update(p.name for p in get_resolver(urlconf).url_patterns if p.name)
+        missing = names - set(scenarios) - set(SKIPPED)
+        if missing:
+            self.stderr.write(f"Routes sans scénario de benchmark : {', '.join(sorted(missing))}")
+        for name, reason in SKIPPED.items():
+            self.stdout.write(f"{name} ignoré : {reason}")
+
+    def measure(self, scenario, host, iterations, warmup):
+        client = Client(HTTP_HOST=host)
+        headers = scenario.get('headers', {})
+
+        def call(path):
+            method = getattr(client, scenario['method'])
+            if scenario['method'] in ('get', 'delete'):
+                return method(path, **headers)
+            data = scenario['data']() if 'data' in scenario else None
+            return method(path, data=json.dumps(data), content_type='application/json', **headers)
+
+        # Les scénarios d'écriture (inscription, profil, topics, réponses) sont annulés pour ne pas modifier
+        # le jeu de données ; les lectures s'exécutent hors transaction, comme en production
+        with rolled_back() if scenario.get('writes') else nullcontext():
+            return self.run(call, scenario, iterations, warmup)
+
+    def run(self, call, scenario, iterations, warmup):
+        # 'target' crée la ligne visée par l'appel (modification, suppression) : hors mesure
+        target = scenario.get('target', lambda: scenario['path'])
+        for _ in range(warmup):
+            call(target())
+        durations = []
+        queries = []
+        statuses = set()
+        elapsed = 0.0
+        for _ in range(iterations):
+            path = target()
+            with CaptureQueriesContext(connection) as captured:
+                begin = time.perf_counter()
+                response = call(path)
+                duration = time.perf_counter() - begin
+            durations.append(duration * 1000)
+            elapsed += duration
+            queries.append(len(captured.captured_queries))
+            statuses.add(response.status_code)
+
+        return {
+            'method': scenario['method'].upper(),
+            'path': scenario['path'],
+            'p50_ms': round(percentile(durations, 0.50), 3),
+            'p95_ms': round(percentile(durations, 0.95), 3),
+            'p99_ms': round(percentile(durations, 0.99), 3),
+            'mean_ms': round(statistics.fmean(durations), 3),
+            'throughput_rps': round(iterations / elapsed, 1),
+            'queries_mean': round(statistics.fmean(queries), 2),
+            'queries_max': max(queries),
+            'status_codes': sorted(statuses),
+        }
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:<20} p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+            f"p99 {result['p99_ms']:>8.2f} ms  {result['throughput_rps']:>8.1f} req/s  "
+            f"{result['queries_mean']:>6.1f} requêtes SQL  {result['status_codes']}"
+        )
+
+    def compare(self, results, path, max_regression):
+        with open(path, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = []
+        self.stdout.write(f"Comparaison avec {path} :")
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] if before['p95_ms'] else 0.0
+            queries = result['queries_max'] - before['queries_max']
+            self.stdout.write(f"{name:<20} p95 {change:+.0%}  requêtes SQL {queries:+d}")
+            if change > max_regression or queries > 0:
+                regressions.append(name)
+        if regressions:
+            raise CommandError(f"Régressions détectées : {', '.join(regressions)}")
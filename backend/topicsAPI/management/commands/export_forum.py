@@ -0,0 +1,108 @@
+import gzip
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from topicsAPI.transfer import KINDS, encode
+
+MANIFEST = 'manifest.json'
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporte utilisateurs, topics et réponses (archives comprises) en JSONL compressé (un fichier par type), "
+        "par lots et en mémoire constante ; relancée sur le même dossier, reprend l'export interrompu"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Dossier de l'export (créé si besoin)")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--restart', action='store_true', help="Ignore un export existant et recommence")
+
+    def handle(self, *args, **options):
+        self.directory = Path(options['output'])
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.batch_size = options['batch_size']
+        self.manifest = self.load_manifest(options['restart'])
+
+        for kind in KINDS:
+            # Reprise d'un export commencé avant l'ajout d'un type : exporté en entier
+            state = self.manifest['kinds'].setdefault(kind.name, {'last_id': 0, 'count': 0, 'size': 0, 'done': False})
+            if state['done']:
+                self.stdout.write(f"{kind.name} : déjà exporté ({state['count']})")
+                continue
+            self.export(kind, state)
+
+        self.manifest['completed_at'] = timezone.now().isoformat()
+        self.save_manifest()
+        self.stdout.write(self.style.SUCCESS(f"Export {self.manifest['export_id']} terminé dans {self.directory}"))
+
+    def load_manifest(self, restart):
+        path = self.directory / MANIFEST
+        if path.exists() and not restart:
+            with open(path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            self.stdout.write(f"Reprise de l'export {manifest['export_id']}")
+            return manifest
+        for kind in KINDS:
+            (self.directory / kind.filename).unlink(missing_ok=True)
+        return {
+            'export_id': str(uuid.uuid4()),
+            'started_at': timezone.now().isoformat(),
+            'completed_at': None,
+            'kinds': {kind.name: {'last_id': 0, 'count': 0, 'size': 0, 'done': False} for kind in KINDS},
+        }
+
+    def save_manifest(self):
+        # Écriture atomique : une interruption laisse l'ancien manifeste intact
+        path = self.directory / MANIFEST
+        temporary = path.with_suffix('.tmp')
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(temporary, path)
+
+    def export(self, kind, state):
+        path = self.directory / kind.filename
+        # Ce qui suit la dernière taille enregistrée vient d'un lot interrompu
+        if path.exists():
+            with open(path, 'r+b') as f:
+                f.truncate(state['size'])
+
+        total = kind.model.objects.filter(pk__gt=state['last_id']).count() + state['count']
+        queryset = (
+            kind.model.objects.filter(pk__gt=state['last_id']).order_by('pk')
+            .values(*kind.columns()).iterator(chunk_size=self.batch_size)
+        )
+        started = time.monotonic()
+        exported = 0
+        batch = []
+        for row in queryset:
+            batch.append(encode(kind, row))
+            if len(batch) >= self.batch_size:
+                exported += self.write_batch(path, state, batch, row['id'])
+                batch = []
+                self.progress(kind, state, total, exported, started)
+        if batch:
+            exported += self.write_batch(path, state, batch, row['id'])
+        state['done'] = True
+        self.save_manifest()
+        self.progress(kind, state, total, exported, started)
+
+    def write_batch(self, path, state, lines, last_id):
+        # Un membre gzip par lot, écrit puis enregistré dans le manifeste
+        with gzip.open(path, 'ab') as f:
+            f.write(('\n'.join(lines) + '\n').encode('utf-8'))
+        state['last_id'] = last_id
+        state['count'] += len(lines)
+        state['size'] = path.stat().st_size
+        self.save_manifest()
+        return len(lines)
+
+    def progress(self, kind, state, total, exported, started):
+        rate = exported / max(time.monotonic() - started, 1e-6)
+        self.stdout.write(f"{kind.name} : {state['count']}/{total} ({rate:.0f} lignes/s)")
@@ -0,0 +1,145 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from authentificationAPI.models import User
+from topicsAPI.models import Topic, Reply
+from topicsAPI.transfer import explicit_dates, refresh_derived_data
+
+WORDS = (
+    "forum question réponse aide projet python django base données requête index serveur "
+    "client navigateur page liste recherche compte profil avatar message discussion sujet "
+    "problème solution erreur version mise jour installation configuration performance cache "
+    "test code fonction classe module paquet application réseau sécurité mot passe token"
+).split()
+
+# Mot de passe de tous les utilisateurs générés (utile pour les benchmarks de connexion)
+PASSWORD = 'password'
+
+
+def sentence(rng, min_words, max_words):
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return ' '.join(words).capitalize()
+
+
+def paragraph(rng, sentences):
+    return '. '.join(sentence(rng, 6, 18) for _ in range(sentences)) + '.'
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère un jeu de données réaliste (utilisateurs, topics répartis dans les catégories, "
+        "réponses distribuées selon une loi de Zipf) avec bulk_create"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--topics', type=int, default=10000)
+        parser.add_argument('--replies', type=int, default=100000)
+        parser.add_argument('--zipf', type=float, default=1.1,
+                            help="Exposant de Zipf : nombre de réponses du k-ième topic le plus actif ∝ 1/k^s")
+        parser.add_argument('--days', type=int, default=365, help="Période couverte par les dates générées")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.period = timedelta(days=options['days'])
+        started = time.monotonic()
+
+        user_ids = self.create_users(rng, options['users'])
+        topics = self.create_topics(rng, options['topics'], user_ids)
+        self.create_replies(rng, options['replies'], topics, user_ids, options['zipf'])
+
+        # bulk_create ne déclenche pas les signaux : on recalcule les données dérivées
+        self.stdout.write("Recalcul des compteurs et de l'index de recherche...")
+        refresh_derived_data(self.stdout, self.batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Données générées en {time.monotonic() - started:.1f} s"))
+
+    def random_date(self, rng, after=None):
+        start = after or self.now - self.period
+        return start + (self.now - start) * rng.random()
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield min(self.batch_size, total - start)
+
+    def progress(self, label, done, total):
+        self.stdout.write(f"{label} : {done}/{total}")
+
+    def create_users(self, rng, total):
+        # Un seul hachage pour tous les comptes : le hachage par utilisateur dominerait le temps
+        password = make_password(PASSWORD)
+        first_id = (User.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        done = 0
+        with explicit_dates(User._meta.get_field('date_inscription')):
+            for size in self.batches(total):
+                users = []
+                for n in range(first_id + done, first_id + done + size):
+                    joined = self.random_date(rng)
+                    users.append(User(
+                        username=f'membre{n}', email=f'membre{n}@example.com', password=password,
+                        first_name=rng.choice(WORDS).capitalize(), last_name=rng.choice(WORDS).capitalize(),
+                        bio=sentence(rng, 5, 20), date_inscription=joined, date_joined=joined,
+                    ))
+                with transaction.atomic():
+                    User.objects.bulk_create(users)
+                done += size
+                self.progress("Utilisateurs", done, total)
+        return list(User.objects.values_list('id', flat=True))
+
+    def create_topics(self, rng, total, user_ids):
+        categories = [value for value, _ in Topic.CATEGORY_CHOICES]
+        created_at = Topic._meta.get_field('created_at')
+        updated_at = Topic._meta.get_field('updated_at')
+        done = 0
+        with explicit_dates(created_at, updated_at):
+            for size in self.batches(total):
+                topics = []
+                for _ in range(size):
+                    created = self.random_date(rng)
+                    topics.append(Topic(
+                        title=sentence(rng, 3, 10), content=paragraph(rng, rng.randint(1, 6)),
+                        category=rng.choice(categories), author_id=rng.choice(user_ids),
+                        created_at=created, updated_at=created,
+                        views=int(rng.paretovariate(1.5) * 10),
+                        is_pinned=rng.random() < 0.01, is_closed=rng.random() < 0.2,
+                    ))
+                with transaction.atomic():
+                    Topic.objects.bulk_create(topics)
+                done += size
+                self.progress("Topics", done, total)
+        return list(Topic.objects.values_list('id', 'created_at'))
+
+    def create_replies(self, rng, total, topics, user_ids, exponent):
+        if not topics:
+            return
+        # Les topics reçoivent des réponses selon une loi de Zipf sur un classement aléatoire
+        ranked = topics[:]
+        rng.shuffle(ranked)
+        cum_weights = list(accumulate(1 / (rank ** exponent) for rank in range(1, len(ranked) + 1)))
+        created_at = Reply._meta.get_field('created_at')
+        updated_at = Reply._meta.get_field('updated_at')
+        done = 0
+        with explicit_dates(created_at, updated_at):
+            for size in self.batches(total):
+                replies = []
+                for topic_id, topic_created in rng.choices(ranked, cum_weights=cum_weights, k=size):
+                    created = self.random_date(rng, after=topic_created)
+                    replies.append(Reply(
+                        topic_id=topic_id, author_id=rng.choice(user_ids), content=paragraph(rng, rng.randint(1, 4)),
+                        created_at=created, updated_at=created, likes=int(rng.expovariate(0.5)),
+                    ))
+                with transaction.atomic():
+                    Reply.objects.bulk_create(replies)
+                done += size
+                self.progress("Réponses", done, total)
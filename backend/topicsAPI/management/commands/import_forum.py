@@ -0,0 +1,145 @@
+import gzip
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from authentificationAPI.models import User
+from topicsAPI.archive import move_to_archive
+from topicsAPI.models import Topic, ArchivedTopic, ImportedRecord
+from topicsAPI.transfer import ARCHIVED_TOPICS, KINDS, decode, explicit_dates, refresh_derived_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe un export de export_forum par lots (bulk_create) en remappant les clés "
+        "étrangères ; relancée sur le même export, ignore ce qui est déjà importé"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="Dossier produit par export_forum")
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--forget', action='store_true',
+                            help="Supprime ensuite les correspondances d'ids de cet export (plus de reprise possible)")
+
+    def handle(self, *args, **options):
+        directory = Path(options['input'])
+        try:
+            with open(directory / 'manifest.json', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise CommandError(f"{directory} ne contient pas d'export (manifest.json absent)")
+        if not manifest.get('completed_at'):
+            raise CommandError("Export incomplet : relancer export_forum sur ce dossier pour le terminer")
+        self.source = manifest['export_id']
+        self.batch_size = options['batch_size']
+
+        for kind in KINDS:
+            # Export antérieur aux archives : fichiers absents
+            if kind.name in manifest['kinds']:
+                self.import_kind(kind, directory / kind.filename, manifest['kinds'][kind.name]['count'])
+        if ARCHIVED_TOPICS.name in manifest['kinds']:
+            self.archive_imported(directory / ARCHIVED_TOPICS.filename)
+
+        self.stdout.write("Recalcul des compteurs et de l'index de recherche...")
+        refresh_derived_data(self.stdout, self.batch_size)
+        if options['forget']:
+            ImportedRecord.objects.filter(source=self.source).delete()
+        self.stdout.write(self.style.SUCCESS(f"Import de l'export {self.source} terminé"))
+
+    def import_kind(self, kind, path, total):
+        started = time.monotonic()
+        counts = {'importés': 0, 'déjà importés': 0, 'orphelins': 0}
+        with gzip.open(path, 'rt', encoding='utf-8') as f, explicit_dates(*kind.date_fields()):
+            records = (json.loads(line) for line in f)
+            while batch := list(islice(records, self.batch_size)):
+                with transaction.atomic():
+                    for key, value in self.import_batch(kind, batch).items():
+                        counts[key] += value
+                done = sum(counts.values())
+                rate = done / max(time.monotonic() - started, 1e-6)
+                details = ', '.join(f"{value} {key}" for key, value in counts.items() if value)
+                self.stdout.write(f"{kind.name} : {done}/{total} ({details}, {rate:.0f} lignes/s)")
+
+    def mapping(self, kind_name, old_ids):
+        return dict(
+            ImportedRecord.objects.filter(source=self.source, model=kind_name, old_id__in=old_ids)
+            .values_list('old_id', 'new_id')
+        )
+
+    def import_batch(self, kind, batch):
+        # Un export repris peut répéter des lignes : dernier exemplaire de chaque id
+        records = {record['id']: record for record in batch}
+        already = self.mapping(kind.name, list(records))
+        pending = [record for old_id, record in records.items() if old_id not in already]
+
+        # Clés étrangères : ids d'origine -> ids importés, lus par lot
+        targets = {}
+        for key, _, target in kind.foreign_keys:
+            targets[key] = self.mapping(target, list({record[key] for record in pending}))
+        resolved = [record for record in pending if all(record[key] in targets[key] for key in targets)]
+        orphans = len(pending) - len(resolved)
+
+        mapped = []
+        if kind.model is User:
+            resolved, mapped = self.match_existing_users(resolved)
+
+        objects = []
+        for record in resolved:
+            values = decode(kind, record)
+            for key, attname, _ in kind.foreign_keys:
+                values[attname] = targets[key][record[key]]
+            objects.append(kind.import_model(**values))
+        # Les ids générés sont renvoyés par bulk_create (SQLite >= 3.35, PostgreSQL)
+        kind.import_model.objects.bulk_create(objects)
+        mapped += [(record['id'], obj.pk) for record, obj in zip(resolved, objects)]
+        ImportedRecord.objects.bulk_create([
+            ImportedRecord(source=self.source, model=kind.name, old_id=old_id, new_id=new_id)
+            for old_id, new_id in mapped
+        ])
+        return {'importés': len(mapped), 'déjà importés': len(batch) - len(pending), 'orphelins': orphans}
+
+    def archive_imported(self, path):
+        """
+        Déplace vers l'archive les topics importés depuis archived_topics, avec leurs réponses
+        et leur date d'archivage d'origine. Sans effet sur les topics déjà déplacés (reprise).
+        """
+        field = ArchivedTopic._meta.get_field('archived_at')
+        moved = 0
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            records = (json.loads(line) for line in f)
+            while batch := list(islice(records, self.batch_size)):
+                ids = self.mapping(ARCHIVED_TOPICS.name, [record['id'] for record in batch])
+                archived_at = {
+                    ids[record['id']]: field.to_python(record['archived_at']) for record in batch if record['id'] in ids
+                }
+                with transaction.atomic():
+                    moved += move_to_archive(Topic.objects.filter(pk__in=list(archived_at)), self.batch_size)[0]
+                    ArchivedTopic.objects.bulk_update(
+                        [ArchivedTopic(pk=pk, archived_at=date) for pk, date in archived_at.items()], ['archived_at'],
+                    )
+        self.stdout.write(f"archived_topics : {moved} topics replacés dans l'archive")
+
+    def match_existing_users(self, records):
+        """Un compte dont le pseudo ou l'email existe déjà est réutilisé au lieu d'être recréé"""
+        if not records:
+            return records, []
+        usernames = {record['username'] for record in records}
+        emails = {record['email'] for record in records}
+        existing = list(
+            User.objects.filter(Q(username__in=usernames) | Q(email__in=emails)).values_list('pk', 'username', 'email')
+        )
+        by_username = {username: pk for pk, username, _ in existing}
+        by_email = {email: pk for pk, _, email in existing}
+        fresh, mapped = [], []
+        for record in records:
+            pk = by_username.get(record['username']) or by_email.get(record['email'])
+            if pk is None:
+                fresh.append(record)
+            else:
+                mapped.append((record['id'], pk))
+        return fresh, mapped
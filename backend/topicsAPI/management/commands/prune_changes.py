@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from topicsAPI import changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime les lignes du journal des modifications plus anciennes que "
+        "CHANGES_RETENTION_DAYS ; les jetons de synchronisation antérieurs deviennent invalides (410)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help="Ancienneté en jours (par défaut CHANGES_RETENTION_DAYS)")
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days is None:
+            days = getattr(settings, 'CHANGES_RETENTION_DAYS', 30)
+        with transaction.atomic():
+            deleted = changes.prune(days)
+        self.stdout.write(self.style.SUCCESS(f"{deleted} modifications de plus de {days} jours supprimées"))
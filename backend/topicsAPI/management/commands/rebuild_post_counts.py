@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from authentificationAPI.models import User
+from topicsAPI.counters import rebuild_post_counts, stale_post_counts
+
+
+class Command(BaseCommand):
+    help = "Recalcule (ou vérifie avec --check) le nombre de topics (nombre_posts) de chaque utilisateur"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Signale les écarts sans rien modifier")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Nombre d'utilisateurs traités par transaction")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        check = options['check']
+        last_id = 0
+        stale = 0
+        processed = 0
+
+        while True:
+            ids = list(
+                User.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            batch = User.objects.filter(pk__gte=ids[0], pk__lte=ids[-1])
+            with transaction.atomic():
+                stale_ids = list(stale_post_counts(batch).values_list('pk', flat=True))
+                if stale_ids and not check:
+                    rebuild_post_counts(User.objects.filter(pk__in=stale_ids))
+            stale += len(stale_ids)
+            processed += len(ids)
+            last_id = ids[-1]
+
+        if check and stale:
+            raise CommandError(f"{processed} utilisateurs vérifiés, {stale} avec un nombre de posts incorrect")
+        if check:
+            self.stdout.write(self.style.SUCCESS(f"{processed} utilisateurs vérifiés, aucun écart"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{processed} utilisateurs vérifiés, {stale} corrigés"))
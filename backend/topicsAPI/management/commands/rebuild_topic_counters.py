@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from topicsAPI.counters import rebuild_reply_counters, stale_topics
+from topicsAPI.models import Topic
+
+
+class Command(BaseCommand):
+    help = "Recalcule (ou vérifie avec --check) les compteurs reply_count / last_reply_at des topics"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Signale les écarts sans rien modifier")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Nombre de topics traités par transaction")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        check = options['check']
+        last_id = 0
+        stale = 0
+        processed = 0
+
+        # Parcours par tranches d'id pour garder des transactions courtes sur les grosses tables
+        while True:
+            ids = list(
+                Topic.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            batch = Topic.objects.filter(pk__gte=ids[0], pk__lte=ids[-1])
+            with transaction.atomic():
+                stale_ids = list(stale_topics(batch).values_list('pk', flat=True))
+                if stale_ids and not check:
+                    rebuild_reply_counters(Topic.objects.filter(pk__in=stale_ids))
+            stale += len(stale_ids)
+            processed += len(ids)
+            last_id = ids[-1]
+
+        if check and stale:
+            raise CommandError(f"{processed} topics vérifiés, {stale} avec des compteurs incorrects")
+        if check:
+            self.stdout.write(self.style.SUCCESS(f"{processed} topics vérifiés, aucun écart"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{processed} topics vérifiés, {stale} corrigés"))
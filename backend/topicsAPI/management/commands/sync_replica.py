@@ -0,0 +1,40 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from gestionAPI.db_router import REPLICA
+
+
+class Command(BaseCommand):
+    help = (
+        "Copie la base SQLite principale vers le réplica (DJANGO_DB_REPLICA) pour tester "
+        "le routage lecture / écriture en local ; --interval pour recopier en boucle"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Secondes entre deux copies (0 = une seule copie)")
+
+    def handle(self, *args, **options):
+        if REPLICA not in settings.DATABASES:
+            raise CommandError("Aucun réplica configuré : définir DJANGO_DB_REPLICA")
+        primary, replica = settings.DATABASES['default'], settings.DATABASES[REPLICA]
+        if not (primary['ENGINE'].endswith('sqlite3') and replica['ENGINE'].endswith('sqlite3')):
+            raise CommandError("sync_replica ne gère que SQLite ; utiliser la réplication du serveur")
+
+        while True:
+            started = time.monotonic()
+            # API de sauvegarde en ligne de SQLite : copie cohérente sans bloquer les écrivains
+            source = sqlite3.connect(primary['NAME'])
+            target = sqlite3.connect(replica['NAME'])
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(f"Réplica synchronisé en {(time.monotonic() - started) * 1000:.0f} ms")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topicsAPI', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['-is_pinned', '-created_at', '-id'], name='topic_list_order_idx'),
+        ),
+    ]
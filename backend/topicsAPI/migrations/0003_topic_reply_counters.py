@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:21
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_reply_counters(apps, schema_editor):
+    Topic = apps.get_model('topicsAPI', 'Topic')
+    Reply = apps.get_model('topicsAPI', 'Reply')
+    replies = Reply.objects.filter(topic_id=OuterRef('pk')).order_by().values('topic_id')
+    Topic.objects.update(
+        reply_count=Coalesce(Subquery(replies.annotate(n=Count('id')).values('n')), 0),
+        last_reply_at=Subquery(replies.annotate(last=Max('created_at')).values('last')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topicsAPI', '0002_topic_list_order_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topic',
+            name='last_reply_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Dernière réponse'),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Nombre de réponses'),
+        ),
+        migrations.RunPython(backfill_reply_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topicsAPI', '0003_topic_reply_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reply',
+            index=models.Index(fields=['topic', 'created_at', 'id'], name='reply_topic_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['category', '-is_pinned', '-created_at', '-id'], name='topic_category_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['is_closed', '-is_pinned', '-created_at', '-id'], name='topic_closed_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['category', 'is_closed', '-is_pinned', '-created_at', '-id'], name='topic_cat_closed_order_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topicsAPI', '0004_topic_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=36, verbose_name="Export d'origine")),
+                ('model', models.CharField(max_length=20, verbose_name="Type d'objet")),
+                ('old_id', models.BigIntegerField(verbose_name="Id d'origine")),
+                ('new_id', models.BigIntegerField(verbose_name='Id importé')),
+            ],
+            options={
+                'verbose_name': 'Objet importé',
+                'verbose_name_plural': 'Objets importés',
+                'constraints': [models.UniqueConstraint(fields=('source', 'model', 'old_id'), name='imported_record_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topicsAPI', '0005_importedrecord'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTopic',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200, verbose_name='Titre')),
+                ('content', models.TextField(verbose_name='Contenu')),
+                ('category', models.CharField(choices=[('general', 'Général'), ('questions', 'Questions'), ('aide', 'Aide'), ('annonces', 'Annonces')], default='general', max_length=20, verbose_name='Catégorie')),
+                ('created_at', models.DateTimeField(verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(verbose_name='Date de modification')),
+                ('views', models.IntegerField(default=0, verbose_name='Nombre de vues')),
+                ('is_pinned', models.BooleanField(default=False, verbose_name='Épinglé')),
+                ('is_closed', models.BooleanField(default=True, verbose_name='Fermé')),
+                ('reply_count', models.PositiveIntegerField(default=0, verbose_name='Nombre de réponses')),
+                ('last_reply_at', models.DateTimeField(blank=True, null=True, verbose_name='Dernière réponse')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name="Date d'archivage")),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_topics', to=settings.AUTH_USER_MODEL, verbose_name='Auteur')),
+            ],
+            options={
+                'verbose_name': 'Topic archivé',
+                'verbose_name_plural': 'Topics archivés',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedReply',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('content', models.TextField(verbose_name='Contenu')),
+                ('created_at', models.DateTimeField(verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(verbose_name='Date de modification')),
+                ('likes', models.IntegerField(default=0, verbose_name='Nombre de likes')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_replies', to=settings.AUTH_USER_MODEL, verbose_name='Auteur')),
+                ('topic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='topicsAPI.archivedtopic', verbose_name='Topic')),
+            ],
+            options={
+                'verbose_name': 'Réponse archivée',
+                'verbose_name_plural': 'Réponses archivées',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['topic', 'created_at', 'id'], name='archived_reply_order_idx')],
+            },
+        ),
+    ]
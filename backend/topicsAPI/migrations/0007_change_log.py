@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topicsAPI', '0006_archived_topics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('topic', 'Topic'), ('reply', 'Réponse')], max_length=5, verbose_name="Type d'objet")),
+                ('object_id', models.BigIntegerField(verbose_name="Id de l'objet")),
+                ('topic_id', models.BigIntegerField(verbose_name='Id du topic')),
+                ('action', models.CharField(choices=[('updated', 'Créé ou modifié'), ('deleted', 'Supprimé')], max_length=7, verbose_name='Action')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date')),
+            ],
+            options={
+                'verbose_name': 'Modification',
+                'verbose_name_plural': 'Modifications',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topicsAPI', '0007_change_log'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['author', '-is_pinned', '-created_at', '-id'], name='topic_author_order_idx'),
+        ),
+    ]
@@ -20,6 +20,9 @@ class Topic(models.Model):
     views = models.IntegerField(default=0, verbose_name="Nombre de vues")
     is_pinned = models.BooleanField(default=False, verbose_name="Épinglé")
     is_closed = models.BooleanField(default=False, verbose_name="Fermé")
+    # Compteurs dénormalisés, tenus à jour par topicsAPI.counters
+    reply_count = models.PositiveIntegerField(default=0, verbose_name="Nombre de réponses")
+    last_reply_at = models.DateTimeField(blank=True, null=True, verbose_name="Dernière réponse")
 
     def __str__(self):
         return self.title
@@ -28,11 +31,20 @@ class Topic(models.Model):
         verbose_name = "Topic"
         verbose_name_plural = "Topics"
         ordering = ['-is_pinned', '-created_at']
-
-    @property
-    def reply_count(self):
-        """Retourne le nombre de réponses"""
-        return self.replies.count()
+        indexes = [
+            # Couvre le tri de la liste et la pagination par curseur
+            models.Index(fields=['-is_pinned', '-created_at', '-id'], name='topic_list_order_idx'),
+            # Listes filtrées (?category=, ?is_closed=) : égalité sur le filtre puis même ordre.
+            # ?is_pinned= est servi par topic_list_order_idx, dont c'est la première colonne
+            models.Index(fields=['category', '-is_pinned', '-created_at', '-id'], name='topic_category_order_idx'),
+            models.Index(fields=['is_closed', '-is_pinned', '-created_at', '-id'], name='topic_closed_order_idx'),
+            models.Index(
+                fields=['category', 'is_closed', '-is_pinned', '-created_at', '-id'],
+                name='topic_cat_closed_order_idx',
+            ),
+            # Topics d'un membre (?author=, page de profil)
+            models.Index(fields=['author', '-is_pinned', '-created_at', '-id'], name='topic_author_order_idx'),
+        ]
 
 
 class Reply(models.Model):
@@ -51,3 +63,107 @@ class Reply(models.Model):
         verbose_name = "Réponse"
         verbose_name_plural = "Réponses"
         ordering = ['created_at']
+        indexes = [
+            # Réponses d'un topic dans l'ordre de ReplyPagination (created_at, id)
+            models.Index(fields=['topic', 'created_at', 'id'], name='reply_topic_order_idx'),
+        ]
+
+
+class ArchivedTopic(models.Model):
+    """
+    Topic fermé et inactif déplacé hors de la table chaude par topicsAPI.archive.
+    Même id que le topic d'origine : le détail /topics/<id>/ le retrouve tel quel.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200, verbose_name="Titre")
+    content = models.TextField(verbose_name="Contenu")
+    category = models.CharField(max_length=20, choices=Topic.CATEGORY_CHOICES, default='general', verbose_name="Catégorie")
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_topics', verbose_name="Auteur")
+    created_at = models.DateTimeField(verbose_name="Date de création")
+    updated_at = models.DateTimeField(verbose_name="Date de modification")
+    views = models.IntegerField(default=0, verbose_name="Nombre de vues")
+    is_pinned = models.BooleanField(default=False, verbose_name="Épinglé")
+    is_closed = models.BooleanField(default=True, verbose_name="Fermé")
+    reply_count = models.PositiveIntegerField(default=0, verbose_name="Nombre de réponses")
+    last_reply_at = models.DateTimeField(blank=True, null=True, verbose_name="Dernière réponse")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Date d'archivage")
+
+    def __str__(self):
+        return self.title
+
+    class Meta:
+        verbose_name = "Topic archivé"
+        verbose_name_plural = "Topics archivés"
+        ordering = ['-created_at']
+
+
+class ArchivedReply(models.Model):
+    """Réponse d'un topic archivé, même id que la réponse d'origine"""
+    id = models.BigIntegerField(primary_key=True)
+    topic = models.ForeignKey(ArchivedTopic, on_delete=models.CASCADE, related_name='replies', verbose_name="Topic")
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_replies', verbose_name="Auteur")
+    content = models.TextField(verbose_name="Contenu")
+    created_at = models.DateTimeField(verbose_name="Date de création")
+    updated_at = models.DateTimeField(verbose_name="Date de modification")
+    likes = models.IntegerField(default=0, verbose_name="Nombre de likes")
+
+    def __str__(self):
+        return f"Réponse archivée {self.pk} sur {self.topic_id}"
+
+    class Meta:
+        verbose_name = "Réponse archivée"
+        verbose_name_plural = "Réponses archivées"
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['topic', 'created_at', 'id'], name='archived_reply_order_idx'),
+        ]
+
+
+class Change(models.Model):
+    """
+    Journal des modifications des topics et réponses, lu par le flux /topics/changes/.
+    L'id, croissant, sert de jeton de synchronisation : un client relit les lignes
+    d'id supérieur à son jeton, par la clé primaire.
+    """
+    TOPIC = 'topic'
+    REPLY = 'reply'
+    KIND_CHOICES = [(TOPIC, 'Topic'), (REPLY, 'Réponse')]
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTION_CHOICES = [(UPDATED, 'Créé ou modifié'), (DELETED, 'Supprimé')]
+
+    kind = models.CharField(max_length=5, choices=KIND_CHOICES, verbose_name="Type d'objet")
+    object_id = models.BigIntegerField(verbose_name="Id de l'objet")
+    # Topic concerné (l'objet lui-même pour un topic) : ses compteurs changent avec ses réponses
+    topic_id = models.BigIntegerField(verbose_name="Id du topic")
+    action = models.CharField(max_length=7, choices=ACTION_CHOICES, verbose_name="Action")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date")
+
+    def __str__(self):
+        return f"{self.pk} {self.kind} {self.object_id} {self.action}"
+
+    class Meta:
+        verbose_name = "Modification"
+        verbose_name_plural = "Modifications"
+
+
+class ImportedRecord(models.Model):
+    """
+    Correspondance ancien id -> nouvel id d'un objet importé par `manage.py import_forum`.
+    Écrite dans la même transaction que l'objet : une importation interrompue reprend
+    exactement où elle s'est arrêtée, et les clés étrangères sont remappées par lot.
+    """
+    source = models.CharField(max_length=36, verbose_name="Export d'origine")
+    model = models.CharField(max_length=20, verbose_name="Type d'objet")
+    old_id = models.BigIntegerField(verbose_name="Id d'origine")
+    new_id = models.BigIntegerField(verbose_name="Id importé")
+
+    def __str__(self):
+        return f"{self.source} {self.model} {self.old_id} -> {self.new_id}"
+
+    class Meta:
+        verbose_name = "Objet importé"
+        verbose_name_plural = "Objets importés"
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'model', 'old_id'], name='imported_record_unique'),
+        ]
@@ -0,0 +1,17 @@
+from django.conf import settings
+
+from gestionAPI.pagination import KeysetPagination
+
+
+class TopicPagination(KeysetPagination):
+    """Pagination de la liste des topics, dans l'ordre de Topic.Meta.ordering (+ id pour départager)"""
+    ordering = ('-is_pinned', '-created_at', '-id')
+    page_size = getattr(settings, 'TOPICS_PAGE_SIZE', 20)
+    max_page_size = getattr(settings, 'TOPICS_MAX_PAGE_SIZE', 100)
+
+
+class ReplyPagination(KeysetPagination):
+    """Pagination des réponses d'un topic, de la plus ancienne à la plus récente"""
+    ordering = ('created_at', 'id')
+    page_size = getattr(settings, 'REPLIES_PAGE_SIZE', 50)
+    max_page_size = getattr(settings, 'REPLIES_MAX_PAGE_SIZE', 200)
@@ -0,0 +1,104 @@
+"""
+Publication / abonnement en mémoire pour le flux des réponses (voir streaming.py).
+
+Le broker est choisi par le réglage REPLY_STREAM_BROKER (chemin d'une classe) afin de
+pouvoir le remplacer par un backend partagé entre processus (Redis, ...) en gardant
+la même interface : publish(channel, message) et subscribe(channel).
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+# Message placé dans la file d'un abonné qui a débordé
+OVERFLOW = object()
+
+
+class Subscription:
+    """
+    File bornée d'un abonné, consommée depuis sa boucle asyncio.
+    Si l'abonné ne suit pas, la file déborde : elle est vidée et ne contient plus que
+    OVERFLOW. L'abonné doit alors se reconnecter et relire la suite depuis la base,
+    au lieu de faire grossir la mémoire.
+    """
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def deliver(self, message):
+        # Appelé dans la boucle de l'abonné (via call_soon_threadsafe)
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+    async def get(self, timeout=None):
+        """Message suivant, ou None après `timeout` secondes sans message"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InMemoryBroker:
+    """Broker propre au processus : suffisant avec un seul worker ASGI"""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, message):
+        """Utilisable depuis n'importe quel thread (vues synchrones comprises)"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # Boucle fermée : l'abonné est parti
+                self.unsubscribe(subscription)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        broker_class = import_string(getattr(settings, 'REPLY_STREAM_BROKER', 'topicsAPI.pubsub.InMemoryBroker'))
+        _broker = broker_class(queue_size=getattr(settings, 'REPLY_STREAM_QUEUE_SIZE', 100))
+    return _broker
+
+
+def topic_channel(topic_id):
+    return f'topic:{topic_id}:replies'
@@ -1,5 +1,7 @@
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Topic, Reply
+from .models import Topic, Reply, ArchivedTopic
+from .pagination import ReplyPagination
 
 
 class ReplySerializer(serializers.ModelSerializer):
@@ -13,23 +15,41 @@ class ReplySerializer(serializers.ModelSerializer):
 
 
 class TopicSerializer(serializers.ModelSerializer):
-    """Serializer complet pour un topic avec ses réponses"""
+    """Serializer complet pour un topic avec la première page de ses réponses"""
     author_username = serializers.CharField(source='author.username', read_only=True)
     reply_count = serializers.IntegerField(read_only=True)
-    replies = ReplySerializer(many=True, read_only=True)
+    is_archived = serializers.SerializerMethodField()
+    replies = serializers.SerializerMethodField()
 
     class Meta:
         model = Topic
-        fields = ['id', 'title', 'content', 'category', 'author', 'author_username', 'created_at', 'updated_at', 'views', 'is_pinned', 'is_closed', 'reply_count', 'replies']
-        read_only_fields = ['id', 'author', 'created_at', 'updated_at', 'views']
+        fields = ['id', 'title', 'content', 'category', 'author', 'author_username', 'created_at', 'updated_at', 'views', 'is_pinned', 'is_closed', 'is_archived', 'reply_count', 'last_reply_at', 'replies']
+        read_only_fields = ['id', 'author', 'created_at', 'updated_at', 'views', 'last_reply_at']
+
+    def get_is_archived(self, obj):
+        """Vrai pour un topic déplacé dans l'archive (lecture seule, voir archive.py)"""
+        return isinstance(obj, ArchivedTopic)
+
+    def get_replies(self, obj):
+        """Première page des réponses ; la suite se lit sur /topics/<id>/replies/?cursor="""
+        paginator = ReplyPagination()
+        url = reverse('reply-list-create', kwargs={'topic_id': obj.pk})
+        page = paginator.paginate_first_page(
+            obj.replies.select_related('author'), self.context.get('request'), url
+        )
+        return paginator.get_paginated_data(ReplySerializer(page, many=True, context=self.context).data)
 
 
 class TopicListSerializer(serializers.ModelSerializer):
     """Serializer simplifié pour la liste des topics (sans les réponses)"""
     author_username = serializers.CharField(source='author.username', read_only=True)
     reply_count = serializers.IntegerField(read_only=True)
+    is_archived = serializers.SerializerMethodField()
 
     class Meta:
         model = Topic
-        fields = ['id', 'title', 'category', 'author', 'author_username', 'created_at', 'updated_at', 'views', 'is_pinned', 'is_closed', 'reply_count']
-        read_only_fields = ['id', 'author', 'created_at', 'updated_at', 'views']
+        fields = ['id', 'title', 'category', 'author', 'author_username', 'created_at', 'updated_at', 'views', 'is_pinned', 'is_closed', 'is_archived', 'reply_count', 'last_reply_at']
+        read_only_fields = ['id', 'author', 'created_at', 'updated_at', 'views', 'last_reply_at']
+
+    def get_is_archived(self, obj):
+        return isinstance(obj, ArchivedTopic)
@@ -0,0 +1,90 @@
+"""
+Flux Server-Sent Events des nouvelles réponses d'un topic : GET /topics/<id>/stream/
+
+Nécessite un serveur ASGI (uvicorn, daphne) pour tenir de nombreuses connexions
+ouvertes sans bloquer de worker : hors ASGI (REPLY_STREAM_ENABLED = False), 404. Le client (EventSource) reprend automatiquement après
+une coupure grâce à l'en-tête Last-Event-ID (ou ?last_id=) : les réponses manquées sont
+relues en base, puis le flux continue avec les réponses publiées par ReplyListCreateView.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.utils.encoders import JSONEncoder
+
+from gestionAPI.batch import to_id
+
+from .models import Topic, Reply
+from .pubsub import OVERFLOW, get_broker, topic_channel
+from .serializers import ReplySerializer
+
+
+def format_event(reply):
+    data = json.dumps(reply, cls=JSONEncoder, ensure_ascii=False)
+    return f"id: {reply['id']}\nevent: reply\ndata: {data}\n\n"
+
+
+def parse_last_id(request):
+    raw = request.headers.get('Last-Event-ID') or request.GET.get('last_id')
+    return to_id(raw.strip()) if raw else None
+
+
+@sync_to_async
+def replies_after(topic_id, last_id, limit):
+    queryset = Reply.objects.filter(topic_id=topic_id, id__gt=last_id).select_related('author').order_by('id')
+    return ReplySerializer(queryset[:limit], many=True).data
+
+
+@sync_to_async
+def last_reply_id(topic_id):
+    return Reply.objects.filter(topic_id=topic_id).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+async def reply_events(subscription, topic_id, last_id):
+    heartbeat = getattr(settings, 'REPLY_STREAM_HEARTBEAT', 15)
+    backlog_limit = getattr(settings, 'REPLY_STREAM_BACKLOG', 500)
+    try:
+        # Indique au client d'attendre 3 s avant de se reconnecter
+        yield 'retry: 3000\n\n'
+        # Rattrapage par pages jusqu'à la dernière réponse en base : l'abonnement est déjà
+        # actif, rien n'est perdu entre les deux
+        while True:
+            backlog = await replies_after(topic_id, last_id, backlog_limit)
+            for reply in backlog:
+                last_id = reply['id']
+                yield format_event(reply)
+            if len(backlog) < backlog_limit:
+                break
+        while True:
+            message = await subscription.get(timeout=heartbeat)
+            if message is OVERFLOW:
+                # Client trop lent : on ferme, il reprendra depuis Last-Event-ID
+                return
+            if message is None:
+                yield ': keep-alive\n\n'
+            elif message['id'] > last_id:
+                last_id = message['id']
+                yield format_event(message)
+    finally:
+        subscription.close()
+
+
+@require_GET
+async def reply_stream(request, topic_id):
+    if not getattr(settings, 'REPLY_STREAM_ENABLED', False):
+        raise Http404("Flux désactivé : serveur non ASGI")
+    if not await Topic.objects.filter(pk=topic_id).aexists():
+        raise Http404("Topic introuvable")
+    subscription = get_broker().subscribe(topic_channel(topic_id))
+    last_id = parse_last_id(request)
+    if last_id is None:
+        # Nouveau client : seulement les réponses à venir
+        last_id = await last_reply_id(topic_id)
+    response = StreamingHttpResponse(
+        reply_events(subscription, topic_id, last_id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,3 +1,833 @@
-from django.test import TestCase
+import datetime
+import decimal
+import gzip
+import json
+import tempfile
+import threading
+import uuid
+import warnings
+import zoneinfo
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentificationAPI.models import User
+from authentificationAPI.pagination import UserPagination
+from gestionAPI import compression, renderers
+from gestionAPI.compression import choose_encoding
+from gestionAPI.db_router import PrimaryReplicaRouter, ReplicaRoutingMiddleware, pin
+from gestionAPI.response_cache import ResponseCache
+from searchAPI import stats, versions
+from searchAPI.models import ForumCounter
+from . import changes
+from .archive import archive_topics
+from .counters import rebuild_post_counts, rebuild_reply_counters, stale_post_counts
+from .models import Topic, Reply, ArchivedTopic, ArchivedReply, Change, ImportedRecord
+from .pubsub import OVERFLOW
+from .streaming import reply_events
+from .viewcounter import ViewCountBuffer, count_view, record_view
+
+
+def make_user(username='alice'):
+    return User.objects.create_user(username=username, email=f'{username}@example.com', password='secret-password')
+
+
+class TopicBatchTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.topic = Topic.objects.create(title='Premier', content='x', author=make_user())
+
+    def test_returns_found_and_missing_ids(self):
+        response = self.client.get(f'/topics/batch/?ids={self.topic.pk},999')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data['results']), [str(self.topic.pk)])
+        self.assertEqual(response.data['errors'], {'999': 'Introuvable'})
+
+    def test_rejects_non_ascii_digits(self):
+        self.assertEqual(self.client.get('/topics/batch/?ids=1,²').status_code, 400)
+        self.assertEqual(self.client.get('/topics/batch/?ids=٣').status_code, 400)
+
+    def test_rejects_ids_beyond_bigint(self):
+        self.assertEqual(self.client.get(f'/topics/batch/?ids={2 ** 63}').status_code, 400)
+        self.assertEqual(self.client.get('/topics/batch/?ids=' + '9' * 5000).status_code, 400)
+        self.assertEqual(self.client.get(f'/topics/batch/?ids={2 ** 63 - 1}').status_code, 200)
+
+    def test_keeps_order_and_drops_duplicates(self):
+        other = Topic.objects.create(title='Second', content='x', author=self.topic.author)
+        response = self.client.get(f'/topics/batch/?ids={other.pk}, {self.topic.pk},{other.pk}')
+        self.assertEqual(list(response.data['results']), [str(other.pk), str(self.topic.pk)])
+        self.assertEqual(response.data['errors'], {})
+
+    def test_requires_ids(self):
+        for url in ('/topics/batch/', '/topics/batch/?ids=', '/topics/batch/?ids=,,'):
+            self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get('/topics/batch/?ids=1,-2').status_code, 400)
+
+    @override_settings(BATCH_MAX_IDS=3)
+    def test_limits_the_number_of_ids(self):
+        self.assertEqual(self.client.get('/topics/batch/?ids=1,2,3,1').status_code, 200)
+        self.assertEqual(self.client.get('/topics/batch/?ids=1,2,3,4').status_code, 400)
+
+    def test_single_query_for_many_ids(self):
+        ids = ','.join(str(pk) for pk in [self.topic.pk, *range(1000, 1050)])
+        # Topics + archives pour les ids manquants : deux requêtes quel que soit le nombre d'ids
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/topics/batch/?ids={ids}')
+        self.assertEqual(len(response.data['errors']), 50)
+
+    def test_falls_back_to_archives(self):
+        Topic.objects.filter(pk=self.topic.pk).update(created_at=timezone.now() - timedelta(days=400))
+        archive_topics([self.topic.pk], days=365)
+        response = self.client.get(f'/topics/batch/?ids={self.topic.pk}')
+        self.assertEqual(list(response.data['results']), [str(self.topic.pk)])
+
+
+class TopicCursorPaginationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        author = make_user()
+        self.topics = [Topic.objects.create(title=f'Topic {i}', content='x', author=author) for i in range(7)]
+        # Dates identiques : l'id départage, sans doublon ni trou entre les pages
+        Topic.objects.update(created_at=self.topics[0].created_at)
+        Topic.objects.filter(pk=self.topics[3].pk).update(is_pinned=True)
+
+    def read_all(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [topic['id'] for topic in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_pages_follow_list_order_without_gaps(self):
+        expected = list(Topic.objects.order_by('-is_pinned', '-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(expected[0], self.topics[3].pk)
+        self.assertEqual(self.read_all('/topics/?page_size=2'), expected)
+
+    def test_author_filter_pages_through_their_topics(self):
+        other = make_user('bob')
+        mine = [Topic.objects.create(title=f'Bob {i}', content='x', author=other).pk for i in range(3)]
+        self.assertEqual(sorted(self.read_all(f'/topics/?author={other.pk}&page_size=2')), mine)
+        self.assertEqual(self.client.get('/topics/?author=abc').status_code, 400)
+
+    def test_invalid_cursor_is_rejected(self):
+        for cursor in ('!!!', 'W10', 'eyJ4IjoxfQ'):
+            self.assertEqual(self.client.get(f'/topics/?cursor={cursor}').status_code, 404)
+
+
+@mock.patch.object(UserPagination, 'max_page_size', 4)
+@mock.patch.object(UserPagination, 'page_size', 3)
+class UserCursorPaginationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.bulk_create([User(username=f'membre{i}', email=f'membre{i}@example.com') for i in range(7)])
+        # Inscriptions simultanées : l'id départage
+        User.objects.update(date_inscription=timezone.now())
+
+    def read_all(self, url):
+        ids, sizes = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [user['id'] for user in response.data['results']]
+            sizes.append(len(response.data['results']))
+            url = response.data['next']
+        return ids, sizes
+
+    def test_pages_follow_list_order_without_gaps(self):
+        expected = list(User.objects.order_by('-date_inscription', '-id').values_list('id', flat=True))
+        self.assertEqual(self.read_all('/authentification/user/'), (expected, [3, 3, 1]))
+
+    def test_page_size_is_clamped(self):
+        self.assertEqual(self.read_all('/authentification/user/?page_size=2')[1], [2, 2, 2, 1])
+        self.assertEqual(self.read_all('/authentification/user/?page_size=1000')[1], [4, 3])
+        for size in ('0', '-5', 'abc', ''):
+            self.assertEqual(self.read_all(f'/authentification/user/?page_size={size}')[1], [3, 3, 1])
+
+    def test_stream_returns_every_member(self):
+        response = self.client.get('/authentification/user/?stream=true')
+        self.assertEqual(len(json.loads(b''.join(response.streaming_content))['results']), 7)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    data = {
+        'utc': datetime.datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=datetime.timezone.utc),
+        'zone': datetime.datetime(2024, 1, 2, tzinfo=zoneinfo.ZoneInfo('UTC')),
+        'paris': datetime.datetime(2024, 7, 1, tzinfo=zoneinfo.ZoneInfo('Europe/Paris')),
+        'naive': datetime.datetime(2024, 1, 2, 3, 4, 5),
+        'date': datetime.date(2024, 1, 2),
+        'decimal': decimal.Decimal('1.10'),
+        'uuid': uuid.UUID(int=5),
+        'text': 'é\u2028',
+        1: 'clé entière',
+    }
+    expected = {
+        'utc': '2024-01-02T03:04:05.123456Z',
+        'zone': '2024-01-02T00:00:00Z',
+        'paris': '2024-07-01T00:00:00+02:00',
+        'naive': '2024-01-02T03:04:05',
+        'date': '2024-01-02',
+        'decimal': 1.1,
+        'uuid': '00000000-0000-0000-0000-000000000005',
+        'text': 'é\u2028',
+        '1': 'clé entière',
+    }
+
+    def test_same_json_with_and_without_orjson(self):
+        self.assertIsNotNone(renderers.orjson)
+        with_orjson = renderers.dumps(self.data)
+        with mock.patch.object(renderers, 'orjson', None):
+            without_orjson = renderers.dumps(self.data)
+        self.assertEqual(with_orjson, without_orjson)
+        self.assertEqual(json.loads(with_orjson), self.expected)
+        # Séparateurs de ligne échappés comme le fait DRF
+        self.assertIn(b'\\u2028', with_orjson)
+
+    def test_renderer_matches_drf(self):
+        from rest_framework.renderers import JSONRenderer
+        data = {key: value for key, value in self.data.items() if isinstance(key, str)}
+        self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(renderers.FastJSONRenderer().render(None), b'')
+
+
+class CompressionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        author = make_user()
+        for i in range(10):
+            Topic.objects.create(title=f'Topic compressé {i}', content='x', author=author)
+        self.client = APIClient()
+
+    def test_choose_encoding(self):
+        with mock.patch.object(compression, 'brotli', object()):
+            self.assertEqual(choose_encoding('gzip, deflate, br'), 'br')
+            self.assertEqual(choose_encoding('gzip'), 'gzip')
+        with mock.patch.object(compression, 'brotli', None):
+            self.assertEqual(choose_encoding('gzip, deflate, br'), 'gzip')
+        self.assertIsNone(choose_encoding('deflate'))
+        self.assertIsNone(choose_encoding(''))
+
+    def test_gzip_response_and_vary(self):
+        plain = self.client.get('/topics/')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        cache.clear()
+        response = self.client.get('/topics/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertEqual(json.loads(gzip.decompress(response.content)), json.loads(plain.content))
+
+    def test_brotli_preferred_when_available(self):
+        fake = mock.Mock()
+        fake.compress.return_value = b'br'
+        with mock.patch.object(compression, 'brotli', fake):
+            response = self.client.get('/topics/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual((response['Content-Encoding'], response.content), ('br', b'br'))
+
+    def test_writes_are_not_compressed(self):
+        user = make_user('bob')
+        self.client.force_authenticate(user)
+        response = self.client.post(
+            '/topics/', {'title': 'Écriture', 'content': 'x' * 500, 'category': 'general'},
+            HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Content-Encoding', response)
+
+
+@override_settings(STREAM_CHUNK_SIZE=3)
+class StreamingListTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        author = make_user()
+        for i in range(8):
+            Topic.objects.create(title=f'Topic {i}', content='x', author=author)
+        Topic.objects.filter(title='Topic 5').update(is_pinned=True)
+        self.topic = Topic.objects.first()
+        for i in range(7):
+            Reply.objects.create(topic=self.topic, author=author, content=f'Réponse {i}')
+        self.client = APIClient()
+
+    def read_stream(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_same_json_as_paginated_list(self):
+        for url in ('/topics/', f'/topics/{self.topic.pk}/replies/'):
+            paginated = self.client.get(url + '?page_size=100').json()
+            streamed = self.read_stream(url + '?stream=true')
+            self.assertEqual(streamed, paginated)
+            self.assertEqual(len(streamed['results']), Topic.objects.count() if url == '/topics/' else 7)
+
+    def test_filters_apply_to_stream(self):
+        other = make_user('bob')
+        Topic.objects.create(title='Autre', content='x', author=other)
+        streamed = self.read_stream(f'/topics/?stream=true&author={other.pk}')
+        self.assertEqual([topic['title'] for topic in streamed['results']], ['Autre'])
+
+    def test_empty_stream(self):
+        Reply.objects.all().delete()
+        self.assertEqual(
+            self.read_stream(f'/topics/{self.topic.pk}/replies/?stream=true'), {'next': None, 'results': []}
+        )
+
+
+REPLICA_DATABASES = {
+    **settings.DATABASES,
+    'replica': {**settings.DATABASES['default'], 'NAME': 'replica.sqlite3', 'TEST': {'MIRROR': 'default'}},
+}
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def override_databases(self, databases):
+        # Le routeur ne fait que relire DATABASES : les connexions ouvertes ne sont pas touchées
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', 'Overriding setting DATABASES')
+            self.enterContext(override_settings(DATABASES=databases))
+
+    def setUp(self):
+        cache.clear()
+        self.override_databases(REPLICA_DATABASES)
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        self.status = 200
+        self.middleware = ReplicaRoutingMiddleware(self.view)
+
+    def view(self, request):
+        # Base choisie pendant le traitement, pour une lecture et une écriture
+        self.routed = (self.router.db_for_read(Topic), self.router.db_for_write(Topic))
+        return HttpResponse(status=self.status)
+
+    def request(self, method='get', ip='10.0.0.1', **extra):
+        self.middleware(getattr(self.factory, method)('/topics/', REMOTE_ADDR=ip, **extra))
+        return self.routed
+
+    def test_reads_on_replica_writes_on_primary(self):
+        self.assertEqual(self.request(), ('replica', 'default'))
+        self.assertEqual(self.request('post'), ('default', 'default'))
+        # Hors requête (commandes, threads) : tout sur la base principale
+        self.assertEqual(self.router.db_for_read(Topic), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'topicsAPI'))
+        self.assertTrue(self.router.allow_migrate('default', 'topicsAPI'))
+
+    def test_reads_stick_to_primary_after_write(self):
+        self.request('post')
+        self.assertEqual(self.request()[0], 'default')
+        self.assertEqual(self.request(ip='10.0.0.2')[0], 'replica')
+        with override_settings(DATABASE_REPLICA_PIN_SECONDS=0):
+            cache.clear()
+            pin(self.factory.get('/', REMOTE_ADDR='10.0.0.1'))
+            self.assertEqual(self.request()[0], 'replica')
+
+    def test_pin_follows_the_token(self):
+        self.request('post', ip='10.0.0.1', HTTP_AUTHORIZATION='Token abc')
+        self.assertEqual(self.request(ip='10.0.0.9', HTTP_AUTHORIZATION='Token abc')[0], 'default')
+        self.assertEqual(self.request(ip='10.0.0.9', HTTP_AUTHORIZATION='Token xyz')[0], 'replica')
+
+    def test_failed_write_does_not_pin(self):
+        self.status = 400
+        self.request('post')
+        self.status = 200
+        self.assertEqual(self.request()[0], 'replica')
+
+    def test_async_middleware(self):
+        async def view(request):
+            return self.view(request)
+
+        middleware = ReplicaRoutingMiddleware(view)
+        async_to_sync(middleware)(self.factory.get('/topics/', REMOTE_ADDR='10.0.0.1'))
+        self.assertEqual(self.routed[0], 'replica')
+        async_to_sync(middleware)(self.factory.post('/topics/', REMOTE_ADDR='10.0.0.1'))
+        async_to_sync(middleware)(self.factory.get('/topics/', REMOTE_ADDR='10.0.0.1'))
+        self.assertEqual(self.routed[0], 'default')
+
+    def test_disabled_without_replica(self):
+        self.override_databases({'default': settings.DATABASES['default']})
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaRoutingMiddleware(self.view)
+
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = make_user()
+        self.topic = Topic.objects.create(title='Premier', content='x', author=self.author)
+        self.client = APIClient()
+
+    def test_matching_etag_gets_304(self):
+        for url in ('/topics/', f'/topics/{self.topic.pk}/', f'/topics/{self.topic.pk}/replies/'):
+            etag = self.client.get(url)['ETag']
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response['ETag'], etag)
+
+    def test_writes_change_the_etag(self):
+        url = f'/topics/{self.topic.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.client.force_authenticate(self.author)
+        self.assertEqual(self.client.patch(url, {'title': 'Renommé'}).status_code, 200)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['title'], 'Renommé')
+
+        list_etag = self.client.get('/topics/')['ETag']
+        self.client.post(f'/topics/{self.topic.pk}/replies/', {'content': 'Réponse'})
+        self.assertEqual(self.client.get('/topics/', HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+
+    def version_rows(self, *names):
+        return set(ForumCounter.objects.filter(
+            name__in=[versions.PREFIX + name for name in names]
+        ).values_list('name', flat=True))
+
+    def test_deleted_objects_drop_their_version_rows(self):
+        topic_key, user_key = versions.topic(self.topic.pk), versions.user(self.author.pk)
+        Reply.objects.create(topic=self.topic, author=self.author, content='y')
+        self.assertEqual(len(self.version_rows(topic_key, user_key)), 2)
+        etag = self.client.get(f'/topics/{self.topic.pk}/')['ETag']
+        self.topic.delete()
+        self.assertEqual(self.version_rows(topic_key), set())
+        self.assertEqual(self.client.get(f'/topics/{self.topic.pk}/', HTTP_IF_NONE_MATCH=etag).status_code, 404)
+        self.author.delete()
+        self.assertEqual(self.version_rows(topic_key, user_key), set())
+
+    def test_archived_topics_drop_their_version_rows(self):
+        Topic.objects.filter(pk=self.topic.pk).update(
+            is_closed=True, updated_at=timezone.now() - timedelta(days=60),
+        )
+        etag = self.client.get(f'/topics/{self.topic.pk}/')['ETag']
+        archive_topics([self.topic.pk], days=30)
+        self.assertEqual(self.version_rows(versions.topic(self.topic.pk)), set())
+        # Toujours servi depuis l'archive, avec un nouvel ETag
+        response = self.client.get(f'/topics/{self.topic.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(f'/topics/{self.topic.pk}/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get('/topics/')['Last-Modified']
+        self.assertEqual(self.client.get('/topics/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.assertEqual(
+            self.client.get('/topics/', HTTP_IF_MODIFIED_SINCE='Mon, 01 Jan 2001 00:00:00 GMT').status_code, 200,
+        )
+
+    def test_invalid_filter_is_not_served_as_304(self):
+        etag = self.client.get('/topics/')['ETag']
+        response = self.client.get('/topics/?category=inconnue', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 400)
+
+
+class ResponseCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = make_user()
+        self.topic = Topic.objects.create(title='Premier', content='x', author=self.author)
+        self.client = APIClient()
+
+    def test_second_anonymous_read_is_a_hit(self):
+        for url in ('/topics/', f'/topics/{self.topic.pk}/'):
+            self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+            self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+    def test_write_invalidates_cached_responses(self):
+        self.client.get(f'/topics/{self.topic.pk}/')
+        self.client.get('/topics/')
+        self.topic.title = 'Renommé'
+        self.topic.save()  # version du topic incrémentée par le signal post_save
+        detail = self.client.get(f'/topics/{self.topic.pk}/')
+        self.assertEqual((detail['X-Cache'], detail.data['title']), ('MISS', 'Renommé'))
+        Topic.objects.create(title='Second', content='x', author=self.author)
+        listing = self.client.get('/topics/')
+        self.assertEqual((listing['X-Cache'], len(listing.data['results'])), ('MISS', 2))
+
+    def test_query_strings_have_their_own_entries(self):
+        self.client.get('/topics/')
+        self.assertEqual(self.client.get('/topics/?category=aide')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/topics/?category=aide').data['results'], [])
+
+    def test_authenticated_reads_are_not_cached(self):
+        self.client.get('/topics/')
+        token = Token.objects.create(user=self.author)
+        with_token = APIClient()
+        with_token.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertNotIn('X-Cache', with_token.get('/topics/'))
+        forced = APIClient()
+        forced.force_authenticate(self.author)
+        self.assertNotIn('X-Cache', forced.get('/topics/'))
+
+    def test_concurrent_misses_build_once(self):
+        responses = ResponseCache(timeout=60)
+        request = RequestFactory().get('/topics/')
+        started, release, builds = threading.Event(), threading.Event(), []
+
+        def build():
+            builds.append(1)
+            started.set()
+            release.wait(5)
+            return {'results': []}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(responses.fetch(request, 'W/"1"', build)))
+                   for _ in range(4)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(sorted(hit for _, hit in results), [False, True, True, True])
+
+
+class CounterTests(TestCase):
+
+    def setUp(self):
+        self.author = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def create_topic(self):
+        response = self.client.post('/topics/', {'title': 'Compteurs', 'content': 'x', 'category': 'general'})
+        self.assertEqual(response.status_code, 201)
+        return Topic.objects.get(pk=response.data['id'])
+
+    def reply(self, topic):
+        response = self.client.post(f'/topics/{topic.pk}/replies/', {'content': 'Réponse'})
+        self.assertEqual(response.status_code, 201)
+        return Reply.objects.get(pk=response.data['id'])
+
+    def test_reply_counters_follow_creations_and_deletions(self):
+        topic = self.create_topic()
+        first, second = self.reply(topic), self.reply(topic)
+        topic.refresh_from_db()
+        self.assertEqual((topic.reply_count, topic.last_reply_at), (2, second.created_at))
+        self.assertEqual(self.client.delete(f'/topics/replies/{second.pk}/').status_code, 204)
+        topic.refresh_from_db()
+        self.assertEqual((topic.reply_count, topic.last_reply_at), (1, first.created_at))
+        self.client.delete(f'/topics/replies/{first.pk}/')
+        topic.refresh_from_db()
+        self.assertEqual((topic.reply_count, topic.last_reply_at), (0, None))
+
+    def test_post_count_follows_topics(self):
+        topics = [self.create_topic() for _ in range(2)]
+        self.assertEqual(User.objects.get(pk=self.author.pk).nombre_posts, 2)
+        self.assertEqual(self.client.delete(f'/topics/{topics[0].pk}/').status_code, 204)
+        self.assertEqual(User.objects.get(pk=self.author.pk).nombre_posts, 1)
+
+    def test_rebuild_commands_repair_corrupted_values(self):
+        topic = self.create_topic()
+        reply = self.reply(topic)
+        Topic.objects.filter(pk=topic.pk).update(reply_count=7, last_reply_at=None)
+        User.objects.filter(pk=self.author.pk).update(nombre_posts=42)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_topic_counters', '--check', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('rebuild_post_counts', '--check', stdout=StringIO())
+
+        call_command('rebuild_topic_counters', stdout=StringIO())
+        call_command('rebuild_post_counts', stdout=StringIO())
+        topic.refresh_from_db()
+        self.assertEqual((topic.reply_count, topic.last_reply_at), (1, reply.created_at))
+        self.assertEqual(User.objects.get(pk=self.author.pk).nombre_posts, 1)
+        call_command('rebuild_topic_counters', '--check', stdout=StringIO())
+        call_command('rebuild_post_counts', '--check', stdout=StringIO())
+
+
+class ViewCountBufferTests(TestCase):
+
+    def setUp(self):
+        author = make_user()
+        self.topics = [Topic.objects.create(title=f'Topic {i}', content='x', author=author) for i in range(3)]
+        # Intervalle d'une heure : seul flush(), appelé par le test, écrit en base
+        self.buffer = ViewCountBuffer(interval=3600, max_pending=10 ** 6)
+
+    def views(self, topic):
+        return Topic.objects.values_list('views', flat=True).get(pk=topic.pk)
+
+    def test_flush_writes_pending_views(self):
+        for topic, count in zip(self.topics, (3, 1, 1)):
+            for _ in range(count):
+                self.buffer.increment(topic.pk)
+        self.assertEqual(self.views(self.topics[0]), 0)
+        self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual([self.views(topic) for topic in self.topics], [3, 1, 1])
+        self.assertEqual(self.buffer.pending(self.topics[0].pk), 0)
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_concurrent_increments_are_merged(self):
+        def view():
+            for _ in range(100):
+                self.buffer.increment(self.topics[0].pk)
+        threads = [threading.Thread(target=view) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.buffer.pending(self.topics[0].pk), 800)
+        self.buffer.flush()
+        self.assertEqual(self.views(self.topics[0]), 800)
+
+    @override_settings(TOPIC_VIEWS_BUFFERED=False)
+    def test_unbuffered_views_are_written_at_once(self):
+        self.assertEqual(count_view(self.topics[1].pk), 1)
+        self.assertEqual(self.views(self.topics[1]), 1)
+        topic = Topic.objects.get(pk=self.topics[1].pk)
+        record_view(topic)
+        self.assertEqual((topic.views, self.views(topic)), (2, 2))
+
+
+class ReplyStreamCatchUpTests(TestCase):
+
+    class ClosingSubscription:
+        """Abonnement qui signale un débordement dès la première lecture : le flux se ferme"""
+        closed = False
+
+        async def get(self, timeout):
+            return OVERFLOW
+
+        def close(self):
+            self.closed = True
+
+    async def collect(self, topic_id, last_id):
+        subscription = self.ClosingSubscription()
+        events = [event async for event in reply_events(subscription, topic_id, last_id)]
+        self.assertTrue(subscription.closed)
+        return [int(event.split('\n')[0][len('id: '):]) for event in events if event.startswith('id: ')]
+
+    @override_settings(REPLY_STREAM_ENABLED=False)
+    def test_stream_is_disabled_outside_asgi(self):
+        topic = Topic.objects.create(title='Flux', content='x', author=make_user())
+        self.assertEqual(self.client.get(f'/topics/{topic.pk}/stream/').status_code, 404)
+
+    @override_settings(REPLY_STREAM_BACKLOG=2)
+    def test_catch_up_reads_every_missed_reply(self):
+        author = make_user()
+        topic = Topic.objects.create(title='Flux', content='x', author=author)
+        replies = [Reply.objects.create(topic=topic, author=author, content=str(i)) for i in range(5)]
+        ids = async_to_sync(self.collect)(topic.pk, replies[0].pk)
+        self.assertEqual(ids, [reply.pk for reply in replies[1:]])
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        self.author = make_user()
+        self.old = Topic.objects.create(title='Ancien', content='x', author=self.author, is_closed=True)
+        self.replies = [Reply.objects.create(topic=self.old, author=self.author, content=str(i)) for i in range(3)]
+        self.live = Topic.objects.create(title='Vivant', content='x', author=self.author)
+        self.live_reply = Reply.objects.create(topic=self.live, author=self.author, content='y')
+        long_ago = timezone.now() - timedelta(days=60)
+        Topic.objects.update(updated_at=long_ago, last_reply_at=long_ago)
+        # Compteurs tenus par les vues : recalculés pour partir d'un état juste
+        stats.reconcile()
+        rebuild_post_counts()
+
+    def test_moves_topic_and_all_its_replies(self):
+        self.assertEqual(archive_topics([self.old.pk, self.live.pk], days=30), (1, 3))
+        self.assertFalse(Topic.objects.filter(pk=self.old.pk).exists())
+        self.assertFalse(Reply.objects.filter(topic_id=self.old.pk).exists())
+        self.assertEqual(
+            sorted(ArchivedReply.objects.filter(topic_id=self.old.pk).values_list('id', flat=True)),
+            [reply.pk for reply in self.replies],
+        )
+        # Le topic ouvert n'est pas archivable : lui et sa réponse restent en place
+        self.assertTrue(Reply.objects.filter(pk=self.live_reply.pk).exists())
+        self.assertFalse(ArchivedTopic.objects.filter(pk=self.live.pk).exists())
+
+    def test_counters_do_not_drift(self):
+        archive_topics([self.old.pk], days=30)
+        self.assertEqual(stats.reconcile(), {})
+        self.assertFalse(stale_post_counts().exists())
+        self.assertEqual(User.objects.get(pk=self.author.pk).nombre_posts, 2)
+
+    def test_archived_topic_stays_readable(self):
+        archive_topics([self.old.pk], days=30)
+        response = APIClient().get(f'/topics/{self.old.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'Ancien')
+        replies = APIClient().get(f'/topics/{self.old.pk}/replies/')
+        self.assertEqual(len(replies.data['results']), 3)
+
+    def test_archived_topic_rejects_replies(self):
+        archive_topics([self.old.pk], days=30)
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.post(f'/topics/{self.old.pk}/replies/', {'content': 'Trop tard'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(ArchivedReply.objects.filter(topic_id=self.old.pk).count(), 3)
+        self.assertEqual(client.post('/topics/999999/replies/', {'content': 'x'}).status_code, 404)
+
+
+class TransferTests(TestCase):
+
+    def setUp(self):
+        self.author = make_user()
+        hot = Topic.objects.create(title='Vivant', content='x', author=self.author)
+        Reply.objects.create(topic=hot, author=self.author, content='y')
+        old = Topic.objects.create(title='Ancien', content='x', author=self.author, is_closed=True)
+        for i in range(2):
+            Reply.objects.create(topic=old, author=self.author, content=str(i))
+        long_ago = timezone.now() - timedelta(days=60)
+        Topic.objects.filter(pk=old.pk).update(updated_at=long_ago, last_reply_at=long_ago, reply_count=2)
+        archive_topics([old.pk], days=30)
+        self.archived_at = ArchivedTopic.objects.get(pk=old.pk).archived_at
+
+    def export_and_import(self):
+        with tempfile.TemporaryDirectory() as directory:
+            call_command('export_forum', directory, stdout=StringIO())
+            call_command('import_forum', directory, stdout=StringIO())
+
+    def test_archives_are_exported_and_restored(self):
+        self.export_and_import()
+        # Même base : les objets sont recréés à côté des originaux, l'auteur est réutilisé
+        self.assertEqual(Topic.objects.count(), 2)
+        self.assertEqual(ArchivedTopic.objects.count(), 2)
+        self.assertEqual(ArchivedReply.objects.count(), 4)
+        copy = ArchivedTopic.objects.latest('pk')
+        self.assertEqual((copy.title, copy.reply_count, copy.archived_at), ('Ancien', 2, self.archived_at))
+        self.assertEqual(copy.replies.count(), 2)
+
+    def snapshot(self):
+        """Contenu du forum sans les ids, qui changent à l'import"""
+        topic_fields = ('title', 'content', 'category', 'created_at', 'updated_at', 'views', 'is_pinned',
+                        'is_closed', 'reply_count', 'last_reply_at', 'author__username')
+        reply_fields = ('topic__title', 'author__username', 'content', 'created_at', 'updated_at', 'likes')
+        return {
+            'users': list(User.objects.order_by('username').values(
+                'username', 'email', 'password', 'bio', 'nombre_posts', 'date_joined', 'is_staff',
+            )),
+            'topics': list(Topic.objects.order_by('title').values(*topic_fields)),
+            'replies': list(Reply.objects.order_by('content').values(*reply_fields)),
+            'archived_topics': list(ArchivedTopic.objects.order_by('title').values(*topic_fields, 'archived_at')),
+            'archived_replies': list(ArchivedReply.objects.order_by('content').values(*reply_fields)),
+        }
+
+    def test_round_trip_into_empty_database(self):
+        make_user('bob')
+        live = Topic.objects.get(title='Vivant')
+        Topic.objects.filter(pk=live.pk).update(views=12, is_pinned=True)
+        Reply.objects.filter(topic=live).update(likes=3)
+        # Réponses créées sans passer par les vues : compteurs recalculés comme après un import
+        rebuild_reply_counters()
+        rebuild_post_counts()
+        before = self.snapshot()
+
+        with tempfile.TemporaryDirectory() as directory:
+            call_command('export_forum', directory, stdout=StringIO())
+            for model in (Reply, Topic, ArchivedReply, ArchivedTopic, ImportedRecord, User):
+                model.objects.all().delete()
+            call_command('import_forum', directory, stdout=StringIO())
+            self.assertEqual(self.snapshot(), before)
+            self.assertTrue(User.objects.get(username='alice').check_password('secret-password'))
+
+            # Relancé sur le même export : rien n'est dupliqué
+            call_command('import_forum', directory, stdout=StringIO())
+            self.assertEqual(self.snapshot(), before)
+        self.assertEqual(stats.reconcile(), {})
+
+    def test_imported_archive_ids_are_not_reused(self):
+        self.export_and_import()
+        topic = Topic.objects.create(title='Nouveau', content='x', author=self.author)
+        self.assertFalse(ArchivedTopic.objects.filter(pk=topic.pk).exists())
+        reply = Reply.objects.create(topic=topic, author=self.author, content='z')
+        self.assertFalse(ArchivedReply.objects.filter(pk=reply.pk).exists())
+
+    def test_counters_include_imported_archives(self):
+        self.export_and_import()
+        self.assertEqual(stats.reconcile(), {})
+        self.assertFalse(stale_post_counts().exists())
+        self.assertEqual(User.objects.get(pk=self.author.pk).nombre_posts, 4)
+
+
+class BenchmarkCommandTests(TestCase):
+
+    def test_write_scenarios_leave_data_and_settings_untouched(self):
+        author = make_user()
+        Topic.objects.create(title='Mesuré', content='x', author=author)
+        scenarios = ['topic-list-create', 'topic-create', 'topic-update', 'topic-delete',
+                     'reply-create', 'reply-update', 'reply-delete']
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command(
+                'benchmark_api', '--iterations', '2', '--warmup', '1', '--no-response-cache',
+                '--output', output.name, '--only', *scenarios, stdout=StringIO(), stderr=StringIO(),
+            )
+            results = json.load(output)['results']
+        self.assertEqual(list(results), scenarios)
+        expected = {'GET': [200], 'POST': [201], 'PATCH': [200], 'DELETE': [204]}
+        for name, result in results.items():
+            self.assertEqual(result['status_codes'], expected[result['method']], name)
+        self.assertEqual((Topic.objects.count(), Reply.objects.count(), User.objects.count()), (1, 0, 1))
+        self.assertTrue(settings.RESPONSE_CACHE_ENABLED and settings.ADMISSION_CONTROL)
+
+
+class ChangesTests(TestCase):
+
+    def setUp(self):
+        self.author = make_user()
+        self.topic = Topic.objects.create(title='Suivi', content='x', author=self.author)
+        self.replies = [Reply.objects.create(topic=self.topic, author=self.author, content=str(i)) for i in range(2)]
+        self.client = APIClient()
+
+    def test_orm_writes_are_logged(self):
+        token = changes.current_token()
+        self.topic.title = 'Renommé'
+        self.topic.save()
+        reply_id = self.replies[0].pk
+        self.replies[0].delete()
+        delta = changes.collect(token, 100)
+        self.assertEqual(delta['topics'], {self.topic.pk})
+        self.assertEqual(delta['deleted_replies'], {reply_id})
+
+    def test_cascade_delete_leaves_tombstones(self):
+        token = changes.current_token()
+        self.author.delete()
+        delta = changes.collect(token, 100)
+        self.assertEqual(delta['deleted_topics'], {self.topic.pk})
+        # Les réponses partent avec leur topic : pas listées une à une
+        self.assertEqual(delta['deleted_replies'], set())
+        self.assertEqual(delta['topics'], set())
+
+    def test_api_write_is_logged_once(self):
+        token = changes.current_token()
+        self.client.force_authenticate(self.author)
+        response = self.client.post(f'/topics/{self.topic.pk}/replies/', {'content': 'Nouvelle'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Change.objects.filter(id__gt=token, kind=Change.REPLY).count(), 1)
+
+    def test_expired_tokens_include_the_current_one(self):
+        token = changes.current_token()
+        changes.expire_tokens()
+        with self.assertRaises(changes.ExpiredToken):
+            changes.collect(token, 100)
+        response = self.client.get('/topics/changes/', {'since': token})
+        self.assertEqual(response.status_code, 410)
+        fresh = response.data['sync_token']
+        self.assertEqual(self.client.get('/topics/changes/', {'since': fresh}).status_code, 200)
+
+    def test_rejects_tokens_beyond_bigint(self):
+        for since in (str(2 ** 63), '9' * 40, '-1', '١'):
+            self.assertEqual(self.client.get('/topics/changes/', {'since': since}).status_code, 400)
@@ -0,0 +1,121 @@
+"""
+Format d'échange des commandes export_forum / import_forum.
+
+Un export est un dossier :
+    manifest.json        identifiant de l'export, progression et taille de chaque fichier
+    users.jsonl.gz       une ligne JSON par objet, {"id": ..., champ: valeur, ...}
+    topics.jsonl.gz      clés étrangères écrites avec l'id d'origine (author, topic)
+    replies.jsonl.gz
+    archived_topics.jsonl.gz, archived_replies.jsonl.gz
+Chaque lot est ajouté comme un membre gzip distinct : le fichier reste lisible d'un bloc
+et une reprise tronque simplement le fichier à la dernière taille enregistrée.
+"""
+import json
+from contextlib import contextmanager
+
+from django.core.management import call_command
+
+from authentificationAPI.models import User
+from searchAPI import index, stats, versions
+from searchAPI.result_cache import search_results
+from . import changes
+from .counters import rebuild_post_counts, rebuild_reply_counters
+from .models import Topic, Reply, ArchivedTopic, ArchivedReply
+
+
+class Kind:
+    """Un type d'objet exporté : modèle, champs copiés tels quels et clés étrangères"""
+
+    def __init__(self, name, model, fields, foreign_keys=(), import_as=None):
+        self.name = name
+        self.model = model
+        # Modèle créé à l'import : les archives sont importées comme des objets vivants puis
+        # archivées, pour prendre leurs ids dans la séquence des tables chaudes
+        self.import_model = import_as or model
+        self.fields = fields
+        # (champ du fichier, attribut du modèle, type d'objet visé)
+        self.foreign_keys = foreign_keys
+        self.filename = f'{name}.jsonl.gz'
+
+    def columns(self):
+        return ['id', *self.fields, *(attname for _, attname, _ in self.foreign_keys)]
+
+    def import_fields(self):
+        """Champs écrits à l'import (archived_at n'existe que dans l'archive)"""
+        names = {field.name for field in self.import_model._meta.get_fields()}
+        return [name for name in self.fields if name in names]
+
+    def date_fields(self):
+        return [
+            field for field in (self.import_model._meta.get_field(name) for name in self.import_fields())
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+        ]
+
+
+# Dans l'ordre d'import : un objet est importé après ceux qu'il référence
+KINDS = [
+    Kind('users', User, [
+        'username', 'email', 'password', 'first_name', 'last_name', 'bio', 'avatar', 'avatar_hash',
+        'is_active', 'is_staff', 'is_superuser', 'last_login', 'date_joined', 'date_inscription',
+    ]),
+    Kind('topics', Topic, [
+        'title', 'content', 'category', 'created_at', 'updated_at', 'views', 'is_pinned', 'is_closed',
+    ], foreign_keys=[('author', 'author_id', 'users')]),
+    Kind('replies', Reply, [
+        'content', 'created_at', 'updated_at', 'likes',
+    ], foreign_keys=[('topic', 'topic_id', 'topics'), ('author', 'author_id', 'users')]),
+    # Compteurs exportés : rebuild_reply_counters ne recalcule que les topics vivants
+    Kind('archived_topics', ArchivedTopic, [
+        'title', 'content', 'category', 'created_at', 'updated_at', 'views', 'is_pinned', 'is_closed',
+        'reply_count', 'last_reply_at', 'archived_at',
+    ], foreign_keys=[('author', 'author_id', 'users')], import_as=Topic),
+    Kind('archived_replies', ArchivedReply, [
+        'content', 'created_at', 'updated_at', 'likes',
+    ], foreign_keys=[('topic', 'topic_id', 'archived_topics'), ('author', 'author_id', 'users')], import_as=Reply),
+]
+ARCHIVED_TOPICS = KINDS[3]
+
+
+def encode(kind, row):
+    """Ligne JSON d'un dict issu de .values(*kind.columns())"""
+    record = {'id': row['id']}
+    for name in kind.fields:
+        value = row[name]
+        record[name] = value.isoformat() if hasattr(value, 'isoformat') else value
+    for key, attname, _ in kind.foreign_keys:
+        record[key] = row[attname]
+    return json.dumps(record, ensure_ascii=False)
+
+
+def decode(kind, record):
+    """Valeurs des champs (hors id et clés étrangères) converties pour le modèle importé"""
+    meta = kind.model._meta
+    return {name: meta.get_field(name).to_python(record.get(name)) for name in kind.import_fields() if name in record}
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Désactive auto_now / auto_now_add le temps d'un bulk_create pour écrire ses propres dates"""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def refresh_derived_data(stdout, batch_size=2000):
+    """
+    bulk_create ne déclenche pas les signaux : recalcule compteurs, statistiques, versions et
+    index, et invalide les jetons de synchronisation (les lignes créées ne sont pas journalisées)
+    """
+    rebuild_reply_counters()
+    rebuild_post_counts()
+    stats.reconcile()
+    versions.bump(versions.TOPICS, versions.USERS)
+    changes.expire_tokens()
+    search_results.bump()
+    if index.is_available():
+        call_command('rebuild_search_index', batch_size=batch_size, stdout=stdout)
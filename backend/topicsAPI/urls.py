@@ -1,11 +1,15 @@
 from django.urls import path
-from . import views
+from . import views, streaming
 
 urlpatterns = [
     # ===== TOPICS =====
     path('', views.TopicListCreateView.as_view(), name='topic-list-create'),
     path('<int:id>/', views.TopicRetrieveUpdateDestroyView.as_view(), name='topic-detail'),
+    path('batch/', views.topic_batch, name='topic-batch'),
+    path('changes/', views.topic_changes, name='topic-changes'),
 
     # ===== RÉPONSES =====
     path('<int:topic_id>/replies/', views.ReplyListCreateView.as_view(), name='reply-list-create'),
+    path('<int:topic_id>/stream/', streaming.reply_stream, name='reply-stream'),
+    path('replies/<int:id>/', views.ReplyRetrieveUpdateDestroyView.as_view(), name='reply-detail'),
 ]
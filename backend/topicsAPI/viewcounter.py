@@ -0,0 +1,108 @@
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from .models import Topic
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCountBuffer:
+    """
+    Tampon en mémoire des vues de topics (write-behind).
+    Les lectures ne font qu'incrémenter un compteur local ; un thread d'arrière-plan
+    écrit les cumuls par lots de `views = views + n` au plus toutes les `interval`
+    secondes, plus tôt si `max_pending` vues sont en attente, et une dernière fois
+    à l'arrêt du processus.
+    """
+
+    def __init__(self, interval=5.0, max_pending=1000):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = Counter()
+        self._total = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def increment(self, topic_id):
+        """Ajoute une vue et retourne le nombre de vues en attente pour ce topic"""
+        with self._lock:
+            self._pending[topic_id] += 1
+            self._total += 1
+            count = self._pending[topic_id]
+            full = self._total >= self.max_pending
+            if self._thread is None:
+                self._start()
+        if full:
+            self._wakeup.set()
+        return count
+
+    def pending(self, topic_id):
+        """Vues pas encore écrites en base pour ce topic"""
+        with self._lock:
+            return self._pending.get(topic_id, 0)
+
+    def flush(self):
+        """Écrit les vues en attente ; regroupe les topics ayant le même incrément dans un seul UPDATE"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._total = 0
+        if not pending:
+            return 0
+
+        by_increment = defaultdict(list)
+        for topic_id, count in pending.items():
+            by_increment[count].append(topic_id)
+        try:
+            with transaction.atomic():
+                for count, topic_ids in by_increment.items():
+                    Topic.objects.filter(pk__in=topic_ids).update(views=F('views') + count)
+        except Exception:
+            # On remet les vues dans le tampon pour la prochaine tentative
+            logger.exception("Échec de l'écriture des vues de topics")
+            with self._lock:
+                self._pending.update(pending)
+                self._total += sum(pending.values())
+            return 0
+        return len(pending)
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name='topic-view-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+
+buffer = ViewCountBuffer(
+    interval=getattr(settings, 'TOPIC_VIEWS_FLUSH_INTERVAL', 5.0),
+    max_pending=getattr(settings, 'TOPIC_VIEWS_MAX_PENDING', 1000),
+)
+
+
+def count_view(topic_id):
+    """
+    Compte une vue pour le topic `topic_id` et retourne le nombre de vues à ajouter
+    à une ligne lue avant cet appel. Avec TOPIC_VIEWS_BUFFERED = False, la vue est
+    écrite immédiatement en base.
+    """
+    if getattr(settings, 'TOPIC_VIEWS_BUFFERED', True):
+        return buffer.increment(topic_id)
+    Topic.objects.filter(pk=topic_id).update(views=F('views') + 1)
+    return 1
+
+
+def record_view(topic):
+    """Compte une vue pour `topic` et met à jour `topic.views` pour la réponse"""
+    topic.views += count_view(topic.pk)
@@ -1,17 +1,83 @@
-from rest_framework import generics
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.conf import settings
+from rest_framework import generics, status
+from rest_framework.decorators import api_view
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
-from .models import Topic, Reply
+from .models import Topic, Reply, ArchivedTopic, ArchivedReply
 from .serializers import TopicSerializer, TopicListSerializer, ReplySerializer
+from .pagination import TopicPagination, ReplyPagination
+from . import changes, counters
+from .viewcounter import count_view, record_view
+from .pubsub import get_broker, topic_channel
+from gestionAPI.batch import batch_response, parse_ids, to_id
+from gestionAPI.conditional import ConditionalGetMixin, cached_response, make_validators, not_modified
+from gestionAPI.streaming import StreamingListMixin, is_streaming
+from searchAPI import versions
 
 
-class TopicListCreateView(generics.ListCreateAPIView):
+class ArchiveFallbackMixin:
+    """Détail en lecture : un objet absent de la table chaude est cherché dans l'archive"""
+    archive_queryset = None
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            if self.request.method not in SAFE_METHODS:
+                raise
+            obj = get_object_or_404(self.archive_queryset.all(), pk=self.kwargs[self.lookup_field])
+            self.check_object_permissions(self.request, obj)
+            return obj
+
+
+BOOLEAN_PARAMS = {'true': True, '1': True, 'false': False, '0': False}
+
+
+class TopicListCreateView(ConditionalGetMixin, StreamingListMixin, generics.ListCreateAPIView):
     """
-    GET: Liste tous les topics (lecture seule pour tous, authentification non requise)
+    GET: Liste paginée des topics, ?cursor= pour la page suivante (lecture seule pour tous)
+         Filtres : ?category=aide, ?author=<id>, ?is_closed=true|false, ?is_pinned=true|false
+         ?stream=true : liste complète en streaming
     POST: Créer un nouveau topic (authentification requise)
     """
-    queryset = Topic.objects.all()
+    queryset = Topic.objects.select_related('author')
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = TopicPagination
+    cache_responses = True
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        params = self.request.query_params
+        # Chaque filtre a un index composite qui reprend l'ordre de la liste (voir Topic.Meta)
+        category = params.get('category')
+        if category:
+            if category not in dict(Topic.CATEGORY_CHOICES):
+                raise ValidationError({'category': f"Catégorie inconnue : {category}"})
+            queryset = queryset.filter(category=category)
+        author = params.get('author')
+        if author is not None:
+            author_id = to_id(author)
+            if author_id is None:
+                raise ValidationError({'author': "Identifiant d'utilisateur invalide"})
+            queryset = queryset.filter(author_id=author_id)
+        for field in ('is_closed', 'is_pinned'):
+            value = params.get(field)
+            if value is not None:
+                if value.lower() not in BOOLEAN_PARAMS:
+                    raise ValidationError({field: "Valeur attendue : true ou false"})
+                # __in plutôt que l'égalité : Django écrit « WHERE is_closed » / « WHERE NOT is_closed »
+                # pour un booléen, ce que SQLite ne sait pas servir par l'index
+                queryset = queryset.filter(**{f'{field}__in': [BOOLEAN_PARAMS[value.lower()]]})
+        return queryset
+
+    def get_validators(self):
+        return make_validators(versions.read(versions.TOPICS))
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -19,65 +85,116 @@ class TopicListCreateView(generics.ListCreateAPIView):
         return TopicSerializer
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            topic = serializer.save(author=self.request.user)
+            counters.topic_created(topic)
 
 
-class TopicRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class TopicRetrieveUpdateDestroyView(ArchiveFallbackMixin, generics.RetrieveUpdateDestroyAPIView):
     """
-    GET: Récupérer un topic avec ses réponses (lecture seule pour tous)
+    GET: Récupérer un topic avec ses réponses (lecture seule pour tous), archivé compris
     PUT/PATCH: Modifier un topic (auteur seulement)
     DELETE: Supprimer un topic (auteur seulement)
     """
-    queryset = Topic.objects.all()
+    queryset = Topic.objects.select_related('author')
+    archive_queryset = ArchivedTopic.objects.select_related('author')
     serializer_class = TopicSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     lookup_field = "id"
 
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        # Incrémenter le nombre de vues
-        instance.views += 1
-        instance.save(update_fields=['views'])
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        topic_id = self.kwargs[self.lookup_field]
+        # Les versions suffisent pour répondre 304 ou lire le cache, sans charger le topic
+        etag, last_modified = make_validators(versions.read(versions.topic(topic_id)))
+        counted = False
+
+        def build():
+            nonlocal counted
+            instance = self.get_object()
+            # Incrémenter le nombre de vues (mis en tampon, voir viewcounter) ; figé une fois archivé
+            if isinstance(instance, Topic):
+                record_view(instance)
+            counted = True
+            return self.get_serializer(instance).data
+
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = cached_response(request, etag, last_modified, build)
+        if not counted:
+            count_view(topic_id)
+        return response
 
     def perform_update(self, serializer):
         # Seul l'auteur peut modifier
         if serializer.instance.author != self.request.user:
             raise PermissionError("Vous ne pouvez modifier que vos propres topics")
-        serializer.save()
+        # Transaction : la ligne du journal (signal post_save) est validée avec le topic
+        with transaction.atomic():
+            serializer.save()
 
     def perform_destroy(self, instance):
         # Seul l'auteur peut supprimer
         if instance.author != self.request.user:
             raise PermissionError("Vous ne pouvez supprimer que vos propres topics")
-        instance.delete()
+        with transaction.atomic():
+            instance.delete()
+            counters.topic_deleted(instance.author_id)
 
 
-class ReplyListCreateView(generics.ListCreateAPIView):
+class ReplyListCreateView(ConditionalGetMixin, StreamingListMixin, generics.ListCreateAPIView):
     """
-    GET: Liste toutes les réponses d'un topic
+    GET: Liste paginée des réponses d'un topic, ?cursor= pour la page suivante,
+         ?stream=true pour toutes les réponses en streaming
     POST: Créer une nouvelle réponse (authentification requise)
     """
     serializer_class = ReplySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = ReplyPagination
+    archived = False
 
     def get_queryset(self):
         topic_id = self.kwargs.get('topic_id')
-        return Reply.objects.filter(topic_id=topic_id)
+        model = ArchivedReply if self.archived else Reply
+        return model.objects.filter(topic_id=topic_id).select_related('author')
+
+    def list(self, request, *args, **kwargs):
+        topic_id = self.kwargs.get('topic_id')
+        if is_streaming(request):
+            self.archived = ArchivedTopic.objects.filter(pk=topic_id).exists()
+            return super().list(request, *args, **kwargs)
+        response = super().list(request, *args, **kwargs)
+        # Page vide : le topic a peut-être été archivé avec ses réponses
+        if not response.data['results'] and ArchivedTopic.objects.filter(pk=topic_id).exists():
+            self.archived = True
+            response = super().list(request, *args, **kwargs)
+        return response
+
+    def get_validators(self):
+        return make_validators(versions.read(versions.topic(self.kwargs.get('topic_id'))))
 
     def perform_create(self, serializer):
         topic_id = self.kwargs.get('topic_id')
-        serializer.save(author=self.request.user, topic_id=topic_id)
+        # Sans topic vivant, la clé étrangère ferait échouer l'insertion (500)
+        if not Topic.objects.filter(pk=topic_id).exists():
+            if ArchivedTopic.objects.filter(pk=topic_id).exists():
+                raise PermissionDenied("Topic archivé : il n'accepte plus de réponses")
+            raise Http404
+        with transaction.atomic():
+            reply = serializer.save(author=self.request.user, topic_id=topic_id)
+            counters.reply_created(reply)
+            # Diffusion aux clients abonnés au flux du topic, une fois la réponse enregistrée
+            data = serializer.data
+            transaction.on_commit(lambda: get_broker().publish(topic_channel(topic_id), data))
 
 
-class ReplyRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class ReplyRetrieveUpdateDestroyView(ArchiveFallbackMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     GET: Récupérer une réponse
     PUT/PATCH: Modifier une réponse (auteur seulement)
     DELETE: Supprimer une réponse (auteur seulement)
     """
-    queryset = Reply.objects.all()
+    queryset = Reply.objects.select_related('author')
+    archive_queryset = ArchivedReply.objects.select_related('author')
     serializer_class = ReplySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     lookup_field = "id"
@@ -85,9 +202,67 @@ class ReplyRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     def perform_update(self, serializer):
         if serializer.instance.author != self.request.user:
             raise PermissionError("Vous ne pouvez modifier que vos propres réponses")
-        serializer.save()
+        with transaction.atomic():
+            serializer.save()
 
     def perform_destroy(self, instance):
         if instance.author != self.request.user:
             raise PermissionError("Vous ne pouvez supprimer que vos propres réponses")
-        instance.delete()
+        with transaction.atomic():
+            instance.delete()
+            counters.reply_deleted(instance.topic_id)
+
+
+@api_view(['GET'])
+def topic_batch(request):
+    """
+    Endpoint pour récupérer plusieurs topics en une requête : /topics/batch/?ids=1,2,3
+    Les ids introuvables sont listés dans "errors"
+    """
+    ids, error = parse_ids(request)
+    if error is not None:
+        return error
+    return batch_response(
+        ids, Topic.objects.select_related('author'), TopicListSerializer, {'request': request},
+        fallback=ArchivedTopic.objects.select_related('author'),
+    )
+
+
+@api_view(['GET'])
+def topic_changes(request):
+    """
+    Flux de synchronisation incrémentale : /topics/changes/?since=<sync_token>
+    Retourne les topics et réponses créés ou modifiés depuis le jeton, les ids supprimés
+    ("deleted") et le nouveau "sync_token" ; "has_more": true tant qu'il reste des lignes.
+    Sans ?since=, retourne seulement le jeton courant, à demander avant un chargement complet.
+    410 si le jeton a expiré : recharger les listes puis repartir du "sync_token" renvoyé.
+    """
+    since = request.query_params.get('since')
+    if since is None:
+        return Response({'sync_token': str(changes.current_token())})
+    since = to_id(since)
+    if since is None:
+        raise ValidationError({'since': "Jeton de synchronisation invalide"})
+
+    try:
+        delta = changes.collect(since, getattr(settings, 'CHANGES_PAGE_SIZE', 500))
+    except changes.ExpiredToken:
+        return Response({
+            'error': "Jeton de synchronisation expiré, rechargez les listes",
+            'sync_token': str(changes.current_token()),
+        }, status=status.HTTP_410_GONE)
+
+    context = {'request': request}
+    topics = Topic.objects.select_related('author').in_bulk(delta['topics']) if delta['topics'] else {}
+    replies = Reply.objects.select_related('author').in_bulk(delta['replies']) if delta['replies'] else {}
+    # Un objet absent a été supprimé ou archivé depuis : la ligne correspondante viendra ensuite
+    return Response({
+        'sync_token': str(delta['sync_token']),
+        'has_more': delta['has_more'],
+        'topics': TopicListSerializer(sorted(topics.values(), key=lambda t: t.pk), many=True, context=context).data,
+        'replies': ReplySerializer(sorted(replies.values(), key=lambda r: r.pk), many=True, context=context).data,
+        'deleted': {
+            'topics': sorted(delta['deleted_topics']),
+            'replies': sorted(delta['deleted_replies']),
+        },
+    })
@@ -59,6 +59,9 @@ export const authAPI = {
         return userStr ? JSON.parse(userStr) : null;
     },
 
+    // Récupère plusieurs utilisateurs en une requête ({ results: {id: user}, errors: {id: message} })
+    getUsersBatch: (ids: number[]) => authApi.get('/user/batch/', { params: { ids: ids.join(',') } }),
+
     // Récupère l'utilisateur connecté depuis l'API (toujours à jour)
     getCurrentUser: () => authApi.get('/me/'),
 
@@ -72,12 +75,23 @@ export const authAPI = {
 
 // Fonctions pour les topics
 export const topicsAPI = {
-    // Liste tous les topics
-    getTopics: () => topicsApi.get('/'),
+    // Première page de la liste des topics ({ results, next }), filtrée par catégorie ou auteur
+    getTopics: (params: { category?: string; author?: number; page_size?: number } = {}) =>
+        topicsApi.get('/', { params }),
+
+    // Page suivante de la liste à partir de l'URL "next" renvoyée par l'API
+    getTopicsPage: (url: string) => topicsApi.get(url),
 
     // Récupère un topic spécifique avec ses réponses
     getTopic: (id: number) => topicsApi.get(`/${id}/`),
 
+    // Modifications depuis un jeton de synchronisation (sans jeton : jeton courant seulement)
+    // { sync_token, has_more, topics, replies, deleted: { topics, replies } }, 410 si expiré
+    getChanges: (since?: string) => topicsApi.get('/changes/', { params: since ? { since } : {} }),
+
+    // Récupère plusieurs topics en une requête ({ results: {id: topic}, errors: {id: message} })
+    getTopicsBatch: (ids: number[]) => topicsApi.get('/batch/', { params: { ids: ids.join(',') } }),
+
     // Crée un nouveau topic (authentification requise)
     createTopic: (title: string, content: string, category: string) =>
         topicsApi.post('/', { title, content, category }),
@@ -92,10 +106,22 @@ export const topicsAPI = {
     // Récupère les réponses d'un topic
     getReplies: (topicId: number) => topicsApi.get(`/${topicId}/replies/`),
 
+    // Récupère une page de réponses à partir de l'URL "next" renvoyée par l'API
+    getRepliesPage: (url: string) => topicsApi.get(url),
+
     // Crée une réponse à un topic (authentification requise)
     createReply: (topicId: number, content: string) =>
         topicsApi.post(`/${topicId}/replies/`, { content }),
 
+    // S'abonne au flux des nouvelles réponses d'un topic (Server-Sent Events).
+    // Seulement si le backend est servi en ASGI (NEXT_PUBLIC_REPLY_STREAM=true), sinon null
+    streamReplies: (topicId: number, onReply: (reply: any) => void): EventSource | null => {
+        if (process.env.NEXT_PUBLIC_REPLY_STREAM !== 'true') return null;
+        const source = new EventSource(`${API_URL}/topics/${topicId}/stream/`);
+        source.addEventListener('reply', (event) => onReply(JSON.parse((event as MessageEvent).data)));
+        return source;
+    },
+
     // Met à jour une réponse (auteur seulement)
     updateReply: (id: number, content: string) =>
         topicsApi.put(`/replies/${id}/`, { content }),
@@ -127,6 +153,8 @@ searchApi.interceptors.request.use(
 export const searchAPI = {
     // Recherche globale (topics + utilisateurs)
     globalSearch: (query: string) => searchApi.get('/', { params: { q: query } }),
+    // Autocomplétion des titres de topics et des pseudos (index en mémoire côté serveur)
+    suggest: (query: string, limit = 8) => searchApi.get('/suggest/', { params: { q: query, limit } }),
     // Récupérer les statistiques du forum
     getForumStats: () => searchApi.get('/stats/')
 };
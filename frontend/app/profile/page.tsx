@@ -75,13 +75,9 @@ export default function Profile() {
     try {
       const { topicsAPI, authAPI } = await import('../api');
       const userResponse = await authAPI.getCurrentUser();
-      const topicsResponse = await topicsAPI.getTopics();
-
-      // Filtrer les topics de l'utilisateur connecté
-      const userTopics = topicsResponse.data.filter(
-        (topic: any) => topic.author === userResponse.data.id
-      );
-      setRecentPosts(userTopics.slice(0, 5)); // Garder les 5 plus récents
+      // Filtré par l'API (?author=) : les 5 premiers topics de l'utilisateur, quelle que soit leur ancienneté
+      const topicsResponse = await topicsAPI.getTopics({ author: userResponse.data.id, page_size: 5 });
+      setRecentPosts(topicsResponse.data.results);
     } catch (err) {
       console.error('Erreur lors du chargement des topics:', err);
     }
@@ -20,9 +20,15 @@ interface User {
   username: string;
   bio: string;
   avatar: string | null;
+  avatar_urls: Record<string, string> | null;
   nombre_posts: number;
 }
 
+interface Suggestions {
+  topics: { id: number; title: string }[];
+  users: { id: number; username: string }[];
+}
+
 interface SearchResults {
   topics: Topic[];
   users: User[];
@@ -37,6 +43,7 @@ export default function SearchPage() {
   const [results, setResults] = useState<SearchResults>({ topics: [], users: [] });
   const [loading, setLoading] = useState(false);
   const [activeTab, setActiveTab] = useState<'topics' | 'users'>('topics');
+  const [suggestions, setSuggestions] = useState<Suggestions>({ topics: [], users: [] });
 
   useEffect(() => {
     if (query) {
@@ -44,6 +51,26 @@ export default function SearchPage() {
     }
   }, [query]);
 
+  // Suggestions au fil de la frappe : endpoint léger, la recherche complète attend la validation
+  useEffect(() => {
+    const term = searchQuery.trim();
+    if (!term || term === query) {
+      setSuggestions({ topics: [], users: [] });
+      return;
+    }
+    let cancelled = false;
+    import('../api').then(({ searchAPI }) => searchAPI.suggest(term))
+      .then((response) => {
+        if (!cancelled) setSuggestions(response.data);
+      })
+      .catch(() => {
+        if (!cancelled) setSuggestions({ topics: [], users: [] });
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [searchQuery, query]);
+
   const performSearch = async (searchTerm: string) => {
     if (!searchTerm.trim()) {
       setResults({ topics: [], users: [] });
@@ -119,6 +146,32 @@ export default function SearchPage() {
                 />
               </svg>
             </div>
+            {(suggestions.topics.length > 0 || suggestions.users.length > 0) && (
+              <div className="absolute z-10 mt-2 w-full bg-gray-800 border border-gray-700 rounded-2xl shadow-lg overflow-hidden">
+                {suggestions.topics.map((topic) => (
+                  <Link
+                    key={`topic-${topic.id}`}
+                    href={`/topics/${topic.id}`}
+                    className="block px-6 py-3 text-white hover:bg-gray-700/70 transition-colors"
+                  >
+                    {topic.title}
+                  </Link>
+                ))}
+                {suggestions.users.map((user) => (
+                  <button
+                    key={`user-${user.id}`}
+                    type="button"
+                    onClick={() => {
+                      setSearchQuery(user.username);
+                      router.push(`/search?q=${encodeURIComponent(user.username)}`);
+                    }}
+                    className="block w-full text-left px-6 py-3 text-gray-300 hover:bg-gray-700/70 transition-colors"
+                  >
+                    @{user.username}
+                  </button>
+                ))}
+              </div>
+            )}
           </form>
         </div>
 
@@ -276,7 +329,7 @@ export default function SearchPage() {
                         <div className="flex-shrink-0">
                           {user.avatar ? (
                             <img
-                              src={user.avatar}
+                              src={user.avatar_urls?.['128'] ?? user.avatar}
                               alt={user.username}
                               className="w-16 h-16 rounded-xl object-cover shadow-lg"
                             />
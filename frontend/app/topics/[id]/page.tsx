@@ -29,7 +29,10 @@ interface Topic {
   is_pinned: boolean;
   is_closed: boolean;
   reply_count: number;
-  replies: Reply[];
+  replies: {
+    next: string | null;
+    results: Reply[];
+  };
 }
 
 export default function TopicDetail() {
@@ -39,11 +42,33 @@ export default function TopicDetail() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [submitting, setSubmitting] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchTopic();
   }, [params.id]);
 
+  // Nouvelles réponses en direct, sans recharger le topic (backend ASGI seulement, voir streamReplies)
+  useEffect(() => {
+    let source: EventSource | null = null;
+    import('../../api').then(({ topicsAPI }) => {
+      source = topicsAPI.streamReplies(Number(params.id), (reply: Reply) => {
+        setTopic((current) => {
+          if (!current || current.replies.results.some((r) => r.id === reply.id)) return current;
+          return {
+            ...current,
+            reply_count: current.reply_count + 1,
+            // Tant que toutes les réponses ne sont pas chargées, la nouvelle arrivera avec "Voir plus"
+            replies: current.replies.next
+              ? current.replies
+              : { ...current.replies, results: [...current.replies.results, reply] }
+          };
+        });
+      });
+    });
+    return () => source?.close();
+  }, [params.id]);
+
   const fetchTopic = async () => {
     try {
       const { topicsAPI } = await import('../../api');
@@ -57,6 +82,26 @@ export default function TopicDetail() {
     }
   };
 
+  // Charge la page suivante des réponses (pagination par curseur)
+  const loadMoreReplies = async () => {
+    if (!topic?.replies.next) return;
+    setLoadingMore(true);
+    try {
+      const { topicsAPI } = await import('../../api');
+      const response = await topicsAPI.getRepliesPage(topic.replies.next);
+      setTopic({
+        ...topic,
+        replies: {
+          next: response.data.next,
+          results: [...topic.replies.results, ...response.data.results]
+        }
+      });
+    } catch (err: any) {
+      console.error('Erreur lors du chargement des réponses:', err);
+    }
+    setLoadingMore(false);
+  };
+
   const formatDate = (dateString: string) => {
     const date = new Date(dateString);
     const now = new Date();
@@ -197,16 +242,16 @@ export default function TopicDetail() {
         {/* Replies */}
         <div className="mb-6">
           <h2 className="text-2xl font-bold text-white mb-4">
-            {topic.replies.length} réponse{topic.replies.length > 1 ? 's' : ''}
+            {topic.reply_count} réponse{topic.reply_count > 1 ? 's' : ''}
           </h2>
 
-          {topic.replies.length === 0 ? (
+          {topic.replies.results.length === 0 ? (
             <div className="bg-gray-800/50 backdrop-blur-sm rounded-2xl shadow-xl border border-gray-700/60 px-8 py-12 text-center text-gray-400">
               <p>Aucune réponse pour le moment. Soyez le premier à répondre !</p>
             </div>
           ) : (
             <div className="space-y-4">
-              {topic.replies.map((reply: Reply) => (
+              {topic.replies.results.map((reply: Reply) => (
                 <div key={reply.id} className="bg-gray-800/50 backdrop-blur-sm rounded-2xl shadow-xl border border-gray-700/60">
                   <div className="px-8 py-5">
                     <div className="flex items-start gap-4">
@@ -244,6 +289,15 @@ export default function TopicDetail() {
                   </div>
                 </div>
               ))}
+              {topic.replies.next && (
+                <button
+                  onClick={loadMoreReplies}
+                  disabled={loadingMore}
+                  className="w-full px-6 py-3 bg-gray-800/50 border border-gray-700/60 text-gray-300 rounded-2xl hover:text-white transition-colors disabled:opacity-50"
+                >
+                  {loadingMore ? 'Chargement...' : 'Voir plus de réponses'}
+                </button>
+              )}
             </div>
           )}
         </div>
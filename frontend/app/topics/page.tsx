@@ -1,6 +1,6 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import Link from 'next/link';
 import Navbar from '../components/Navbar';
 
@@ -22,17 +22,31 @@ export default function Topics() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [selectedCategory, setSelectedCategory] = useState('Tous');
+  // URL de la page suivante (pagination par curseur), null à la fin de la liste
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const categories = ['Tous', 'general', 'questions', 'aide', 'annonces'];
 
+  // Jeton du flux /topics/changes/ : au retour sur l'onglet, seules les modifications sont relues
+  const syncToken = useRef<string | null>(null);
+
   useEffect(() => {
-    fetchTopics();
-  }, []);
+    fetchTopics(selectedCategory);
+    const onFocus = () => applyChanges(selectedCategory);
+    window.addEventListener('focus', onFocus);
+    return () => window.removeEventListener('focus', onFocus);
+  }, [selectedCategory]);
 
-  const fetchTopics = async () => {
+  // Le filtrage par catégorie est fait par l'API (?category=)
+  const fetchTopics = async (category: string) => {
     try {
       const { topicsAPI } = await import('../api');
-      const response = await topicsAPI.getTopics();
-      setTopics(response.data);
+      // Jeton demandé avant la liste : une modification faite entre les deux sera relue
+      const changes = await topicsAPI.getChanges();
+      syncToken.current = changes.data.sync_token;
+      const response = await topicsAPI.getTopics(category === 'Tous' ? {} : { category });
+      setTopics(response.data.results);
+      setNextPage(response.data.next);
       setLoading(false);
     } catch (err: any) {
       console.error('Erreur lors du chargement des topics:', err);
@@ -41,6 +55,59 @@ export default function Topics() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextPage) return;
+    setLoadingMore(true);
+    try {
+      const { topicsAPI } = await import('../api');
+      const response = await topicsAPI.getTopicsPage(nextPage);
+      // Un topic déjà affiché (ajouté par applyChanges) n'est pas dupliqué
+      setTopics((current) => {
+        const shown = new Set(current.map((topic) => topic.id));
+        return [...current, ...(response.data.results as Topic[]).filter((topic) => !shown.has(topic.id))];
+      });
+      setNextPage(response.data.next);
+    } catch (err: any) {
+      console.error('Erreur lors du chargement des topics suivants:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const applyChanges = async (category: string) => {
+    if (syncToken.current === null) return;
+    try {
+      const { topicsAPI } = await import('../api');
+      let hasMore = true;
+      while (hasMore) {
+        const { data } = await topicsAPI.getChanges(syncToken.current);
+        syncToken.current = data.sync_token;
+        hasMore = data.has_more;
+        const deleted = new Set<number>(data.deleted.topics);
+        const changed = (data.topics as Topic[]).filter(
+          (topic) => category === 'Tous' || topic.category === category
+        );
+        setTopics((current) => {
+          const byId = new Map(current.filter((topic) => !deleted.has(topic.id)).map((topic) => [topic.id, topic]));
+          changed.forEach((topic) => byId.set(topic.id, topic));
+          // Même ordre que l'API : épinglés, puis du plus récent au plus ancien
+          return Array.from(byId.values()).sort((a, b) =>
+            Number(b.is_pinned) - Number(a.is_pinned)
+            || b.created_at.localeCompare(a.created_at)
+            || b.id - a.id
+          );
+        });
+      }
+    } catch (err: any) {
+      // Jeton expiré (410) : rechargement complet
+      if (err.response?.status === 410) {
+        fetchTopics(category);
+      } else {
+        console.error('Erreur lors de la synchronisation des topics:', err);
+      }
+    }
+  };
+
   const formatDate = (dateString: string) => {
     const date = new Date(dateString);
     const now = new Date();
@@ -55,10 +122,6 @@ export default function Topics() {
     return date.toLocaleDateString('fr-FR');
   };
 
-  const filteredTopics = selectedCategory === 'Tous'
-    ? topics
-    : topics.filter(topic => topic.category === selectedCategory);
-
   return (
     <div className="min-h-screen bg-gradient-to-br from-gray-900 via-slate-900 to-black">
       <Navbar showNewTopicButton={true} />
@@ -111,13 +174,13 @@ export default function Topics() {
             <div className="px-8 py-12 text-center text-red-400">
               <p>{error}</p>
             </div>
-          ) : filteredTopics.length === 0 ? (
+          ) : topics.length === 0 ? (
             <div className="px-8 py-12 text-center text-gray-400">
               <p>Aucun topic pour le moment. Soyez le premier à en créer un !</p>
             </div>
           ) : (
             <div className="divide-y divide-gray-700/60">
-              {filteredTopics.map((topic) => (
+              {topics.map((topic) => (
                 <Link
                   key={topic.id}
                   href={`/topics/${topic.id}`}
@@ -177,25 +240,17 @@ export default function Topics() {
         </div>
 
         {/* Pagination */}
-        <div className="mt-6 flex justify-center">
-          <nav className="flex gap-2">
-            <button className="px-4 py-2 bg-gray-800/50 border border-gray-700 rounded-lg text-sm font-medium text-gray-300 hover:bg-gray-800 transition-all">
-              Précédent
-            </button>
-            <button className="px-4 py-2 bg-gradient-to-r from-blue-600 to-indigo-600 border-0 rounded-lg text-sm font-medium text-white shadow-lg shadow-blue-500/50">
-              1
-            </button>
-            <button className="px-4 py-2 bg-gray-800/50 border border-gray-700 rounded-lg text-sm font-medium text-gray-300 hover:bg-gray-800 transition-all">
-              2
-            </button>
-            <button className="px-4 py-2 bg-gray-800/50 border border-gray-700 rounded-lg text-sm font-medium text-gray-300 hover:bg-gray-800 transition-all">
-              3
-            </button>
-            <button className="px-4 py-2 bg-gray-800/50 border border-gray-700 rounded-lg text-sm font-medium text-gray-300 hover:bg-gray-800 transition-all">
-              Suivant
+        {!loading && !error && nextPage && (
+          <div className="mt-6 flex justify-center">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="px-6 py-2 bg-gray-800/50 border border-gray-700 rounded-lg text-sm font-medium text-gray-300 hover:bg-gray-800 transition-all disabled:opacity-50"
+            >
+              {loadingMore ? 'Chargement...' : 'Charger plus'}
             </button>
-          </nav>
-        </div>
+          </div>
+        )}
       </main>
     </div>
   );